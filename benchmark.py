@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Build pipeline benchmark. Runs color-my-desktop.sh end to end against a
+# throwaway HOME: the real templates from scss/ and a real dart-sass, but fake
+# dconf, plasma-apply-colorscheme, gtk-update-icon-cache, nautilus and flatpak
+# binaries, and a synthetic Papirus tree of the requested size. Nothing
+# outside the temp HOME is touched.
+#
+#   python3 benchmark.py --sass ~/.local/share/color-my-desktop/.venv/bin/sass
+#   python3 benchmark.py --icons 2000 --runs 5 --output before.json
+#   python3 benchmark.py --compare before.json --output after.json
+#
+# Scenarios:
+#   cold/<target>  one target alone with an empty cache (what it costs by itself)
+#   cold/all       every target with an empty cache
+#   repeat/all     the same build again (everything should be up to date)
+#   recolor/all    every target with new colors over a warm cache (new for every run)
+#
+# Timings come from the backend's progress events (see colormydesktop/progress.py),
+# the wall time is measured here around the whole backend process. Color-slot
+# learning, which the backend runs in the background after a build, is run
+# here right after it and reported as "learn" (cold scenarios pay it).
+# --service runs every build against one warm Sass service, the way the
+# GUI does for the builds of a session (colormydesktop/sass_service.py).
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from colormydesktop import sass_service
+from colormydesktop.progress import parse_event
+
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+BACKEND = os.path.join(REPO_DIR, "color-my-desktop.sh")
+
+# Stand-ins for the desktop tools, they only record how they were called.
+# flatpak says "not installed" like on a native system.
+FAKE_TOOLS = {
+    "dconf": 0,
+    "plasma-apply-colorscheme": 0,
+    "gtk-update-icon-cache": 0,
+    "nautilus": 0,
+    "flatpak": 1,
+}
+
+# Backend toggles, by position in the CLI contract (API.md)
+TOGGLES = {"zen": 6, "icons": 13, "gnome-shell": 17, "gtk4": 18, "kde": 19, "youtube": 20, "vesktop": 21}
+TARGETS = ["gnome-shell", "gtk4", "zen", "youtube", "vesktop", "kde", "icons"]
+
+COLORS = ("#3584e4", "#241f31", "#1e1e1e", "#f9f9f9")
+
+# Papirus sizes and the blues colormydesktop/icons.py replaces
+ICON_SIZES = ["16x16", "22x22", "24x24", "32x32", "48x48", "64x64"]
+ICON_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="16" height="16">'
+    '<path style="fill:#5294e2" d="M1 2h5l1 1h7v10H1z"/>'
+    '<path fill="#4877b1" d="M1 5h14v8H1z"/>'
+    '<path fill="#84afea" d="M2 6h12v1H2z"/>'
+    '<stop style="stop-color:#2e6bb4"/>'
+    '<path fill="#e4e4e4" d="M7 8h2v2H7z"/>'
+    "</svg>\n"
+)
+
+
+# --- TEMP HOME ---
+def write_fake_tools(bin_dir, log_path):
+    os.makedirs(bin_dir, exist_ok=True)
+    for name, status in FAKE_TOOLS.items():
+        path = os.path.join(bin_dir, name)
+        with open(path, "w") as f:
+            f.write(f'#!/bin/sh\necho "{name} $*" >> "{log_path}"\nexit {status}\n')
+        os.chmod(path, 0o755)
+
+
+def make_papirus(root, icons):
+    """Writes a Papirus-like tree: 'icons' blue folders per size, each with a
+    red sibling, a generic symlink and every tenth one an alias link."""
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, "index.theme"), "w") as f:
+        f.write("[Icon Theme]\nName=Papirus\nInherits=hicolor\n")
+
+    for size in ICON_SIZES:
+        folder = os.path.join(root, size, "places")
+        os.makedirs(folder, exist_ok=True)
+        for i in range(icons):
+            base = f"folder-{i}"
+            for color in ("blue", "red"):
+                with open(os.path.join(folder, f"{base}-{color}.svg"), "w") as f:
+                    f.write(ICON_SVG)
+            os.symlink(f"{base}-blue.svg", os.path.join(folder, f"{base}.svg"))
+            if i % 10 == 0:
+                os.symlink(f"{base}-blue.svg", os.path.join(folder, f"{base}-alias-blue.svg"))
+
+
+def setup_home(home, sass, icons):
+    """Lays out a native install of Color My Desktop under 'home'."""
+    data = os.path.join(home, ".local/share/color-my-desktop")
+    for folder in (
+        os.path.join(data, ".venv/bin"),
+        os.path.join(data, "scss"),
+        os.path.join(home, ".local/share/plasma"),
+        os.path.join(home, ".local/share/color-schemes"),
+        os.path.join(home, ".local/share/themes/Color-My-Desktop/gnome-shell"),
+        os.path.join(home, ".config/gtk-4.0"),
+        os.path.join(home, ".config/vesktop/themes"),
+        os.path.join(home, "zen/chrome"),
+    ):
+        os.makedirs(folder, exist_ok=True)
+
+    for source in ("scss", "palettes"):
+        for name in os.listdir(os.path.join(REPO_DIR, source)):
+            if name.endswith(".scss"):
+                shutil.copy(os.path.join(REPO_DIR, source, name), os.path.join(data, "scss"))
+    shutil.copytree(os.path.join(REPO_DIR, "KDE"), os.path.join(data, "KDE"))
+    os.symlink(sass, os.path.join(data, ".venv/bin/sass"))
+
+    write_fake_tools(os.path.join(home, "bin"), os.path.join(home, "fake-tools.log"))
+    make_papirus(os.path.join(home, ".local/share/icons/Papirus"), icons)
+
+
+def reset_home(home):
+    """Forgets every earlier build: compiled CSS cache, build state and the recolored icons."""
+    shutil.rmtree(os.path.join(home, ".local/share/color-my-desktop/cache"), ignore_errors=True)
+    shutil.rmtree(os.path.join(home, ".local/share/icons/Papirus-Custom"), ignore_errors=True)
+
+
+# --- RUNS ---
+def backend_args(home, targets, colors):
+    primary, secondary, tertiary, text = colors
+    args = [
+        "Bench", primary, secondary, tertiary, text,
+        "0", "0", primary, "0", text, "0", "0.8", "0",
+        primary, primary, secondary,
+        "0", "0", "0", "0", "0",
+        os.path.join(home, ".local/share/plasma"),
+        os.path.join(home, ".local/share/color-schemes"),
+        os.path.join(home, ".local/share/themes"),
+        os.path.join(home, "zen/chrome"),
+        os.path.join(home, ".config/vesktop/themes"),
+        os.path.join(home, ".config/gtk-4.0"),
+        os.path.join(home, ".local/share/icons"),
+    ]
+    for target in targets:
+        args[TOGGLES[target] - 1] = "1"
+    return args
+
+
+def run_build(home, targets, colors, service=None):
+    """Runs one backend build. Returns its measurements."""
+    env = dict(os.environ)
+    env.update(HOME=home, PATH=os.path.join(home, "bin") + os.pathsep + env.get("PATH", ""),
+               COLORMYDESKTOP_EVENTS="1", COLORMYDESKTOP_LEARN="0")
+    env.pop("XDG_DATA_HOME", None)
+    env.pop("COLORMYDESKTOP_SASS_SERVICE", None)
+    if service:
+        env["COLORMYDESKTOP_SASS_SERVICE"] = service
+
+    tool_log = os.path.join(home, "fake-tools.log")
+    if os.path.exists(tool_log):
+        os.remove(tool_log)
+
+    started = time.monotonic()
+    process = subprocess.run(["bash", BACKEND] + backend_args(home, targets, colors),
+                             stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, env=env)
+    wall = time.monotonic() - started
+
+    result = {"wall": round(wall, 3), "status": "failed", "targets": {}, "stages": {}, "stylesheets": {}, "tools": {}}
+    icons = None
+    for line in process.stdout.splitlines():
+        event = parse_event(line)
+        if event is None:
+            continue
+        kind = event.get("event")
+        if kind == "target-finish":
+            result["targets"][event["target"]] = event["seconds"]
+            if event["status"] != "done":
+                result.setdefault("failed_targets", []).append(event["target"])
+        elif kind == "stage":
+            result["stages"][event["stage"]] = event["seconds"]
+        elif kind == "stylesheet":
+            result["stylesheets"][event["result"]] = result["stylesheets"].get(event["result"], 0) + 1
+        elif kind == "icons":
+            icons = event
+        elif kind == "build-finish":
+            result["status"] = event["status"]
+            result["backend_seconds"] = event["seconds"]
+
+    if icons is not None:
+        seconds = result["targets"].get("papirus")
+        result["icons"] = {"total": icons["total"], "seconds": seconds,
+                           "per_second": round(icons["total"] / seconds, 1) if seconds else None}
+
+    if os.path.exists(tool_log):
+        with open(tool_log, "r") as f:
+            for line in f:
+                name = line.split(" ", 1)[0]
+                result["tools"][name] = result["tools"].get(name, 0) + 1
+
+    if process.returncode != 0 or result["status"] != "done":
+        result["log"] = process.stdout[-4000:]
+        return result
+
+    # What the backend would have left to its background learner
+    data = os.path.join(home, ".local/share/color-my-desktop")
+    slots = os.path.join(data, "cache/slots")
+    if os.path.isdir(slots) and any(name.endswith(".pending.json") for name in os.listdir(slots)):
+        env.pop("COLORMYDESKTOP_EVENTS")
+        started = time.monotonic()
+        subprocess.run([sys.executable, "-m", "colormydesktop.compiler", "--sass", os.path.join(data, ".venv/bin/sass"),
+                        "--cache-dir", os.path.join(data, "cache"), "--learn"],
+                       cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.STDOUT)
+        result["learn"] = round(time.monotonic() - started, 3)
+    return result
+
+
+def recolors(index):
+    """Colors no earlier run used, so a recolor never hits the CSS cache."""
+    return (f"#c6{index % 256:02x}00", "#2b1d16", "#1a1411", "#fbeee4")
+
+
+def scenarios(targets):
+    """(name, targets, colors, reset first) in run order. colors None: new ones every run."""
+    plan = [(f"cold/{target}", [target], COLORS, True) for target in targets]
+    plan += [
+        ("cold/all", targets, COLORS, True),
+        ("repeat/all", targets, COLORS, False),
+        ("recolor/all", targets, None, False),
+    ]
+    return plan
+
+
+def summarize(runs):
+    """Medians per scenario: wall time, each target and the icon throughput."""
+    summary = {}
+    for name in dict.fromkeys(run["scenario"] for run in runs):
+        group = [run for run in runs if run["scenario"] == name]
+        entry = {"wall": round(statistics.median(run["wall"] for run in group), 3), "targets": {}}
+        for target in dict.fromkeys(t for run in group for t in run["targets"]):
+            entry["targets"][target] = round(statistics.median(
+                run["targets"][target] for run in group if target in run["targets"]), 3)
+        learns = [run["learn"] for run in group if "learn" in run]
+        if learns:
+            entry["learn"] = round(statistics.median(learns), 3)
+        rates = [run["icons"]["per_second"] for run in group if run.get("icons", {}).get("per_second")]
+        if rates:
+            entry["icons_per_second"] = round(statistics.median(rates), 1)
+        entry["failed"] = sum(run["status"] != "done" for run in group)
+        summary[name] = entry
+    return summary
+
+
+# --- REPORT ---
+def flatten(summary):
+    """{"scenario wall": seconds, "scenario target": seconds, ...} for comparisons."""
+    values = {}
+    for name, entry in summary.items():
+        values[f"{name} wall"] = entry["wall"]
+        for target, seconds in entry["targets"].items():
+            values[f"{name} {target}"] = seconds
+        if "learn" in entry:
+            values[f"{name} learn"] = entry["learn"]
+        if "icons_per_second" in entry:
+            values[f"{name} icons/s"] = entry["icons_per_second"]
+    return values
+
+
+def print_summary(summary, baseline=None):
+    current = flatten(summary)
+    previous = flatten(baseline["summary"]) if baseline else {}
+
+    if baseline:
+        print(f"\nCompared with {baseline.get('commit') or 'baseline'} ({baseline.get('date', '?')}):")
+    print(f"\n{'metric':<32}{'value':>10}" + (f"{'before':>10}{'change':>9}" if baseline else ""))
+    for key, value in current.items():
+        line = f"{key:<32}{value:>10.3f}"
+        if key in previous and previous[key]:
+            change = (value - previous[key]) / previous[key] * 100
+            line += f"{previous[key]:>10.3f}{change:>+8.1f}%"
+        print(line)
+
+    failed = {name: entry["failed"] for name, entry in summary.items() if entry["failed"]}
+    if failed:
+        print(f"\nFailed runs: {failed}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "-C", REPO_DIR, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Color My Desktop build pipeline.")
+    parser.add_argument("--sass", help="dart-sass binary (default: the installed one, then sass on PATH)")
+    parser.add_argument("--icons", type=int, default=500,
+                        help=f"Blue icons per size in the synthetic Papirus tree ({len(ICON_SIZES)} sizes, default: 500)")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per scenario (default: 3)")
+    parser.add_argument("--targets", nargs="+", choices=TARGETS, default=TARGETS, metavar="TARGET",
+                        help=f"Targets to build (default: all of {', '.join(TARGETS)})")
+    parser.add_argument("--output", help="Write the results here (default: benchmark-<commit>.json)")
+    parser.add_argument("--compare", metavar="JSON", help="Earlier results to compare against")
+    parser.add_argument("--keep", action="store_true", help="Keep the temp HOME and print its path")
+    parser.add_argument("--service", action="store_true",
+                        help="Compile in one warm Sass service shared by all builds, like the GUI")
+    args = parser.parse_args(argv)
+
+    sass = args.sass or os.path.expanduser("~/.local/share/color-my-desktop/.venv/bin/sass")
+    if not os.access(sass, os.X_OK):
+        sass = shutil.which("sass")
+    if not sass:
+        parser.error("no dart-sass found, pass --sass")
+    sass = os.path.abspath(sass)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+
+    home = tempfile.mkdtemp(prefix="cmd-bench-")
+    service = None
+    try:
+        print(f"Setting up {home} ({args.icons * len(ICON_SIZES)} blue icons)...")
+        setup_home(home, sass, args.icons)
+
+        if args.service:
+            socket_path = os.path.join(home, "sass.sock")
+            service = sass_service.spawn(sys.executable, sass, socket_path,
+                                         os.path.join(REPO_DIR, "colormydesktop"))
+
+        runs = []
+        for name, targets, colors, reset in scenarios(args.targets):
+            for index in range(args.runs):
+                if reset:
+                    reset_home(home)
+                result = run_build(home, targets, colors or recolors(index),
+                                   socket_path if service else None)
+                result.update(scenario=name, run=index + 1)
+                runs.append(result)
+                print(f"{name:<20} run {index + 1}: {result['wall']:.3f}s {result['status']}")
+    finally:
+        sass_service.stop(service)
+        if args.keep:
+            print(f"Kept {home}")
+        else:
+            shutil.rmtree(home, ignore_errors=True)
+
+    sass_version = subprocess.run([sass, "--version"], capture_output=True, text=True).stdout.strip()
+    commit = git_commit()
+    results = {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "machine": {"cpus": os.cpu_count(), "python": platform.python_version(), "system": platform.platform()},
+        "sass": sass_version,
+        "config": {"icons": args.icons * len(ICON_SIZES), "runs": args.runs, "targets": args.targets,
+                   "service": args.service},
+        "summary": summarize(runs),
+        "runs": runs,
+    }
+
+    output = args.output or f"benchmark-{commit or 'results'}.json"
+    with open(output, "w") as f:
+        json.dump(results, f, indent=1)
+
+    print_summary(results["summary"], baseline)
+    print(f"\nResults written to {output}")
+    return 1 if any(run["status"] != "done" for run in runs) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
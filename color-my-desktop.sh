@@ -28,17 +28,119 @@ GUI_GTK4_TOGGLE="${18}"
 GUI_KDE_TOGGLE="${19}"
 GUI_YT_TOGGLE="${20}"
 GUI_VESKTOP_TOGGLE="${21}"
+GUI_ZEN_DIR="${25}"
+GUI_ICONS_DIR="${28}"
 
 #Global
 
     main_scss="gnome-shell.scss"
-    temp_scss=$(mktemp --suffix=".scss")
+    # Prepared copies of the templates, the installed ones are never edited
+    # (a batch render may be reading them)
+    PREPARED_DIR=$(mktemp -d)
+    temp_scss="$PREPARED_DIR/$main_scss"
     gtk4_scss="gtk4.scss"
 
 
 
+#  Progress events
+# The GUI sets COLORMYDESKTOP_EVENTS=1 to get machine-readable progress next
+# to the log (see colormydesktop/progress.py for the format). Events go to a
+# copy of the original stdout on fd 3, so background targets whose output is
+# buffered into log files still report live.
+if [ "$COLORMYDESKTOP_EVENTS" == "1" ]; then
+    exec 3>&1
+    export COLORMYDESKTOP_EVENT_FD=3
+fi
+
+# emit_event <event> [key value]...  (numeric values are written as numbers)
+emit_event() {
+    [ -n "$COLORMYDESKTOP_EVENT_FD" ] || return 0
+
+    local json="{\"event\": \"$1\""
+    shift
+    while [ $# -ge 2 ]; do
+        if [[ "$2" =~ ^[0-9]+(\.[0-9]+)?$ ]]; then
+            json+=", \"$1\": $2"
+        else
+            json+=", \"$1\": \"$2\""
+        fi
+        shift 2
+    done
+
+    printf '@@event %s}\n' "$json" >&"$COLORMYDESKTOP_EVENT_FD"
+}
+
+# Microseconds since the epoch, for stage timings
+now_us() {
+    local now="${EPOCHREALTIME//[.,]/}"
+    echo "${now:-$(date +%s%6N)}"
+}
+
+# seconds_since <start from now_us>  ->  "1.234567"
+# Bash has no monotonic clock, so a wall clock step backwards counts as 0
+seconds_since() {
+    local us=$(( $(now_us) - $1 ))
+    (( us < 0 )) && us=0
+    printf '%d.%06d' $(( us / 1000000 )) $(( us % 1000000 ))
+}
+
+#  Stage timings
+# Every stage of a build appends "<kind> <name> <seconds> [note]" to
+# BUILD_TIMINGS, including the background targets and the Python helpers
+# (colormydesktop/progress.py, record_stage). print_timings turns it into the
+# summary at the end of the log; COLORMYDESKTOP_TIMINGS_JSON=1 adds the raw
+# numbers as one "@@timings {...}" line.
+BUILD_TIMINGS=$(mktemp)
+export COLORMYDESKTOP_TIMINGS="$BUILD_TIMINGS"
+trap 'rm -rf "$PREPARED_DIR"; rm -f "$BUILD_TIMINGS"' EXIT
+
+# record_timing <kind> <name> <seconds> [note]
+record_timing() {
+    echo "$*" >> "$BUILD_TIMINGS"
+}
+
+# record_stage <name> <start from now_us> [note]
+record_stage() {
+    local seconds
+    seconds=$(seconds_since "$2")
+    emit_event stage stage "$1" seconds "$seconds"
+    record_timing stage "$1" "$seconds" "${@:3}"
+}
+
+print_timings() {
+    local kind name seconds note
+    local total json=""
+    total=$(seconds_since "$BUILD_STARTED")
+
+    echo "--- Timings ---"
+    while read -r kind name seconds note; do
+        # Targets (papirus, sass, kde) span the stages they ran
+        if [ "$kind" == "target" ]; then
+            printf '  %-22s %8ss%s\n' "[$name]" "${seconds%???}" "${note:+  $note}"
+        else
+            printf '  %-22s %8ss%s\n' "$name" "${seconds%???}" "${note:+  $note}"
+        fi
+        json+="${json:+, }{\"$kind\": \"$name\", \"seconds\": $seconds${note:+, \"note\": \"$note\"}}"
+    done < "$BUILD_TIMINGS"
+    printf '  %-22s %8ss\n' "total" "${total%???}"
+
+    if [ "$COLORMYDESKTOP_TIMINGS_JSON" == "1" ]; then
+        printf '@@timings {"total": %s, "stages": [%s]}\n' "$total" "$json"
+    fi
+}
+
+BUILD_STARTED=$(now_us)
+
 #  Detect environment
-if [ -f "/.flatpak-info" ]; then
+# The GUI probes its environment once per session (colormydesktop/environment.py)
+# and passes the answer as COLORMYDESKTOP_SANDBOX / _SASS / _PYTHON, terminal
+# runs fall back to probing here.
+STAGE_STARTED=$(now_us)
+if [ -z "$COLORMYDESKTOP_SANDBOX" ]; then
+    [ -f "/.flatpak-info" ] && COLORMYDESKTOP_SANDBOX="flatpak" || COLORMYDESKTOP_SANDBOX="native"
+fi
+
+if [ "$COLORMYDESKTOP_SANDBOX" == "flatpak" ]; then
     # We are in a Flatpak! Use the path in the sandbox.
     SASS="/app/lib/dart-sass/sass"
     TARGET_DIR="$XDG_DATA_HOME/scss"
@@ -46,6 +148,8 @@ if [ -f "/.flatpak-info" ]; then
     KDEcore="/app/share/color-my-desktop/KDE/Color-My-Desktop"
     KDEtheme="/app/share/color-my-desktop/KDE/Color-My-Desktop-Plasma"
     KDEcolors="/app/share/color-my-desktop/KDE/Color-My-Desktop-Scheme.colors"
+    CACHE_DIR="$XDG_DATA_HOME/cache"
+    PYTHON="python3"
 
     youtube_scss="$XDG_DATA_HOME/scss/youtube.scss"
     zen_scss="$XDG_DATA_HOME/scss/zen.scss"
@@ -80,6 +184,8 @@ else
     KDEcore="$HOME/.local/share/color-my-desktop/KDE/Color-My-Desktop"
     KDEtheme="$HOME/.local/share/color-my-desktop/KDE/Color-My-Desktop-Plasma"
     KDEcolors="$HOME/.local/share/color-my-desktop/KDE/Color-My-Desktop-Scheme.colors"
+    CACHE_DIR="$HOME/.local/share/color-my-desktop/cache"
+    PYTHON="$VENV/python3"
 
 
     youtube_scss="$HOME/.local/share/color-my-desktop/scss/youtube.scss"
@@ -114,6 +220,18 @@ fi
 
 
 
+SASS="${COLORMYDESKTOP_SASS:-$SASS}"
+if [ -n "$COLORMYDESKTOP_PYTHON" ]; then
+    PYTHON="$COLORMYDESKTOP_PYTHON"
+elif [ ! -x "$PYTHON" ]; then
+    # Fall back to the system interpreter if the venv is missing
+    PYTHON="python3"
+fi
+
+# The colormydesktop package is installed next to this script
+BACKEND_DIR="$(dirname "$(readlink -f "${BASH_SOURCE[0]}")")"
+record_stage environment "$STAGE_STARTED"
+
 #  Safety check
 if [ ! -x "$SASS" ]; then
    echo "Error: Sass compiler not found at $SASS"
@@ -150,6 +268,9 @@ show_color() {
 }
 
 custom_top_bar_logic() {
+    # configure_theme and the gnome-shell target both need these answers,
+    # ask once per build
+    [ "$BAR_LOGIC_DONE" = true ] && return 0
    
 if [ -n "$PROFILE_NAME" ]; then
     # --- MODE: GUI (Python) ---
@@ -178,26 +299,7 @@ else
 fi
 
 if [ "$APPLY_TRANS" = true ]; then
-    echo "Applying transparency ($alpha) to main stylesheet..."
-
-    # This regex looks for $primary, $secondary, or $tertiary.
-    # It uses a 'negative lookbehind' logic (simulated in sed) 
-    # to ensure it doesn't match if 'rgba(' is already present.
-    
-    # Wrap $primary, $secondary, $tertiary if NOT already in rgba
-    # We target common background variables, excluding $text
-    for var in "primary" "secondary" "tertiary"; do
-        # regex: replace ' $var' with ' rgba($var, alpha)' 
-        # but skip if it preceded by 'rgba('
-        sed -i "/BAR_TARGET/! s/\([^a(]\)\$$var/\1rgba(\$$var, $alpha)/g" "$temp_scss"
-    done
-    
-    echo "Transparency applied."
-else
-    # CLEANUP: If user chose NO, revert rgba($var, x) back to $var
-    for var in "primary" "secondary" "tertiary" "topbar-color" "clock-color"; do
-        sed -i "s/rgba(\$$var, [0-9.]*)/\$$var/g" "$temp_scss"
-    done
+    echo "Transparency ($alpha) will be applied to the main stylesheet."
 fi
 
 
@@ -218,17 +320,6 @@ if [ -n "$gui_toggle" ]; then
             USE_CUSTOM_TOPBAR=false
         fi
 
-# --- HANDLE TOPBAR COLOR REPLACEMENT ---
-if [ "$USE_CUSTOM_TOPBAR" = true ]; then
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $topbar-color
-    sed -i '/BAR_TARGET/s/\$[a-zA-Z0-9_-]*/\$topbar-color/' "$temp_scss"
-    echo "Top Bar set to custom variable."
-else
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $primary
-    sed -i '/BAR_TARGET/s/\$[a-zA-Z0-9_-]*/\$primary/' "$temp_scss"
-    echo "Top Bar color reverted to default primary color."
-fi
-      
     else
 
 read -p "Use a specific background color/transparency for the Top Bar (y/n): " topbar_choice
@@ -266,13 +357,10 @@ fi
 fi
 
 # --- HANDLE TOPBAR COLOR REPLACEMENT ---
+# prepare_gnome_template points the BAR_TARGET line at the chosen variable
 if [ "$USE_CUSTOM_TOPBAR" = true ]; then
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $topbar-color
-    sed -i '/BAR_TARGET/s/\$[a-zA-Z0-9_-]*/\$topbar-color/' "$temp_scss"
     echo "Top Bar set to custom variable."
 else
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $primary
-    sed -i '/BAR_TARGET/s/\$[a-zA-Z0-9_-]*/\$primary/' "$temp_scss"
     echo "Top Bar color reverted to default primary color."
 fi
 
@@ -292,17 +380,6 @@ if [ -n "$clock_toggle" ]; then
             USE_CUSTOM_CLOCK=false
         fi
 
-# --- HANDLE CLOCK COLOR REPLACEMENT ---
-if [ "$USE_CUSTOM_TOPBAR" = true ]; then
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $topbar-color
-    sed -i '/TIME_TARGET/s/\$[a-zA-Z0-9_-]*/\$clock-color/' "$temp_scss"
-    echo "Top Bar set to custom variable."
-else
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $primary
-    sed -i '/TIME_TARGET/s/\$[a-zA-Z0-9_-]*/\$text/' "$temp_scss"
-    echo "Top Bar color reverted to default primary color."
-fi
-     
     else
 
  
@@ -341,15 +418,14 @@ fi
 fi
 
 # --- HANDLE CLOCK COLOR REPLACEMENT ---
-if [ "$USE_CUSTOM_TOPBAR" = true ]; then
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $topbar-color
-    sed -i '/TIME_TARGET/s/\$[a-zA-Z0-9_-]*/\$clock-color/' "$temp_scss"
-    echo "Top Bar set to custom variable."
+# prepare_gnome_template points the TIME_TARGET lines at the chosen variable
+if [ "$USE_CUSTOM_CLOCK" = true ]; then
+    echo "Clock set to custom variable."
 else
-    # This finds the BAR_TARGET line and replaces ANY variable ($...) with $primary
-    sed -i '/TIME_TARGET/s/\$[a-zA-Z0-9_-]*/\$text/' "$temp_scss"
-    echo "Top Bar color reverted to default primary color."
+    echo "Clock color reverted to default text color."
 fi
+
+BAR_LOGIC_DONE=true
 }
 
 
@@ -404,6 +480,26 @@ configure_theme() {
 
 MODE=$1
 
+#  Headless batch render: profiles x targets into a versioned tree, nothing
+# on the desktop is touched. Everything after "batch" goes to
+# colormydesktop/batch.py, e.g.
+#   color-my-desktop-backend batch ~/renders --profiles Blue Grey --targets gtk4 kde
+if [ "$MODE" == "batch" ]; then
+    shift
+    # exec skips the EXIT trap, and batch runs print no timing summary
+    rm -rf "$PREPARED_DIR"
+    rm -f "$BUILD_TIMINGS"
+    unset COLORMYDESKTOP_TIMINGS
+
+    profile_dirs=(--profile-dir "$SCSS_DIR")
+    # Flatpak keeps the bundled palettes outside the user's scss dir
+    [ -d "/app/share/color-my-desktop/palettes" ] && profile_dirs+=(--profile-dir "/app/share/color-my-desktop/palettes")
+
+    PYTHONPATH="$BACKEND_DIR" exec "$PYTHON" -m colormydesktop.batch \
+        --sass "$SASS" --template-dir "$TARGET_DIR" "${profile_dirs[@]}" \
+        --kde-dir "$(dirname "$KDEcolors")" "$@"
+fi
+
 # 1. Check for the special flag at the START of the script
 if [ "$MODE" == "config_only" ]; then
     echo "Mode: Configuration Only"
@@ -459,38 +555,6 @@ fi
 PROFILE_NAME="$1"
 
 
-APP_ID="io.github.schwarzen.colormydesktop"
-
-
-#  Check if the specific app is installed
-if flatpak info "$APP_ID" &> /dev/null; then
-    flatpak_status="y"
-else
-    flatpak_status="n"
-fi
-
-# Use "$flatpak_status" instead of "flatpak" to reference the variable
-#if [[ "$flatpak_status" =~ ^[Yy]$ ]]; then
-    
-    # Potential host paths mapping to sandbox's /app directory
-#    SYSTEM_PATH="/var/lib/flatpak/app/$APP_ID/current/active/files"
-#    USER_PATH="$HOME/.local/share/flatpak/app/$APP_ID/current/active/files"
-#    APP_ID="io.github.schwarzen.colormydesktop"
-#    DEST_DIR="$HOME/.local/share/Color-My-Desktop/KDE"
-#    DEST_SCSS_DIR="$HOME/.local/share/Color-My-Desktop/scss"
-
-    # Detect which path exists
-#    if [ -d "$USER_PATH" ]; then
-#        SRC_PREFIX="$USER_PATH"
-#    elif [ -d "$SYSTEM_PATH" ]; then
-#        SRC_PREFIX="$SYSTEM_PATH"
-#    else
-#        echo "Error: Flatpak application $APP_ID files not found."
-#        exit 1
- #   fi
-# fi
-
-
 # --- Option 1: CREATE NEW ---
 if [ -z "$PROFILE_NAME" ]; then
     echo "Select an option:"
@@ -526,6 +590,7 @@ if [ "$choice" == "1" ]; then
     B_NAUT_SEC="${16:-$3}"
 
 
+    STAGE_STARTED=$(now_us)
     {
         printf '$primary: %s;\n' "$B_PRIMARY"
         printf '$secondary: %s;\n' "$B_SECONDARY"
@@ -539,6 +604,7 @@ if [ "$choice" == "1" ]; then
 	printf '$nautilus-secondary: %s;\n' "$B_NAUT_SEC"
         printf '$system-datemenu: %s;\n' "$B_DATEMENU"
     } > "$partial_file"
+    record_stage partial "$STAGE_STARTED"
 
     echo "Status: Theme partial updated at $partial_file"
 
@@ -610,7 +676,9 @@ fi
 
    
 # --- Auto-Detect Transparency from Partial ---
-# Look for the // TRANSPARENT: line in the chosen partial
+# Look for the // TRANSPARENT: line in the chosen partial, unless
+# configure_theme already settled it for this build
+if [ "$BAR_LOGIC_DONE" != true ]; then
 flag_line=$(grep "TRANSPARENT:" "$partial_file")
 
 if [[ "$flag_line" == *"true"* ]]; then
@@ -624,21 +692,15 @@ else
     APPLY_TRANS=false
     echo "Partial: Solid Colors Detected"
 fi
+fi
 
 
-for var in "primary" "secondary" "tertiary" "topbar-color" "clock-color"; do
-    sed -i "s/rgba(\$$var, [0-9.]*)/\$$var/g" "$temp_scss"
-done
-
-# Re-apply only if the flag was true
+# prepare_gnome_template applies the transparency when the gnome-shell
+# template is copied, together with the top bar and clock colors
 if [ "$APPLY_TRANS" = true ]; then
-    for var in "primary" "secondary" "tertiary" "topbar-color" "clock-color"; do
-        # Skip lines with BAR_TARGET
-        sed -i "/BAR_TARGET/! s/\([^a(]\)\$$var/\1rgba(\$$var, $alpha)/g" "$temp_scss"
-    done
-    echo "Main stylesheet synchronized with transparent partial."
+    echo "Main stylesheet will be synchronized with transparent partial."
 else
-    echo "Main stylesheet synchronized with solid partial."
+    echo "Main stylesheet will be synchronized with solid partial."
 fi
 
 
@@ -665,20 +727,66 @@ import_statement="@use '$SCSS_DIR/$selected_import' as *;"
 
 
 
+# --------------------- Build targets
+
+#  Point a template at the selected profile
+# Every template starts with a single "@use" line for the partial. The prepared
+# copy drops it and starts with the new import, so it compiles against this
+# profile (like transform.set_profile_import). The installed template is only
+# read. Prints the prepared path.
+set_profile_import() {
+    local scss_file="$1"
+    local prepared="$PREPARED_DIR/$(basename "$scss_file")"
+
+    {
+        printf "%s\n" "$import_statement"
+        # Drop any line that starts with @use, regardless of the filename
+        [ -f "$scss_file" ] && sed '/^@use/d' "$scss_file"
+    } > "$prepared"
+    echo "$prepared"
+}
+
+#  Prepare the gnome-shell template
+# One pass over the template: swap in the profile import, wrap the background
+# colors for transparency and point the BAR_TARGET / TIME_TARGET lines at the
+# chosen variables. Replaces a copy plus a dozen "sed -i" passes over a
+# 3k-line file. The rewrite runs inside the Sass batch (compiler.py), so it
+# only records what to do here.
+SASS_PREPARE=()
+
+prepare_gnome_template() {
+    SASS_PREPARE=(--prepare "$1:$2" --import "$import_statement")
+
+    [ "$APPLY_TRANS" = true ] && SASS_PREPARE+=(--alpha "$alpha")
+    [ "$USE_CUSTOM_TOPBAR" = true ] && SASS_PREPARE+=(--topbar)
+    [ "$USE_CUSTOM_CLOCK" = true ] && SASS_PREPARE+=(--clock)
+}
+
 # --- PAPIRUS RECOLOR LOGIC ---
-if [ "$GUI_ICON_SYNC" == "1" ]; then
-    SYSTEM_PAPIRUS="${28}/Papirus"
-    LOCAL_ICONS="${28}"
+sync_papirus_icons() {
+    SYSTEM_PAPIRUS="$GUI_ICONS_DIR/Papirus"
+    LOCAL_ICONS="$GUI_ICONS_DIR"
     CUSTOM_THEME="Papirus-Custom"
     LOCAL_PAPIRUS="$LOCAL_ICONS/$CUSTOM_THEME"
+    local started
 
     echo "Status: Syncing Papirus icons to theme colors..."
 
     #  Ensure local copy exists
+    # Only the blue icons are ever recolored, so the copy hardlinks everything
+    # (cp -al) instead of duplicating the whole theme, with a reflink/plain
+    # copy when Papirus sits on another filesystem. Nothing below edits a file
+    # in place: sed -i, the recolor engine and gtk-update-icon-cache all write
+    # a new file and rename it, so the shared Papirus files are never touched.
     if [ ! -d "$LOCAL_PAPIRUS" ]; then
+        started=$(now_us)
         mkdir -p "$LOCAL_ICONS"
-        cp -r "$SYSTEM_PAPIRUS" "$LOCAL_PAPIRUS"
+        if ! cp -al "$SYSTEM_PAPIRUS" "$LOCAL_PAPIRUS" 2>/dev/null; then
+            rm -rf "$LOCAL_PAPIRUS"
+            cp -r --reflink=auto "$SYSTEM_PAPIRUS" "$LOCAL_PAPIRUS"
+        fi
         sed -i "s/Name=Papirus/Name=$CUSTOM_THEME/" "$LOCAL_PAPIRUS/index.theme"
+        record_stage icon-bootstrap "$started"
     fi
 
 #  CLEANUP: Delete any accidental multi-extension files before starting
@@ -686,298 +794,266 @@ find "$LOCAL_PAPIRUS" -name "*.svg.svg*" -delete
 
 echo "Syncing Papirus Icons (Targeting blue icons)..."
 
-#  THE LOOP
-#  exclude any files already containing 'cmg' to prevent recursion
-find "$LOCAL_PAPIRUS" -type f -name "*blue*.svg" ! -name "*cmg*" | while read -r blue_file; do
-    
-    # Precise replacement: only replace 'blue' at the end of the filename, not in paths
-    # This prevents the .svg.svg.svg issue
-    cmg_file="${blue_file%-blue.svg}-cmg.svg"
-    
-    # If the file hasn't changed, don't waste time copying
-  
-    cp -f "$blue_file" "$cmg_file"
-    
-    # THE MEGA-SED (Scoped to the new CMG file)
-    sed -i \
-        "s/#5294e2/$primary/gI; s/fill:#5294e2/fill:$primary/gI; s/stop-color:#5294e2/stop-color:$primary/gI; \
-         s/#84afea/$text/gI; s/fill:#84afea/fill:$text/gI; s/stop-color:#84afea/stop-color:$text/gI; \
-         s/#2e6bb4/$secondary/gI; s/fill:#2e6bb4/fill:$secondary/gI; s/stop-color:#2e6bb4/stop-color:$secondary/gI; \
-         s/#4877b1/$primary/gI; s/fill:#4877b1/fill:$primary/gI; s/stop-color:#4877b1/stop-color:$primary/gI" \
-        "$cmg_file"
-
-    #  SYMLINK 
-    #  get the directory and the base name without the extension
-    dir_name=$(dirname "$blue_file")
-    # Get filename without '-blue.svg'
-    base_name=$(basename "$blue_file" "-blue.svg")
-    
-    # Redirect the generic symlink (e.g. folder.svg) to our custom file (e.g. folder-cmg.svg)
-    # This must be done inside the directory to avoid path errors
-    (cd "$dir_name" && ln -sf "${base_name}-cmg.svg" "${base_name}.svg")
-
-done
+#  THE RECOLOR
+# colormydesktop/icons.py writes a "-cmg.svg" twin for every "-blue.svg" with
+# the profile colors (one pass per file, one worker per core) and redirects
+# the generic symlink (e.g. folder.svg) to it, like the old cp/sed/ln loop.
+# Its manifest (.cmg-manifest.json) skips icons built from the same source
+# and colors, and it reports "Up to date: icons" when nothing was written.
+started=$(now_us)
+icon_status=$(PYTHONPATH="$BACKEND_DIR" "$PYTHON" -m colormydesktop.icons \
+    --primary "$primary" --secondary "$secondary" --text "$text" "$LOCAL_PAPIRUS") || return 1
+record_stage icon-recolor "$started" "$(grep -o '^Recolored [0-9]* icons' <<< "$icon_status")"
+echo "$icon_status"
+
+if [[ "$icon_status" == *"Up to date: icons"* ]]; then
+    echo "Icons unchanged, skipping icon cache refresh."
+    return 0
+fi
 
 echo "Icon sync complete. Refreshing icon cache..."
+started=$(now_us)
 gtk-update-icon-cache -f -t "$HOME/.local/share/icons/Papirus-Custom" 2>/dev/null || true
     # Force Nautilus to reload the new symlink targets
     nautilus -q > /dev/null 2>&1
+    record_stage icon-cache "$started"
     echo "Status: Icons synced successfully with custom profile."
-fi
-
-
-#  Compile SCSS to CSS
-
-#  Determine zen toggle
-if [ -n "$PROFILE_NAME" ]; then
-    # --- GUI MODE ---
-    if [ "$GUI_ZEN_TOGGLE" == "1" ]; then
-        apply_zen="y"
-    else
-        apply_zen="n"
-    fi
-else
-
-    read -p "Would you like to apply the Zen Browser (y/n): " apply_zen
-
-    fi
-
-
-    
-    #  Compile YouTube CSS if user said 'y'
-if [[ "$apply_zen" =~ ^[Yy]$ ]]; then
-
-    if [ -f "$zen_scss" ]; then
-    # Delete any line that starts with @import, regardless of the filename
-    sed -i '/^@use/d' "$zen_scss"
-    echo "Removed previous @use statements from $zen_scss."
-else
-    touch "$zen_scss"
-fi
-
-    echo "$import_statement" | cat - "$zen_scss" > temp && mv temp "$zen_scss"
-
-          printf "%s\n" "$CSS_IMPORT_LINE2" > "${25}/userChrome.css"
-         
-
-    echo "Compiling Zen styles to ${25}/userChrome.css..."
-    $SASS "$zen_scss" "$output_zen" --style expanded
-    else
-	echo "Skip Zen"
-	fi
-   
-
-if [ -n "$PROFILE_NAME" ]; then
-    # --- GUI MODE ---
-    if [ "$GUI_YT_TOGGLE" == "1" ]; then
-        apply_yt="y"
-    else
-        apply_yt="n"
-    fi
-else
-
-    read -p "Would you like to apply the colors to the Youtube webpage (Zen only) (y/n): " apply_yt
-
-       fi
-
-if [[ "$apply_yt" =~ ^[Yy]$ ]]; then
-
-    
-if [ -f "$youtube_scss" ]; then
-    # Delete any line that starts with @import, regardless of the filename
-    sed -i '/^@use/d' "$youtube_scss"
-    echo "Removed previous @use statements from $youtube_scss."
-else
-    touch "$youtube_scss"
-fi
-
-echo "$import_statement" | cat - "$youtube_scss" > temp && mv temp "$youtube_scss"
-
-	    printf "%s\n" "$CSS_IMPORT_LINE" > "${25}/userContent.css"
-
-           $SASS "$youtube_scss" "$output_youtube" --style expanded
-	   
-    else
-	echo "Skipping youtube"
-
-	fi
-
-
-
-if [ -n "$PROFILE_NAME" ]; then
-    # --- GUI MODE ---
- if [ "$GUI_VESKTOP_TOGGLE" == "1" ]; then
-     apply_vesktop="y"
- else
-     apply_vesktop="n"
- fi
- 
-    else
-
-	read -p "Would you like to apply the colors to Vesktop/Vencord (y/n): " apply_vesktop
-	
-
-    fi
-
-if [[ "$apply_vesktop" =~ ^[Yy]$ ]]; then
-
-    if [ -f "$vencord_scss" ]; then
-    # Delete any line that starts with @import, regardless of the filename
-    sed -i '/^@use/d' "$vencord_scss"
-    echo "Removed previous @use statements from $vencord_scss."
-else
-    touch "$vencord_scss"
-    fi
-
-    
-echo "$import_statement" | cat - "$vencord_scss" > temp && mv temp "$vencord_scss"
-
-
-	echo "Compiling Vesktop"
-
-	$SASS "$vencord_scss" "$output_vencord" --style expanded
-    else
-        echo "Skipping Vesktop  styles."
-    fi
-
-    #   compile Main and GTK styles
-
-
- if [ -n "$PROFILE_NAME" ]; then
-    # --- GUI MODE ---
- if [ "$GUI_GNOME_TOGGLE" == "1" ]; then
-     apply_gnome="y"
- else
-     apply_gnome="n"
- fi
-
-    
-    else
-
-	    read -p "Would you like to apply the theme to the gnome-shell? (y/n): " apply_gnome
-
-    fi
-
-
-    
-    #  Compile GNOME CSS if user said 'y'
- if [[ "$apply_gnome" =~ ^[Yy]$ ]]; then
-
-     # Create dir
-   mkdir -p "$TARGET_DIR"
-   cd "$TARGET_DIR" || { echo "Failed to enter $TARGET_DIR"; exit 1; }
-
-   cp "$main_scss" "$temp_scss"
-
-   # clean imports
-   
-if [ -f "$temp_scss" ]; then
-    # Delete any line that starts with @import, regardless of the filename
-    sed -i '/^@use/d' "$temp_scss"
-    echo "Removed previous @use statements from $temp_scss."
-else
-    touch "$temp_scss"
-fi
-echo "$import_statement" | cat - "$temp_scss" > temp && mv temp "$temp_scss"
-   
-custom_top_bar_logic "$7" "$8" "$9" "${10}"
+}
 
-	
-    echo "Compiling $temp_scss to $output_css..."
-    $SASS "$temp_scss" "$output_css" --style expanded
+#  Batched Sass compile
+# Starting dart-sass costs far more than compiling one of these stylesheets,
+# so every target queues its "input:output" pair and a single Sass process
+# compiles the whole batch (dart-sass handles the pairs concurrently).
+# Builds started by the GUI get COLORMYDESKTOP_SASS_SERVICE, the socket of
+# its session-wide Sass (colormydesktop/sass_service.py); the batch is then
+# compiled there and no Sass process is started at all.
+# colormydesktop/compiler.py keeps a cache of compiled CSS keyed on the
+# template, the profile partial and the Sass version, so a repeat apply
+# copies the cached files into place without starting Sass.
+# Keys only cover the partial variables a template actually reads (e.g.
+# $nautilus-main only matters to gtk4.scss), and a target whose key matches
+# its last build is reported as "Up to date" and left alone.
+# With the fast path on (the default, COLORMYDESKTOP_FAST_RENDER=0 turns it
+# off), templates whose colors can be tracked are learned once and new
+# profiles are rendered by substitution instead of a Sass compile. Learning
+# takes its own Sass run, so the build only queues it and learn_slots_later
+# runs it in the background once the build is done.
+SASS_JOBS=()
+
+queue_sass() {
+    SASS_JOBS+=("$1=$2:$3")
+    echo "Queued $1: $2 -> $3"
+}
 
-    else
-	echo "Skipping gnome-shell"
+compile_sass_jobs() {
+    # The transparency and top bar / clock toggles only change the prepared
+    # gnome-shell template, whose content is part of its key; the other
+    # targets are not rebuilt when they flip
+    local fast_render=()
 
+    if [ "${COLORMYDESKTOP_FAST_RENDER:-1}" != "0" ]; then
+        fast_render=(--fast-render)
     fi
 
+    PYTHONPATH="$BACKEND_DIR" "$PYTHON" -m colormydesktop.compiler \
+        --sass "$SASS" --cache-dir "$CACHE_DIR" "${fast_render[@]}" \
+        "${SASS_PREPARE[@]}" "${SASS_JOBS[@]}"
+}
 
+learn_slots_later() {
+    # Niced and detached: the GUI has its result, the refresh comes first.
+    # COLORMYDESKTOP_LEARN=0 leaves it to the caller (benchmark.py times it)
+    [ "${COLORMYDESKTOP_FAST_RENDER:-1}" != "0" ] || return 0
+    [ "${COLORMYDESKTOP_LEARN:-1}" != "0" ] || return 0
+    ls "$CACHE_DIR"/slots/*.pending.json > /dev/null 2>&1 || return 0
+
+    echo "Learning color slots in the background..."
+    env -u COLORMYDESKTOP_TIMINGS -u COLORMYDESKTOP_EVENTS PYTHONPATH="$BACKEND_DIR" \
+        nohup nice -n 10 "$PYTHON" -m colormydesktop.compiler \
+        --sass "$SASS" --cache-dir "$CACHE_DIR" --learn > /dev/null 2>&1 &
+}
 
- if [ -n "$PROFILE_NAME" ]; then
-    # --- GUI MODE ---
- if [ "$GUI_KDE_TOGGLE" == "1" ]; then
-     apply_kde="y"
- else
-     apply_kde="n"
- fi
-
-    
-    else
-
-	    read -p "Would you like to apply the theme to KDE ? (y/n): " apply_kde
+apply_kde_theme() {
+    # KDE only reads the four main colors, skip the copy if they did not change
+    local kde_stamp="$CACHE_DIR/kde.stamp"
+    local kde_key="$primary $secondary $tertiary $text $output_KDEcolors"
 
+    if [ -f "$kde_stamp" ] && [ "$(cat "$kde_stamp")" == "$kde_key" ] && [ -f "$output_KDEcolors" ]; then
+        echo "Up to date: kde"
+        return 0
     fi
 
-    
-    #  Compile KDE if user said 'y'
- if [[ "$apply_kde" =~ ^[Yy]$ ]]; then\
-
-	
-     
         echo "Compiling KDE theme"
+    local started
+    started=$(now_us)
 	cp -r "$KDEcore" "$output_KDE"
 	cp -r "$KDEtheme" "$output_KDEtheme"
 	cp -r "$KDEcolors" "$output_KDEcolors"
 
 	sed -i "s/text/$text/g; s/primary/$primary/g; s/secondary/$secondary/g; s/tertiary/$tertiary/g" "$output_KDEcolors"
 	sed -i "s/text/$text/g; s/primary/$primary/g; s/secondary/$secondary/g;  s/tertiary/$tertiary/g" "$output_KDEtheme/Color-My-Desktop-Plasma/colors"
+    record_stage kde-copy "$started"
 
+    mkdir -p "$CACHE_DIR"
+    echo "$kde_key" > "$kde_stamp"
+}
 
+# --------------------- Build scheduler
+# The targets share no outputs, so each one runs as a background job with its
+# own log file. Logs are replayed per target once the jobs finish, so the lines
+# of one target are never interleaved with another in the GUI log.
+BUILD_LOG_DIR=$(mktemp -d)
+BUILD_TARGETS=()
+BUILD_PIDS=()
+
+# The GUI stops a superseded build with SIGTERM to the whole process group.
+# The targets die with it (the compiler drops its staged stylesheets on the
+# way out), so only the temp files are left to clean up here.
+cancel_build() {
+    echo "Build cancelled."
+    rm -rf "$BUILD_LOG_DIR" "$PREPARED_DIR"
+    exit 143
+}
+trap cancel_build TERM INT
+
+schedule_target() {
+    local name="$1"
+    shift
+
+    emit_event target-start target "$name"
+    (
+        started=$(now_us)
+        "$@"
+        status=$?
+        seconds=$(seconds_since "$started")
+        if [ $status -eq 0 ]; then
+            emit_event target-finish target "$name" status done seconds "$seconds"
+            record_timing target "$name" "$seconds"
+        else
+            emit_event target-finish target "$name" status failed seconds "$seconds"
+            record_timing target "$name" "$seconds" failed
+        fi
+        exit $status
+    ) > "$BUILD_LOG_DIR/$name.log" 2>&1 &
+    BUILD_TARGETS+=("$name")
+    BUILD_PIDS+=("$!")
+}
 
+wait_for_targets() {
+    local i name status
+    local failed=0
 
+    for i in "${!BUILD_TARGETS[@]}"; do
+        name="${BUILD_TARGETS[$i]}"
+        if wait "${BUILD_PIDS[$i]}"; then
+            status="done"
+        else
+            status="FAILED"
+            failed=1
+        fi
 
-  
-
-
-    else
-	echo "Skipping KDE"
+        echo "--- [$name] $status ---"
+        cat "$BUILD_LOG_DIR/$name.log"
+    done
 
-    fi
+    rm -rf "$BUILD_LOG_DIR"
+    return $failed
+}
 
 
- if [ -n "$PROFILE_NAME" ]; then
+#  Determine which targets to build
+# All prompts are answered up front so nothing reads from the terminal once
+# the targets start running in the background.
+if [ -n "$PROFILE_NAME" ]; then
     # --- GUI MODE ---
- if [ "$GUI_GTK4_TOGGLE" == "1" ]; then
-     apply_gtk4="y"
- else
-     apply_gtk4="n"
- fi
+    [ "$GUI_ICON_SYNC" == "1" ] && apply_icons="y" || apply_icons="n"
+    [ "$GUI_ZEN_TOGGLE" == "1" ] && apply_zen="y" || apply_zen="n"
+    [ "$GUI_YT_TOGGLE" == "1" ] && apply_yt="y" || apply_yt="n"
+    [ "$GUI_VESKTOP_TOGGLE" == "1" ] && apply_vesktop="y" || apply_vesktop="n"
+    [ "$GUI_GNOME_TOGGLE" == "1" ] && apply_gnome="y" || apply_gnome="n"
+    [ "$GUI_KDE_TOGGLE" == "1" ] && apply_kde="y" || apply_kde="n"
+    [ "$GUI_GTK4_TOGGLE" == "1" ] && apply_gtk4="y" || apply_gtk4="n"
+else
+    apply_icons="n"
+    read -p "Would you like to apply the Zen Browser (y/n): " apply_zen
+    read -p "Would you like to apply the colors to the Youtube webpage (Zen only) (y/n): " apply_yt
+    read -p "Would you like to apply the colors to Vesktop/Vencord (y/n): " apply_vesktop
+    read -p "Would you like to apply the theme to the gnome-shell? (y/n): " apply_gnome
+    read -p "Would you like to apply the theme to KDE ? (y/n): " apply_kde
+    read -p "Would you like to apply the theme to GTK4 apps? (y/n): " apply_gtk4
+fi
 
-    
-    else
 
-	    read -p "Would you like to apply the theme to GTK4 apps? (y/n): " apply_gtk4
+#  Prepare sources
+STAGE_STARTED=$(now_us)
+# Template rewrites are cheap and may still prompt (top bar / clock in terminal
+# mode), so they run in the foreground before anything is scheduled.
+if [[ "$apply_zen" =~ ^[Yy]$ ]]; then
+    prepared=$(set_profile_import "$zen_scss")
+    printf "%s\n" "$CSS_IMPORT_LINE2" > "$GUI_ZEN_DIR/userChrome.css"
+    queue_sass "zen" "$prepared" "$output_zen"
+else
+    echo "Skip Zen"
+fi
 
- fi
+if [[ "$apply_yt" =~ ^[Yy]$ ]]; then
+    prepared=$(set_profile_import "$youtube_scss")
+    printf "%s\n" "$CSS_IMPORT_LINE" > "$GUI_ZEN_DIR/userContent.css"
+    queue_sass "youtube" "$prepared" "$output_youtube"
+else
+    echo "Skipping youtube"
+fi
 
+if [[ "$apply_vesktop" =~ ^[Yy]$ ]]; then
+    prepared=$(set_profile_import "$vencord_scss")
+    queue_sass "vesktop" "$prepared" "$output_vencord"
+else
+    echo "Skipping Vesktop  styles."
+fi
 
-    #  Compile GTK4 CSS if user said 'y'
- if [[ "$apply_gtk4" =~ ^[Yy]$ ]]; then
+if [[ "$apply_gnome" =~ ^[Yy]$ ]]; then
+    # Create dir
+    mkdir -p "$TARGET_DIR"
+    custom_top_bar_logic "$GUI_TOPBAR_TOGGLE" "$GUI_TOPBAR_HEX" "$GUI_CLOCK_TOGGLE" "$GUI_CLOCK_HEX"
+    prepare_gnome_template "$TARGET_DIR/$main_scss" "$temp_scss"
+    queue_sass "gnome-shell" "$temp_scss" "$output_css"
+else
+    echo "Skipping gnome-shell"
+fi
 
-          # Create dir
-   mkdir -p "$TARGET_DIR"
-   cd "$TARGET_DIR" || { echo "Failed to enter $TARGET_DIR"; exit 1; }
+if [[ ! "$apply_kde" =~ ^[Yy]$ ]]; then
+    echo "Skipping KDE"
+fi
 
-   if [ -f "$gtk4_scss" ]; then
-    # Delete any line that starts with @import, regardless of the filename
-    sed -i '/^@use/d' "$gtk4_scss"
-    echo "Removed previous @use statements from $gtk4_scss."
+if [[ "$apply_gtk4" =~ ^[Yy]$ ]]; then
+    # Create dir
+    mkdir -p "$TARGET_DIR"
+    prepared=$(set_profile_import "$TARGET_DIR/$gtk4_scss")
+    queue_sass "gtk4" "$prepared" "$output_gtk4_css"
+    # Same template and inputs, the compiler copies gtk.css instead of rebuilding
+    queue_sass "gtk4-dark" "$prepared" "$output_gtk4dark_css"
 else
-    touch "$gtk4_scss"
-   fi
+    echo "Skipping GTK4 apps"
+fi
 
-   echo "$import_statement" | cat - "$gtk4_scss" > temp && mv temp "$gtk4_scss"
- 
-    echo "Compiling to $output_gtk4_css..."
-    $SASS "$gtk4_scss" "$output_gtk4_css" --style expanded
-    
-    echo "Compiling to $output_gtk4dark_css..."
-    $SASS "$gtk4_scss" "$output_gtk4dark_css" --style expanded
 
-    else
-	echo "Skipping GTK4 apps"
+record_stage prepare "$STAGE_STARTED"
+
+#  Run the independent targets in parallel
+[[ "$apply_icons" =~ ^[Yy]$ ]] && schedule_target "papirus" sync_papirus_icons
+[ ${#SASS_JOBS[@]} -gt 0 ] && schedule_target "sass" compile_sass_jobs
+[[ "$apply_kde" =~ ^[Yy]$ ]] && schedule_target "kde" apply_kde_theme
 
-	fi
+wait_for_targets
+build_result=$?
+print_timings
+
+if [ $build_result -eq 0 ]; then
+    emit_event build-finish status done seconds "$(seconds_since "$BUILD_STARTED")"
+    learn_slots_later
+else
+    emit_event build-finish status failed seconds "$(seconds_since "$BUILD_STARTED")"
+fi
 
     echo "DEBUG: Name=$1, Primary=$2, TopbarHex=$8, ClockHex=${10}"
        
@@ -988,6 +1064,8 @@ else
 
 
 
-# Remove temp file
-rm "$temp_scss"
+# Remove the prepared templates
+rm -rf "$PREPARED_DIR"
 
+# The GUI only refreshes the desktop after a clean build
+exit $build_result
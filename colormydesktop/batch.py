@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Headless batch renderer: every profile x target into a versioned output
+# tree, without touching the live desktop. Reached through
+# "color-my-desktop-backend batch", which fills in the Sass binary and the
+# scss / KDE locations for this install.
+#
+#   OUTPUT/<version>/<profile>/gnome-shell/gnome-shell.css
+#                             /gtk-4.0/gtk.css, gtk-dark.css
+#                             /zen/zen.css, zen/youtube.css
+#                             /vesktop/Color-My-Desktop.css
+#                             /kde/Color-My-Desktop-Scheme.colors, kde/Color-My-Desktop-Plasma/colors
+#   OUTPUT/<version>/manifest.json
+#   OUTPUT/latest -> <version>
+#
+# <version> is the Sass version plus a hash of the templates, so renders from
+# different template sets never mix.
+# No GTK imports here: the backend runs this with plain python3.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+from .compiler import SassCompiler
+from .profiles import TRANSPARENT_PATTERN
+from .transform import set_profile_import, transform
+
+
+# target -> (template, outputs inside the profile directory)
+TARGETS = {
+    "gnome-shell": ("gnome-shell.scss", ["gnome-shell/gnome-shell.css"]),
+    "gtk4": ("gtk4.scss", ["gtk-4.0/gtk.css", "gtk-4.0/gtk-dark.css"]),
+    "zen": ("zen.scss", ["zen/zen.css"]),
+    "youtube": ("youtube.scss", ["zen/youtube.css"]),
+    "vesktop": ("Color-My-Desktop.scss", ["vesktop/Color-My-Desktop.css"]),
+}
+
+# KDE files are filled in by name, like apply_kde_theme in the backend
+KDE_FILES = ["Color-My-Desktop-Scheme.colors", "Color-My-Desktop-Plasma/colors"]
+KDE_ROLES = ("text", "primary", "secondary", "tertiary")
+
+ALL_TARGETS = list(TARGETS) + ["kde"]
+
+
+def find_profiles(profile_dirs):
+    """Returns {profile name: partial path}; earlier directories win."""
+    profiles = {}
+    for folder in profile_dirs:
+        if not os.path.isdir(folder):
+            continue
+        for name in sorted(os.listdir(folder)):
+            if name.startswith("_") and name.endswith(".scss"):
+                profiles.setdefault(name[1:-5], os.path.join(folder, name))
+    return profiles
+
+
+def read_transparency(partial):
+    with open(partial, "r") as f:
+        match = TRANSPARENT_PATTERN.search(f.read())
+    return match.group(1) if match else None
+
+
+def render_kde(kde_dir, variables, profile_dir):
+    """Writes the KDE color files for one profile. Returns their relative paths."""
+    written = []
+    for name in KDE_FILES:
+        with open(os.path.join(kde_dir, name), "r") as f:
+            content = f.read()
+        # Same order as the backend's sed: text, primary, secondary, tertiary
+        for role in KDE_ROLES:
+            content = content.replace(role, variables.get(role, role))
+
+        rel = os.path.join("kde", name)
+        os.makedirs(os.path.dirname(os.path.join(profile_dir, rel)), exist_ok=True)
+        with open(os.path.join(profile_dir, rel), "w") as f:
+            f.write(content)
+        written.append(rel)
+    return written
+
+
+class BatchRenderer:
+    """Renders profiles x targets with one shared compiler and cache."""
+
+    def __init__(self, sass, template_dir, profile_dirs, kde_dir, output, cache_dir=None, workers=None):
+        self.template_dir = template_dir
+        self.profiles = find_profiles(profile_dirs)
+        self.kde_dir = kde_dir
+        self.output = output
+        # The batch keeps its own cache so it never evicts the desktop's
+        cache_dir = cache_dir or os.path.join(output, ".cache")
+        self.compiler = SassCompiler(sass, cache_dir, fast_render=True,
+                                     workers=workers or os.cpu_count() or 1)
+
+    def version(self):
+        """Sass version plus a short hash of every template, so partial renders share a tree."""
+        templates = [os.path.join(self.template_dir, TARGETS[target][0]) for target in sorted(TARGETS)]
+        if self.kde_dir:
+            templates += [os.path.join(self.kde_dir, name) for name in KDE_FILES]
+
+        digest = hashlib.sha256()
+        for path in templates:
+            if os.path.exists(path):
+                with open(path, "rb") as f:
+                    digest.update(os.path.basename(path).encode() + b"\0" + f.read())
+
+        sass_version = re.sub(r"[^\w.-]", "_", self.compiler.sass_version())
+        return f"{sass_version}-{digest.hexdigest()[:12]}"
+
+    def prepare(self, profile, partial, target, source_dir, alpha=None):
+        """Writes the template for one profile x target, pointed at its partial."""
+        template = TARGETS[target][0]
+        with open(os.path.join(self.template_dir, template), "r") as f:
+            content = f.read()
+
+        folder = os.path.dirname(os.path.abspath(partial))
+        import_statement = f"@use '{folder}/{profile}' as *;"
+
+        if target == "gnome-shell":
+            variables, _ = self.compiler.read_partial(partial)
+            alpha = alpha or read_transparency(partial)
+            # With the toggles off the GUI writes $topbar-color = $primary and
+            # $clock-color = $text, so pointing at them is always right
+            content = transform(content, import_statement, alpha,
+                                topbar="topbar-color" in variables, clock="clock-color" in variables)
+        else:
+            content = set_profile_import(content, import_statement)
+
+        source = os.path.join(source_dir, profile, template)
+        os.makedirs(os.path.dirname(source), exist_ok=True)
+        with open(source, "w") as f:
+            f.write(content)
+        return source
+
+    def write_manifest(self, version_dir, manifest):
+        """Merges this run into the version's manifest.json (earlier runs may have rendered other profiles)."""
+        path = os.path.join(version_dir, "manifest.json")
+        merged = {"version": manifest["version"], "sass": manifest["sass"], "profiles": {}, "failed": []}
+        try:
+            with open(path, "r") as f:
+                merged.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+        for profile, files in manifest["profiles"].items():
+            merged["profiles"].setdefault(profile, {}).update(files)
+        rendered = set(manifest["profiles"]) - set(manifest["failed"])
+        merged["failed"] = sorted((set(merged["failed"]) - rendered) | set(manifest["failed"]))
+
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(merged, f, indent=1)
+        os.replace(f"{path}.tmp", path)
+
+    def render(self, profiles=None, targets=None, alpha=None):
+        """Renders everything requested. Returns the manifest written next to the outputs."""
+        profiles = profiles or sorted(self.profiles)
+        targets = targets or ALL_TARGETS
+        missing = [name for name in profiles if name not in self.profiles]
+        if missing:
+            raise ValueError(f"Unknown profile(s): {', '.join(missing)}")
+
+        version = self.version()
+        version_dir = os.path.join(self.output, version)
+        source_dir = os.path.join(version_dir, ".sources")
+        manifest = {"version": version, "sass": self.compiler.sass_version(), "profiles": {}}
+
+        # Seed one profile per template first: it teaches the compiler the
+        # color slots, so every other profile renders by substitution
+        seeds, rest = [], []
+        try:
+            for index, profile in enumerate(profiles):
+                partial = self.profiles[profile]
+                profile_dir = os.path.join(version_dir, profile)
+                files = manifest["profiles"].setdefault(profile, {})
+
+                for target in targets:
+                    if target == "kde":
+                        variables, _ = self.compiler.read_partial(partial)
+                        files[target] = render_kde(self.kde_dir, variables, profile_dir)
+                        continue
+
+                    source = self.prepare(profile, partial, target, source_dir, alpha)
+                    outputs = TARGETS[target][1]
+                    jobs = [(f"{profile}/{target}", source, os.path.join(profile_dir, out)) for out in outputs]
+                    (seeds if index == 0 else rest).extend(jobs)
+                    files[target] = outputs
+
+            print(f"Rendering {len(profiles)} profile(s) x {len(targets)} target(s) into {version_dir}")
+            failed = set()
+            for jobs in (seeds, rest):
+                # A broken partial only fails its own stylesheets, the
+                # compiler commits the rest and names the failed jobs
+                if jobs and self.compiler.compile(jobs) < 0:
+                    failed |= {name.split("/", 1)[0] for name in self.compiler.failed}
+            for profile in sorted(failed):
+                print(f"Profile '{profile}' failed to render.")
+        finally:
+            shutil.rmtree(source_dir, ignore_errors=True)
+
+        manifest["failed"] = sorted(failed)
+        self.write_manifest(version_dir, manifest)
+
+        if len(failed) < len(profiles):
+            # Point "latest" at this render without a moment where it is missing
+            latest = os.path.join(self.output, "latest")
+            if os.path.lexists(f"{latest}.tmp"):
+                os.remove(f"{latest}.tmp")
+            os.symlink(version, f"{latest}.tmp")
+            os.replace(f"{latest}.tmp", latest)
+
+        return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render Color My Desktop profiles without applying them.")
+    parser.add_argument("--sass", required=True, help="Path to the dart-sass binary")
+    parser.add_argument("--template-dir", required=True, help="Directory with the target templates")
+    parser.add_argument("--profile-dir", action="append", required=True,
+                        help="Directory with _<profile>.scss partials (repeatable, earlier wins)")
+    parser.add_argument("--kde-dir", help="Directory with the KDE color templates")
+    parser.add_argument("--cache-dir", help="Compiled CSS cache (default: OUTPUT/.cache)")
+    parser.add_argument("--profiles", nargs="+", metavar="PROFILE", help="Profiles to render (default: all)")
+    parser.add_argument("--targets", nargs="+", choices=ALL_TARGETS, metavar="TARGET",
+                        help=f"Targets to render (default: all of {', '.join(ALL_TARGETS)})")
+    parser.add_argument("--alpha", help="Render gnome-shell with this transparency for every profile")
+    parser.add_argument("--jobs", type=int, help="Sass processes (default: one per core)")
+    parser.add_argument("--list", action="store_true", help="List the profiles found and exit")
+    parser.add_argument("output", help="Output directory")
+    args = parser.parse_args(argv)
+
+    targets = args.targets or ALL_TARGETS
+    if "kde" in targets and not args.kde_dir:
+        parser.error("--kde-dir is required for the kde target")
+
+    renderer = BatchRenderer(args.sass, args.template_dir, args.profile_dir, args.kde_dir,
+                             args.output, args.cache_dir, args.jobs)
+    if args.list:
+        for name, path in sorted(renderer.profiles.items()):
+            print(f"{name}\t{path}")
+        return 0
+
+    try:
+        manifest = renderer.render(args.profiles, targets, args.alpha)
+    except ValueError as e:
+        parser.error(str(e))
+
+    rendered = len(manifest["profiles"]) - len(manifest["failed"])
+    print(f"Rendered {rendered} profile(s) into {os.path.join(args.output, manifest['version'])}")
+    if manifest["failed"]:
+        print(f"Failed: {', '.join(manifest['failed'])} (see the Sass output above)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Runs backend builds one at a time for the GUI. A new request supersedes
+# the build in flight: its process group is terminated (the backend discards
+# its staged outputs on SIGTERM) and only the newest request gets to finish.
+# No GTK imports here: callbacks are plain functions, the GUI hops them onto
+# the main loop itself.
+
+import os
+import signal
+import subprocess
+import threading
+
+
+class BuildController:
+    """Tracks the in-flight backend process and supersedes or cancels it."""
+
+    def __init__(self, command, on_line, on_finished):
+        # command: argv prefix, e.g. ["stdbuf", "-oL", BASH_SCRIPT]
+        # on_line(generation, line) and on_finished(generation, args, returncode, superseded)
+        # are called from the worker thread
+        self.command = command
+        self.on_line = on_line
+        self.on_finished = on_finished
+
+        self.generation = 0
+        self.process = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def is_running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, args, env=None):
+        """Starts a build for 'args', superseding whatever is running. Returns its generation."""
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+            previous = self._thread
+            self._terminate(self.process)
+
+            thread = threading.Thread(target=self._run, args=(generation, previous, args, env))
+            thread.daemon = True # Closes thread if you exit the app
+            self._thread = thread
+
+        thread.start()
+        return generation
+
+    def cancel(self):
+        """Stops the running build; nothing it produced is kept."""
+        with self._lock:
+            self.generation += 1
+            self._terminate(self.process)
+
+    def _terminate(self, process):
+        if process is None or process.poll() is not None:
+            return
+        try:
+            # The backend runs Sass, Python and its targets as children
+            os.killpg(process.pid, signal.SIGTERM)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def _run(self, generation, previous, args, env):
+        # Never let two builds write the same outputs: wait for the one we replace
+        if previous is not None:
+            previous.join()
+
+        returncode = None
+        try:
+            with self._lock:
+                # Several clicks while waiting collapse into the newest one
+                if not self.is_current(generation):
+                    return
+                # Use 'stdbuf -oL' to force Bash to send output line-by-line immediately
+                process = subprocess.Popen(
+                    self.command + args,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    text=True,
+                    bufsize=1,
+                    env=env,
+                    start_new_session=True
+                )
+                self.process = process
+
+            # Read output in real-time, dropping it once superseded
+            for line in iter(process.stdout.readline, ""):
+                if line and self.is_current(generation):
+                    self.on_line(generation, line)
+
+            returncode = process.wait()
+        except Exception as e:
+            self.on_line(generation, f"Error: {str(e)}\n")
+        finally:
+            with self._lock:
+                if self.process is not None and self.process.poll() is not None:
+                    self.process = None
+            self.on_finished(generation, args, returncode, not self.is_current(generation))
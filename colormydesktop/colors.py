@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Color math shared by the GUI and the headless tools: parsing, sRGB <->
+# linear conversion, WCAG luminance and contrast. Parsing and luminance are
+# memoized (bounded LRU), the sRGB curve is a lookup table, and the batch
+# helpers take lists of colors so a whole palette is one call.
+# No GTK imports here: the backend runs this with plain python3.
+
+import colorsys
+import functools
+import math
+import re
+
+
+# Bounds for the memoized helpers: a palette has ~10 colors, typing walks
+# through a few hundred more in a session
+CACHE_SIZE = 1024
+
+# Resolution of the linear -> sRGB table (its error stays below 1/255)
+LINEAR_STEPS = 4096
+
+# The '#' is required, like Gdk.RGBA.parse: "face" or "3584e4" are not colors
+HEX_PATTERN = re.compile(r"^#([0-9a-fA-F]{3,4}|[0-9a-fA-F]{6}|[0-9a-fA-F]{8})$")
+RGB_PATTERN = re.compile(r"^rgba?\(\s*([\d.]+)\s*,\s*([\d.]+)\s*,\s*([\d.]+)\s*(?:,\s*[\d.]+\s*)?\)$")
+# hsl(210, 60%, 40%), hsla(210deg 60% 40% / 0.5)
+HSL_PATTERN = re.compile(
+    r"^hsla?\(\s*([+-]?[\d.]+)(?:deg)?\s*[, ]\s*([\d.]+)%\s*[, ]\s*([\d.]+)%\s*(?:[,/]\s*[\d.]+%?\s*)?\)$"
+)
+
+# CSS named colors, what Gdk.RGBA.parse accepted before this module.
+# 'transparent' is black with alpha 0, and alpha is ignored here.
+NAMED_COLORS = {
+    "aliceblue": "#f0f8ff", "antiquewhite": "#faebd7", "aqua": "#00ffff", "aquamarine": "#7fffd4",
+    "azure": "#f0ffff", "beige": "#f5f5dc", "bisque": "#ffe4c4", "black": "#000000",
+    "blanchedalmond": "#ffebcd", "blue": "#0000ff", "blueviolet": "#8a2be2", "brown": "#a52a2a",
+    "burlywood": "#deb887", "cadetblue": "#5f9ea0", "chartreuse": "#7fff00",
+    "chocolate": "#d2691e", "coral": "#ff7f50", "cornflowerblue": "#6495ed", "cornsilk": "#fff8dc",
+    "crimson": "#dc143c", "cyan": "#00ffff", "darkblue": "#00008b", "darkcyan": "#008b8b",
+    "darkgoldenrod": "#b8860b", "darkgray": "#a9a9a9", "darkgreen": "#006400",
+    "darkgrey": "#a9a9a9", "darkkhaki": "#bdb76b", "darkmagenta": "#8b008b",
+    "darkolivegreen": "#556b2f", "darkorange": "#ff8c00", "darkorchid": "#9932cc",
+    "darkred": "#8b0000", "darksalmon": "#e9967a", "darkseagreen": "#8fbc8f",
+    "darkslateblue": "#483d8b", "darkslategray": "#2f4f4f", "darkslategrey": "#2f4f4f",
+    "darkturquoise": "#00ced1", "darkviolet": "#9400d3", "deeppink": "#ff1493",
+    "deepskyblue": "#00bfff", "dimgray": "#696969", "dimgrey": "#696969", "dodgerblue": "#1e90ff",
+    "firebrick": "#b22222", "floralwhite": "#fffaf0", "forestgreen": "#228b22",
+    "fuchsia": "#ff00ff", "gainsboro": "#dcdcdc", "ghostwhite": "#f8f8ff", "gold": "#ffd700",
+    "goldenrod": "#daa520", "gray": "#808080", "green": "#008000", "greenyellow": "#adff2f",
+    "grey": "#808080", "honeydew": "#f0fff0", "hotpink": "#ff69b4", "indianred": "#cd5c5c",
+    "indigo": "#4b0082", "ivory": "#fffff0", "khaki": "#f0e68c", "lavender": "#e6e6fa",
+    "lavenderblush": "#fff0f5", "lawngreen": "#7cfc00", "lemonchiffon": "#fffacd",
+    "lightblue": "#add8e6", "lightcoral": "#f08080", "lightcyan": "#e0ffff",
+    "lightgoldenrodyellow": "#fafad2", "lightgray": "#d3d3d3", "lightgreen": "#90ee90",
+    "lightgrey": "#d3d3d3", "lightpink": "#ffb6c1", "lightsalmon": "#ffa07a",
+    "lightseagreen": "#20b2aa", "lightskyblue": "#87cefa", "lightslategray": "#778899",
+    "lightslategrey": "#778899", "lightsteelblue": "#b0c4de", "lightyellow": "#ffffe0",
+    "lime": "#00ff00", "limegreen": "#32cd32", "linen": "#faf0e6", "magenta": "#ff00ff",
+    "maroon": "#800000", "mediumaquamarine": "#66cdaa", "mediumblue": "#0000cd",
+    "mediumorchid": "#ba55d3", "mediumpurple": "#9370db", "mediumseagreen": "#3cb371",
+    "mediumslateblue": "#7b68ee", "mediumspringgreen": "#00fa9a", "mediumturquoise": "#48d1cc",
+    "mediumvioletred": "#c71585", "midnightblue": "#191970", "mintcream": "#f5fffa",
+    "mistyrose": "#ffe4e1", "moccasin": "#ffe4b5", "navajowhite": "#ffdead", "navy": "#000080",
+    "oldlace": "#fdf5e6", "olive": "#808000", "olivedrab": "#6b8e23", "orange": "#ffa500",
+    "orangered": "#ff4500", "orchid": "#da70d6", "palegoldenrod": "#eee8aa",
+    "palegreen": "#98fb98", "paleturquoise": "#afeeee", "palevioletred": "#db7093",
+    "papayawhip": "#ffefd5", "peachpuff": "#ffdab9", "peru": "#cd853f", "pink": "#ffc0cb",
+    "plum": "#dda0dd", "powderblue": "#b0e0e6", "purple": "#800080", "rebeccapurple": "#663399",
+    "red": "#ff0000", "rosybrown": "#bc8f8f", "royalblue": "#4169e1", "saddlebrown": "#8b4513",
+    "salmon": "#fa8072", "sandybrown": "#f4a460", "seagreen": "#2e8b57", "seashell": "#fff5ee",
+    "sienna": "#a0522d", "silver": "#c0c0c0", "skyblue": "#87ceeb", "slateblue": "#6a5acd",
+    "slategray": "#708090", "slategrey": "#708090", "snow": "#fffafa", "springgreen": "#00ff7f",
+    "steelblue": "#4682b4", "tan": "#d2b48c", "teal": "#008080", "thistle": "#d8bfd8",
+    "tomato": "#ff6347", "turquoise": "#40e0d0", "violet": "#ee82ee", "wheat": "#f5deb3",
+    "white": "#ffffff", "whitesmoke": "#f5f5f5", "yellow": "#ffff00", "yellowgreen": "#9acd32",
+    "transparent": "#000000",
+}
+
+
+# --- sRGB CURVE ---
+def _srgb_to_linear(c):
+    return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+
+
+def _linear_to_srgb(c):
+    return c * 12.92 if c <= 0.0031308 else 1.055 * c ** (1 / 2.4) - 0.055
+
+
+# 8-bit channel -> linear light, and linear light -> 8-bit channel
+SRGB_TO_LINEAR = tuple(_srgb_to_linear(i / 255) for i in range(256))
+LINEAR_TO_SRGB = tuple(round(_linear_to_srgb(i / (LINEAR_STEPS - 1)) * 255) for i in range(LINEAR_STEPS))
+
+
+def to_linear(rgb):
+    """(r, g, b) 0-255 -> linear light 0.0-1.0 per channel."""
+    return tuple(SRGB_TO_LINEAR[c] for c in rgb)
+
+
+def from_linear(linear):
+    """Linear light 0.0-1.0 per channel -> (r, g, b) 0-255, clamped."""
+    top = LINEAR_STEPS - 1
+    return tuple(LINEAR_TO_SRGB[max(0, min(top, round(c * top)))] for c in linear)
+
+
+# --- OKLAB / OKLCH ---
+# Björn Ottosson's OKLab: perceptually even lightness, so moving only L
+# keeps a color's hue and chroma as the eye sees them
+def _cbrt(x):
+    return math.copysign(abs(x) ** (1 / 3), x)
+
+
+def linear_to_oklab(linear):
+    r, g, b = linear
+    l = _cbrt(0.4122214708 * r + 0.5363325363 * g + 0.0514459929 * b)
+    m = _cbrt(0.2119034982 * r + 0.6806995451 * g + 0.1073969566 * b)
+    s = _cbrt(0.0883024619 * r + 0.2817188376 * g + 0.6299787005 * b)
+    return (0.2104542553 * l + 0.7936177850 * m - 0.0040720468 * s,
+            1.9779984951 * l - 2.4285922050 * m + 0.4505937099 * s,
+            0.0259040371 * l + 0.7827717662 * m - 0.8086757660 * s)
+
+
+def oklab_to_linear(lab):
+    """OKLab -> linear sRGB. Out-of-gamut colors come back outside 0.0-1.0."""
+    L, a, b = lab
+    l = (L + 0.3963377774 * a + 0.2158037573 * b) ** 3
+    m = (L - 0.1055613458 * a - 0.0638541728 * b) ** 3
+    s = (L - 0.0894841775 * a - 1.2914855480 * b) ** 3
+    return (4.0767416621 * l - 3.3077115913 * m + 0.2309699292 * s,
+            -1.2684380046 * l + 2.6097574011 * m - 0.3413193965 * s,
+            -0.0041960863 * l - 0.7034186147 * m + 1.7076147010 * s)
+
+
+def to_oklch(color):
+    """Color -> (lightness 0-1, chroma, hue in degrees)."""
+    L, a, b = linear_to_oklab(to_linear(_rgb(color)))
+    return L, math.hypot(a, b), math.degrees(math.atan2(b, a)) % 360
+
+
+def from_oklch(lch):
+    """(lightness, chroma, hue) -> (r, g, b) 0-255.
+
+    Colors outside sRGB lose chroma (hue and lightness stay) until they fit.
+    """
+    L, C, h = lch
+    L = max(0.0, min(1.0, L))
+    cos_h, sin_h = math.cos(math.radians(h)), math.sin(math.radians(h))
+
+    def linear(chroma):
+        return oklab_to_linear((L, chroma * cos_h, chroma * sin_h))
+
+    rgb = linear(C)
+    if min(rgb) < -1e-4 or max(rgb) > 1 + 1e-4:
+        low, high = 0.0, C
+        for _ in range(12):
+            mid = (low + high) / 2
+            rgb = linear(mid)
+            if min(rgb) < -1e-4 or max(rgb) > 1 + 1e-4:
+                high = mid
+            else:
+                low = mid
+        rgb = linear(low)
+    return from_linear(rgb)
+
+
+# --- PARSING ---
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def parse(color):
+    """'#rgb', '#rrggbb', '#rrggbbaa', 'rgb()', 'hsl()' or a CSS color name -> (r, g, b).
+
+    None if invalid.
+
+    The alpha channel is ignored: contrast is always measured on the opaque color.
+    """
+    color = color.strip()
+    match = HEX_PATTERN.match(color)
+    if match:
+        digits = match.group(1)
+        if len(digits) <= 4:
+            digits = "".join(d * 2 for d in digits)
+        return tuple(int(digits[i:i + 2], 16) for i in (0, 2, 4))
+
+    match = RGB_PATTERN.match(color)
+    if match:
+        channels = [float(value) for value in match.groups()]
+        if all(value <= 255 for value in channels):
+            return tuple(round(value) for value in channels)
+        return None
+
+    match = HSL_PATTERN.match(color)
+    if match:
+        hue, saturation, lightness = (float(value) for value in match.groups())
+        if saturation > 100 or lightness > 100:
+            return None
+        rgb = colorsys.hls_to_rgb(hue / 360 % 1.0, lightness / 100, saturation / 100)
+        return tuple(round(c * 255) for c in rgb)
+
+    named = NAMED_COLORS.get(color.lower())
+    if named:
+        return parse(named)
+    return None
+
+
+def to_hex(rgb):
+    """(r, g, b) -> '#rrggbb', channels clamped to 0-255."""
+    return "#{:02x}{:02x}{:02x}".format(*(max(0, min(255, round(c))) for c in rgb))
+
+
+def _rgb(color):
+    """Accepts a color string or an (r, g, b) tuple."""
+    if isinstance(color, str):
+        rgb = parse(color)
+        if rgb is None:
+            raise ValueError(f"Not a color: {color!r}")
+        return rgb
+    return color
+
+
+# --- LUMINANCE AND CONTRAST ---
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def _luminance(rgb):
+    r, g, b = to_linear(rgb)
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b
+
+
+def luminance(color):
+    """WCAG relative luminance, 0.0 (black) to 1.0 (white)."""
+    return _luminance(_rgb(color))
+
+
+def brightness(color):
+    """Perceived brightness (Rec. 601 weights on the sRGB values), 0.0 to 1.0.
+
+    Cheaper than luminance and what the GUI uses to pick light or dark icons.
+    """
+    r, g, b = _rgb(color)
+    return (r * 0.299 + g * 0.587 + b * 0.114) / 255
+
+
+def ratio(l1, l2):
+    """WCAG contrast ratio of two luminances, 1.0 to 21.0."""
+    return (max(l1, l2) + 0.05) / (min(l1, l2) + 0.05)
+
+
+def contrast_ratio(color1, color2):
+    """WCAG contrast ratio between two colors."""
+    return ratio(luminance(color1), luminance(color2))
+
+
+def luminances(colors):
+    """Luminance of every color in a list (strings or tuples)."""
+    return [_luminance(_rgb(color)) for color in colors]
+
+
+def contrast_ratios(foregrounds, backgrounds):
+    """Element-wise contrast ratios of two equally long color lists."""
+    return [ratio(l1, l2) for l1, l2 in zip(luminances(foregrounds), luminances(backgrounds))]
+
+
+def mix(color1, color2, amount):
+    """color1 * amount + color2 * (1 - amount), on the sRGB values like CSS color-mix()."""
+    a, b = _rgb(color1), _rgb(color2)
+    return tuple(round(x * amount + y * (1 - amount)) for x, y in zip(a, b))
+
+
+def contrast_matrix(foregrounds, backgrounds):
+    """WCAG ratios of every foreground on every background (one row per foreground).
+
+    Each color's luminance is computed once, the cells are only the ratio.
+    """
+    back = luminances(backgrounds)
+    return [[ratio(lf, lb) for lb in back] for lf in luminances(foregrounds)]
+
+
+# --- PALETTE CONTRAST ---
+# WCAG thresholds: large text, normal text (AA) and enhanced (AAA)
+AA_LARGE = 3.0
+AA = 4.5
+AAA = 7.0
+
+# Partial variables that text is drawn on, and the ones drawn on them
+SURFACES = ("primary", "secondary", "tertiary", "topbar-color", "nautilus-main", "nautilus-secondary")
+FOREGROUNDS = ("text", "text-light", "clock-color")
+
+# $text-light is rgba($text, 0.25) in every partial
+TEXT_LIGHT_ALPHA = 0.25
+
+# Variables a partial may leave out, and what the themes use instead
+FALLBACKS = {
+    "topbar-color": "primary",
+    "clock-color": "text",
+    "nautilus-main": "primary",
+    "nautilus-secondary": "secondary",
+}
+
+
+def grade(value):
+    """'aaa', 'aa', 'large' or 'fail' for a contrast ratio."""
+    if value >= AAA:
+        return "aaa"
+    if value >= AA:
+        return "aa"
+    if value >= AA_LARGE:
+        return "large"
+    return "fail"
+
+
+def palette_contrast(variables):
+    """Contrast of every foreground variable on every surface of a partial.
+
+    variables maps names ("primary", "text", ...) to colors; missing ones
+    follow FALLBACKS. Returns {(foreground, surface): ratio}. $text-light is
+    measured as it renders: $text at TEXT_LIGHT_ALPHA over each surface.
+    """
+    resolved = {}
+    for name in SURFACES + FOREGROUNDS:
+        if name == "text-light":
+            continue
+        value = variables.get(name) or variables.get(FALLBACKS.get(name, ""))
+        resolved[name] = _rgb(value)
+
+    surfaces = [resolved[name] for name in SURFACES]
+    solid = [name for name in FOREGROUNDS if name != "text-light"]
+    rows = contrast_matrix([resolved[name] for name in solid], surfaces)
+    result = {(fg, surface): value
+              for fg, row in zip(solid, rows) for surface, value in zip(SURFACES, row)}
+
+    # The blend differs per surface, so text-light is one color per column
+    light = [mix(resolved["text"], surface, TEXT_LIGHT_ALPHA) for surface in surfaces]
+    for surface, value in zip(SURFACES, contrast_ratios(light, surfaces)):
+        result[("text-light", surface)] = value
+    return result
+
+
+# --- CONTRAST FIX ---
+# Where each fixable role is drawn; $text-light follows $text
+FIX_SURFACES = {
+    "text": SURFACES,
+    "clock-color": ("topbar-color",),
+}
+
+# Bisection steps on OKLCH lightness (2^-20: far below one 8-bit step)
+FIX_STEPS = 20
+
+
+def _solve_lightness(lch, goal, lighter):
+    """Smallest lightness change from lch whose luminance clears goal. Returns (L, rgb)."""
+    L, C, h = lch
+    near, far = L, (1.0 if lighter else 0.0)
+    best = from_oklch((far, C, h))
+    for _ in range(FIX_STEPS):
+        mid = (near + far) / 2
+        rgb = from_oklch((mid, C, h))
+        lum = _luminance(rgb)
+        if (lum >= goal) if lighter else (lum <= goal):
+            far, best = mid, rgb
+        else:
+            near = mid
+    return far, best
+
+
+def fix_contrast(color, surfaces, target=AA):
+    """The color nearest to color (OKLCH lightness only) with target contrast on every surface.
+
+    Returns color unchanged if it already passes. When no lightness clears
+    every surface (they span dark and light) the lightest or darkest
+    version, whichever does better on its worst surface, is returned.
+    """
+    rgb = _rgb(color)
+    back = luminances(surfaces)
+    # Luminances at or beyond these clear the brightest / darkest surface
+    need_light = target * (max(back) + 0.05) - 0.05
+    need_dark = (min(back) + 0.05) / target - 0.05
+    lum = _luminance(rgb)
+    if lum >= need_light or lum <= need_dark:
+        return rgb
+
+    lch = to_oklch(rgb)
+    candidates = []
+    # Even the lightest (darkest) color of this hue may miss the goal
+    if _luminance(from_oklch((1.0, lch[1], lch[2]))) >= need_light:
+        candidates.append(_solve_lightness(lch, need_light, True))
+    if _luminance(from_oklch((0.0, lch[1], lch[2]))) <= need_dark:
+        candidates.append(_solve_lightness(lch, need_dark, False))
+
+    if candidates:
+        return min(candidates, key=lambda found: abs(found[0] - lch[0]))[1]
+
+    extremes = [from_oklch((end, lch[1], lch[2])) for end in (1.0, 0.0)]
+    return max(extremes, key=lambda rgb: min(ratio(_luminance(rgb), lb) for lb in back))
+
+
+def fix_palette(variables, target=AA, roles=FIX_SURFACES):
+    """Fixed colors for the roles of a partial that miss target: {role: '#rrggbb'}.
+
+    variables is the same mapping palette_contrast takes. Roles that
+    already pass are left out.
+    """
+    fixes = {}
+    for role, surfaces in roles.items():
+        value = variables.get(role) or variables.get(FALLBACKS.get(role, ""))
+        backgrounds = [variables.get(name) or variables.get(FALLBACKS.get(name, "")) for name in surfaces]
+        fixed = fix_contrast(value, backgrounds, target)
+        if fixed != _rgb(value):
+            fixes[role] = to_hex(fixed)
+    return fixes
+
+
+# --- VARIANTS ---
+# Hue shifts of (secondary, tertiary) for each harmony
+HARMONIES = (
+    ("Monochrome", 0, 0),
+    ("Analogous", 30, 60),
+    ("Analogous", -30, -60),
+    ("Complementary", 180, 180),
+    ("Split complementary", 150, 210),
+)
+# Chroma kept by the secondary (the tertiary keeps its square)
+CHROMA_DAMPING = (1.0, 0.7, 0.4)
+# OKLCH lightness moved by the secondary (the tertiary moves twice as far)
+LIGHTNESS_STEPS = (0.08, 0.15, 0.22)
+
+
+@functools.lru_cache(maxsize=64)
+def variants(primary):
+    """Secondary/tertiary candidates for a primary color, built in OKLCH.
+
+    Returns a tuple of (description, secondary hex, tertiary hex): one per
+    harmony x chroma damping x lightness step. Dark primaries get lighter
+    companions and light ones darker, as the old RGB offset did, but hue
+    and chroma are only changed on purpose. Cached per primary, so
+    retyping a color costs nothing.
+    """
+    L, C, h = to_oklch(primary)
+    # OKLCH 0.6 is about where sRGB mid grey sits
+    direction = 1 if L < 0.6 else -1
+
+    candidates = []
+    for name, shift2, shift3 in HARMONIES:
+        for damping in CHROMA_DAMPING:
+            for step in LIGHTNESS_STEPS:
+                secondary = from_oklch((L + direction * step, C * damping, h + shift2))
+                tertiary = from_oklch((L + direction * step * 2, C * damping ** 2, h + shift3))
+                description = f"{name}, {round(damping * 100)}% chroma, lightness {direction * step:+.2f}"
+                candidates.append((description, to_hex(secondary), to_hex(tertiary)))
+    return tuple(candidates)
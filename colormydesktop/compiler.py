@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Batched Sass compiler used by color-my-desktop-backend.
+# No GTK imports here: the backend runs this with plain python3.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import signal
+import subprocess
+import sys
+import time
+
+from . import sass_service
+from .profiles import DECLARATION_PATTERN
+from .progress import emit, record_stage
+from .slots import SlotRenderer
+from .transform import prepare_template
+
+
+# Matches "@use '/path/_Name' as *;" and the old-style @import lines
+USE_PATTERN = re.compile(r"""^\s*@(?:use|import)\s+['"]([^'"]+)['"]""", re.MULTILINE)
+
+# "$primary" anywhere outside a declaration (DECLARATION_PATTERN is in profiles)
+VARIABLE_PATTERN = re.compile(r"\$([A-Za-z_][\w-]*)")
+
+# Keep the cache bounded, a GTK4 stylesheet alone is ~230 KB
+CACHE_LIMIT = 100
+
+
+class SassCompiler:
+    """Compiles input:output pairs in one dart-sass run, skipping cached and unchanged ones."""
+
+    def __init__(self, sass, cache_dir=None, fast_render=False, workers=1, defer_learning=False,
+                 service=None):
+        self.sass = sass
+        self.cache_dir = cache_dir
+        # Socket of the GUI session's warm Sass (colormydesktop.sass_service)
+        self.service = service
+        # Desktop builds leave slot learning to a background "--learn" run
+        self.defer_learning = defer_learning
+        # More than one Sass process only pays off for big batches (colormydesktop.batch)
+        self.workers = max(workers, 1)
+        self._version = None
+        self._reported = 0
+        # Names of the jobs the last compile() could not build
+        self.failed = []
+
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        # Slot templates live next to the CSS cache
+        self.slots = None
+        if fast_render and cache_dir:
+            self.slots = SlotRenderer(os.path.join(cache_dir, "slots"), self.sass_version())
+
+    # --- SASS VERSION ---
+    def sass_version(self):
+        """Returns the dart-sass version, probed once per binary."""
+        if self._version:
+            return self._version
+
+        # Running 'sass --version' boots the Dart VM, so remember the answer
+        # for as long as the binary on disk stays the same
+        stat = os.stat(self.sass)
+        stamp = f"{os.path.realpath(self.sass)}:{stat.st_size}:{stat.st_mtime_ns}"
+        version_file = os.path.join(self.cache_dir, "sass-version.json") if self.cache_dir else None
+
+        if version_file and os.path.exists(version_file):
+            try:
+                with open(version_file, "r") as f:
+                    data = json.load(f)
+                if data.get("stamp") == stamp:
+                    self._version = data["version"]
+                    return self._version
+            except (OSError, ValueError, KeyError):
+                pass
+
+        result = subprocess.run([self.sass, "--version"], capture_output=True, text=True)
+        self._version = result.stdout.strip() or stamp
+
+        if version_file:
+            with open(version_file, "w") as f:
+                json.dump({"stamp": stamp, "version": self._version}, f)
+
+        return self._version
+
+    # --- CACHE KEYS ---
+    def resolve_import(self, source, target):
+        """Finds the file behind a Sass @use target (partial or plain)."""
+        if not os.path.isabs(target):
+            target = os.path.join(os.path.dirname(os.path.abspath(source)), target)
+
+        folder, name = os.path.split(target)
+        name = re.sub(r"\.s?css$", "", name)
+        for candidate in (f"_{name}.scss", f"{name}.scss", f"_{name}.css", f"{name}.css"):
+            path = os.path.join(folder, candidate)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    # --- DEPENDENCY GRAPH ---
+    def read_partial(self, path):
+        """Parses a profile partial into ({variable: value}, other statements)."""
+        variables = {}
+        other = []
+        with open(path, "r") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("//"):
+                    continue
+                match = DECLARATION_PATTERN.match(line)
+                if match:
+                    variables[match.group(1)] = match.group(2).strip()
+                else:
+                    other.append(line)
+        return variables, other
+
+    def template_inputs(self, source):
+        """Returns the partial variables a template reads, plus anything else it pulls in.
+
+        Derived variables are followed back to what they are built from, so a
+        template reading $tertiary-light depends on $tertiary as well.
+        """
+        with open(source, "r") as f:
+            content = f.read()
+
+        uses = list(USE_PATTERN.finditer(content))
+        partial = None
+        extra = []
+        for match in uses:
+            target = match.group(1)
+            if target.startswith("sass:"):
+                continue
+            resolved = self.resolve_import(source, target)
+            if resolved and partial is None and os.path.basename(resolved).startswith("_"):
+                partial = resolved
+            elif resolved:
+                extra.append(resolved)
+
+        body = USE_PATTERN.sub("", content)
+        if partial is None:
+            return body, {}, [], extra
+
+        variables, other = self.read_partial(partial)
+        needed = set()
+        pending = [name for name in VARIABLE_PATTERN.findall(body) if name in variables]
+        while pending:
+            name = pending.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            pending += [ref for ref in VARIABLE_PATTERN.findall(variables[name]) if ref in variables]
+
+        return body, {name: variables[name] for name in needed}, other, extra
+
+    def cache_key(self, source):
+        """Hashes the template, the partial variables it reads and the Sass version.
+
+        Build options are not hashed: the transparency and top bar / clock
+        rewrites are already in the prepared gnome-shell body, and no other
+        template depends on them.
+        """
+        body, values, other, extra = self.template_inputs(source)
+
+        digest = hashlib.sha256()
+        digest.update(self.sass_version().encode())
+        # The gnome-shell template lives in a fresh temp file on every build,
+        # so only content counts, never paths
+        digest.update(b"\0" + body.encode())
+        digest.update(b"\0" + json.dumps(sorted(values.items())).encode())
+        digest.update(b"\0" + json.dumps(other).encode())
+        for path in sorted(extra):
+            with open(path, "rb") as f:
+                digest.update(b"\0" + f.read())
+
+        return digest.hexdigest()
+
+    def cache_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.css")
+
+    def prune_cache(self):
+        """Drops the least recently used stylesheets above CACHE_LIMIT."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".css"):
+                path = os.path.join(self.cache_dir, name)
+                entries.append((os.path.getmtime(path), path))
+
+        entries.sort(reverse=True)
+        for _, path in entries[CACHE_LIMIT:]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def store(self, key, output):
+        if self.cache_dir and key:
+            shutil.copyfile(output, self.cache_path(key))
+
+    # --- BUILD STATE ---
+    # Remembers which key each output was last built from, so a target whose
+    # inputs did not change is skipped without touching the file at all.
+    def state_path(self):
+        return os.path.join(self.cache_dir, "targets.json")
+
+    def load_state(self):
+        try:
+            with open(self.state_path(), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_state(self, state):
+        with open(self.state_path(), "w") as f:
+            json.dump(state, f, indent=1)
+
+    def is_up_to_date(self, state, output, key):
+        entry = state.get(output)
+        if not entry or entry.get("key") != key or not os.path.exists(output):
+            return False
+        # Someone replaced the file since we wrote it
+        return entry.get("mtime") == os.stat(output).st_mtime_ns
+
+    def record(self, state, output, key):
+        state[output] = {"key": key, "mtime": os.stat(output).st_mtime_ns}
+
+    # --- COMPILE ---
+    def report(self, name, result, total):
+        """Sends a progress event for one finished stylesheet."""
+        self._reported += 1
+        emit("stylesheet", target=name, result=result, index=self._reported, total=total)
+
+    def sass_command(self):
+        # Source maps would point at files from whatever build filled the cache.
+        # Without error CSS a stylesheet that fails leaves no output, which
+        # is how it is told apart from the ones that compiled
+        return [self.sass, "--style", "expanded", "--no-source-map", "--no-error-css"]
+
+    def learn_pending(self):
+        """Learns the color slots earlier builds queued (the backend runs this in the background)."""
+        if not self.slots:
+            return
+        started = time.monotonic()
+        learned = self.slots.learn_pending(self.sass_command())
+        if learned is None:
+            print("Another learner is running.")
+            return
+        record_stage("slots-learn", time.monotonic() - started)
+        print(f"Learned {learned.count(True)} color-slot template(s), "
+              f"{learned.count(False)} need full Sass compiles.")
+
+    def run_service(self, pending, staged):
+        """Compiles in the session's warm Sass. False if it is not running."""
+        reply = sass_service.compile_files(self.service, [source for source, _ in pending])
+        if reply is None:
+            print("Sass service not reachable, starting Sass for this build.")
+            return False
+
+        results, log = reply
+        for message in log:
+            print(message, file=sys.stderr)
+        # Same outcome as 'sass --no-error-css': only compiled stylesheets get a file
+        for (_, output), result in zip(pending, results):
+            if "css" in result:
+                with open(staged[output], "w") as f:
+                    f.write(result["css"])
+            else:
+                print(result["error"], file=sys.stderr)
+        print("Compiled in the warm Sass service.")
+        return True
+
+    def stage_path(self, output):
+        """Where an output is written until the whole batch succeeded."""
+        folder, name = os.path.split(output)
+        return os.path.join(folder, f".{name}.{os.getpid()}.tmp")
+
+    def compile(self, jobs):
+        """Builds every (name, input, output) job. Returns the number of Sass compiles.
+
+        Outputs are staged next to their destination and renamed into place
+        once Sass is done, so a cancelled build leaves the previous
+        stylesheets untouched. A stylesheet that fails to compile keeps its
+        previous version, the others are committed; the result is then -1
+        and self.failed lists the names of the failed jobs.
+        """
+        self.failed = []
+        staged = {}
+        try:
+            return self._compile(jobs, staged)
+        finally:
+            for path in staged.values():
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _compile(self, jobs, staged):
+        pending = []
+        sentinels = []
+        copies = []
+        keys = {}
+        built = {}
+        names = {output: name for name, _, output in jobs}
+        total = len(jobs)
+        state = self.load_state() if self.cache_dir else {}
+
+        for name, source, output in jobs:
+            os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+
+            if not self.cache_dir:
+                staged[output] = self.stage_path(output)
+                pending.append((source, output))
+                continue
+
+            key = self.cache_key(source)
+            keys[output] = key
+
+            if self.is_up_to_date(state, output, key):
+                print(f"Up to date: {name}")
+                self.report(name, "up-to-date", total)
+                continue
+
+            staged[output] = self.stage_path(output)
+
+            # Same template and inputs as another job (gtk.css / gtk-dark.css)
+            if key in built:
+                copies.append((built[key], output))
+                continue
+            built[key] = output
+
+            cached = self.cache_path(key)
+            if os.path.exists(cached):
+                shutil.copyfile(cached, staged[output])
+                # Touch it so pruning keeps the recently applied profiles
+                os.utime(cached, None)
+                print(f"Cached: {output}")
+                self.report(name, "cached", total)
+                continue
+
+            # Fast path: fill in the color slots of a template learned earlier
+            if self.slots:
+                css = self.slots.render(source)
+                if css is not None:
+                    with open(staged[output], "w") as f:
+                        f.write(css)
+                    self.store(key, staged[output])
+                    print(f"Rendered from color slots: {output}")
+                    self.report(name, "rendered", total)
+                    continue
+
+                # Learned by a second Sass run once the real compile is done
+                sentinels += self.slots.sentinel_jobs(source)
+
+            pending.append((source, output))
+
+        failed = []
+        if pending:
+            print(f"Compiling {len(pending)} stylesheet(s) in one Sass run...")
+            for source, output in pending:
+                print(f"  {source} -> {output}")
+
+            cmd = self.sass_command()
+            pairs = [f"{source}:{staged[output]}" for source, output in pending]
+            sys.stdout.flush()
+            started = time.monotonic()
+            warm = self.service is not None and self.run_service(pending, staged)
+            if not warm and self.workers > 1 and len(pairs) > 1:
+                groups = [pairs[i::self.workers] for i in range(self.workers)]
+                processes = [subprocess.Popen(cmd + group) for group in groups if group]
+                for process in processes:
+                    process.wait()
+            elif not warm:
+                subprocess.run(cmd + pairs)
+            record_stage("sass", time.monotonic() - started,
+                         ", ".join(dict.fromkeys(names[output] for _, output in pending)))
+
+            # One broken stylesheet only fails its own target
+            for _, output in pending:
+                if not os.path.exists(staged[output]):
+                    failed.append(output)
+                    self.report(names[output], "failed", total)
+                    continue
+                if self.cache_dir:
+                    self.store(keys[output], staged[output])
+                self.report(names[output], "compiled", total)
+        elif not copies:
+            print("All stylesheets up to date, skipping Sass.")
+
+        # Learning is optional and only follows a build that succeeded:
+        # queued for the background learner, or (batch) its own Sass run whose
+        # exit status is ignored (learn() skips sets with missing outputs)
+        if self.slots and sentinels:
+            if failed:
+                # Drops the sentinel sources, the next build queues them again
+                self.slots.learn()
+            elif self.defer_learning:
+                print(f"Queued {self.slots.defer()} color-slot template(s) to learn after the build.")
+            else:
+                subprocess.run(cmd + [f"{source}:{output}" for source, output in sentinels],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                learned = self.slots.learn()
+                print(f"Learned {learned.count(True)} color-slot template(s), "
+                      f"{learned.count(False)} need full Sass compiles.")
+
+        for original, output in copies:
+            if original in failed:
+                failed.append(output)
+                self.report(names[output], "failed", total)
+            elif os.path.exists(staged[original]):
+                print(f"Copying {original} to {output}...")
+                shutil.copyfile(staged[original], staged[output])
+                self.report(names[output], "copied", total)
+
+        # Commit: every stylesheet of this build lands at once
+        for output, path in staged.items():
+            if os.path.exists(path):
+                os.replace(path, output)
+                if self.cache_dir:
+                    self.record(state, output, keys[output])
+
+        if self.cache_dir:
+            self.save_state(state)
+            self.prune_cache()
+
+        if failed:
+            self.failed = list(dict.fromkeys(names[output] for output in failed))
+            print(f"Failed: {', '.join(self.failed)} "
+                  f"(kept their previous stylesheets, see the Sass output above)")
+            return -1
+        return len(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compile Color My Desktop stylesheets.")
+    parser.add_argument("--sass", required=True, help="Path to the dart-sass binary")
+    parser.add_argument("--cache-dir", help="Directory for compiled CSS (disables caching if omitted)")
+    parser.add_argument("--fast-render", action="store_true",
+                        help="Render profiles by color substitution when the template allows it")
+    parser.add_argument("--prepare", metavar="TEMPLATE:INPUT",
+                        help="Write INPUT from the gnome-shell TEMPLATE before compiling")
+    parser.add_argument("--import", dest="import_statement",
+                        help="@use line for the profile partial, replaces the template's own")
+    parser.add_argument("--alpha", help="Wrap the background colors in rgba() with this alpha")
+    parser.add_argument("--topbar", action="store_true", help="Point BAR_TARGET at $topbar-color")
+    parser.add_argument("--clock", action="store_true", help="Point TIME_TARGET at $clock-color")
+    parser.add_argument("--learn", action="store_true",
+                        help="Learn the color slots earlier builds queued, then exit")
+    parser.add_argument("jobs", nargs="*", metavar="[NAME=]INPUT:OUTPUT")
+    args = parser.parse_args(argv)
+
+    if args.learn:
+        if not args.cache_dir:
+            parser.error("--learn needs --cache-dir")
+        SassCompiler(args.sass, args.cache_dir, fast_render=True).learn_pending()
+        return 0
+    if not args.jobs:
+        parser.error("no jobs given")
+
+    if args.prepare:
+        template, sep, prepared = args.prepare.partition(":")
+        if not sep:
+            parser.error(f"Expected TEMPLATE:INPUT, got '{args.prepare}'")
+        started = time.monotonic()
+        prepare_template(template, prepared, args.import_statement, args.alpha, args.topbar, args.clock)
+        record_stage("gnome-shell-template", time.monotonic() - started)
+
+    jobs = []
+    for job in args.jobs:
+        name, sep, paths = job.partition("=")
+        if not sep or "/" in name:
+            name, paths = None, job
+        source, sep, output = paths.partition(":")
+        if not sep:
+            parser.error(f"Expected [NAME=]INPUT:OUTPUT, got '{job}'")
+        jobs.append((name or os.path.basename(output), source, output))
+
+    # A superseded build is stopped with SIGTERM: unwind so staged outputs are removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+
+    compiler = SassCompiler(args.sass, args.cache_dir, args.fast_render, defer_learning=True,
+                            service=os.environ.get("COLORMYDESKTOP_SASS_SERVICE"))
+    return 1 if compiler.compile(jobs) < 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,23 +10,13 @@ import json
 import shutil
 import hashlib
 
+from .environment import detect as detect_environment
+
 class DialogMixin:
 
     def is_running_in_flatpak(self):
-        #  Check for the physical metadata file 
-        if os.path.exists('/.flatpak-info'):
-            return True
-        
-        # Check the 'container' env var (Commonly set by Flatpak/Podman)
-        if os.environ.get('container') == 'flatpak':
-            return True
-        
-        # Check for FLATPAK_ID but double-check it's not a leaked value
-        # If FLATPAK_ID exists but /app does not, it's likely a leaked variable
-        if os.environ.get('FLATPAK_ID') and os.path.exists('/app'):
-            return True
-            
-        return False
+        # Probed once per session, see colormydesktop/environment.py
+        return detect_environment().sandboxed
 
 
     def setup_user_data(self):
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Where Color My Desktop runs (Flatpak sandbox or native install) and where
+# its tools and outputs live. detect() works this out once per session; the
+# GUI reads it instead of probing /.flatpak-info in every handler and passes
+# it to the backend (backend_env), so a build never re-probes what cannot
+# change while the app is open.
+# No GTK imports here: the backend runs this with plain python3.
+
+import functools
+import os
+
+
+APP_ID = "io.github.schwarzen.colormydesktop"
+
+# Output folders as the host sees them. They double as the keys for the
+# folder permissions (portal paths) saved by the GUI.
+OUTPUT_FOLDERS = {
+    "plasma": "~/.local/share/plasma",
+    "color-schemes": "~/.local/share/color-schemes",
+    "themes": "~/.local/share/themes",
+    "zen": "~/.zen/*/chrome",
+    "vesktop": "~/.config/vesktop/themes",
+    "gtk4": "~/.config/gtk-4.0",
+    "icons": "~/.local/share/icons",
+}
+
+
+def in_flatpak():
+    """True inside the Flatpak sandbox."""
+    # The metadata file is the reliable marker
+    if os.path.exists("/.flatpak-info"):
+        return True
+
+    # The 'container' env var (commonly set by Flatpak/Podman)
+    if os.environ.get("container") == "flatpak":
+        return True
+
+    # FLATPAK_ID without /app is a variable leaked from a Flatpak parent
+    return bool(os.environ.get("FLATPAK_ID")) and os.path.exists("/app")
+
+
+class Environment:
+    """Install layout: sandbox or native, tool paths and data folders."""
+
+    def __init__(self, sandboxed):
+        self.sandboxed = sandboxed
+        self.outputs = dict(OUTPUT_FOLDERS)
+
+        if sandboxed:
+            data = os.path.expanduser(f"~/.var/app/{APP_ID}/data")
+            self.backend = "/app/bin/color-my-desktop-backend"
+            self.package_dir = "/app/bin/colormydesktop"
+            self.scss_dir = os.path.join(data, "scss")
+            self.palettes = "/app/share/color-my-desktop/palettes"
+            self.thumbnail_dir = os.path.join(data, "thumbnails")
+            self.sass = "/app/lib/dart-sass/sass"
+            self.python = "python3"
+        else:
+            data = os.path.expanduser("~/.local/share/color-my-desktop")
+            venv_python = os.path.join(data, ".venv/bin/python3")
+            self.backend = os.path.expanduser("~/.local/bin/color-my-desktop-backend")
+            self.package_dir = os.path.expanduser("~/.local/bin/colormydesktop")
+            self.scss_dir = os.path.join(data, "scss")
+            self.palettes = os.path.join(data, "palettes")
+            self.thumbnail_dir = os.path.join(data, "thumbnails")
+            self.sass = os.path.join(data, ".venv/bin/sass")
+            # Fall back to the system interpreter if the venv is missing
+            self.python = venv_python if os.access(venv_python, os.X_OK) else "python3"
+
+    def __repr__(self):
+        return f"Environment({'flatpak' if self.sandboxed else 'native'}, backend={self.backend})"
+
+    def backend_env(self):
+        """The COLORMYDESKTOP_* variables that spare the backend its own probes."""
+        return {
+            "COLORMYDESKTOP_SANDBOX": "flatpak" if self.sandboxed else "native",
+            "COLORMYDESKTOP_SASS": self.sass,
+            "COLORMYDESKTOP_PYTHON": self.python,
+        }
+
+
+@functools.lru_cache(maxsize=None)
+def detect():
+    """The environment of this session (probed on the first call only)."""
+    return Environment(in_flatpak())
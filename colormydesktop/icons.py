@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Papirus recolor engine used by color-my-desktop-backend.
+# Every "*-blue.svg" in Papirus-Custom gets a "*-cmg.svg" twin with the
+# profile colors, and the generic symlink (folder.svg) is pointed at it.
+# A manifest in the theme remembers what each twin was built from, so a
+# rebuild with the same colors only stats the sources.
+# No GTK imports here: the backend runs this with plain python3.
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .progress import emit
+
+
+# Papirus blue palette -> profile color role
+PAPIRUS_COLORS = {
+    "#5294e2": "primary",
+    "#84afea": "text",
+    "#2e6bb4": "secondary",
+    "#4877b1": "primary",
+}
+
+SOURCE_SUFFIX = "-blue.svg"
+TARGET_SUFFIX = "-cmg.svg"
+
+# Icons between two progress events
+PROGRESS_STEP = 256
+
+MANIFEST_NAME = ".cmg-manifest.json"
+MANIFEST_VERSION = 1
+
+# Set up once per worker process
+_pattern = None
+_mapping = None
+
+
+def color_map(primary, secondary, text):
+    """Maps each Papirus blue (lowercase) to the profile color replacing it."""
+    roles = {"primary": primary, "secondary": secondary, "text": text}
+    return {blue: roles[role] for blue, role in PAPIRUS_COLORS.items()}
+
+
+def mapping_key(mapping):
+    """Short, stable id for a color mapping."""
+    return ",".join(f"{blue}={mapping[blue]}" for blue in sorted(mapping))
+
+
+def _init_worker(mapping):
+    global _pattern, _mapping
+    _mapping = mapping
+    _pattern = re.compile("|".join(re.escape(blue) for blue in mapping), re.IGNORECASE)
+
+
+def find_sources(theme_dir):
+    """Yields every real (non-symlink) "*-blue.svg" file below theme_dir."""
+    for root, _, files in os.walk(theme_dir):
+        for name in files:
+            if not name.endswith(SOURCE_SUFFIX) or "cmg" in name:
+                continue
+            path = os.path.join(root, name)
+            if not os.path.islink(path):
+                yield path
+
+
+def twin_paths(source):
+    """Returns (twin path, twin name, generic symlink) for a "-blue.svg" source."""
+    folder, name = os.path.split(source)
+    base = name[:-len(SOURCE_SUFFIX)]
+    target_name = base + TARGET_SUFFIX
+    return os.path.join(folder, target_name), target_name, os.path.join(folder, base + ".svg")
+
+
+def link_points_to(link, target_name):
+    try:
+        return os.readlink(link) == target_name
+    except OSError:
+        return False
+
+
+def redirect_link(link, target_name):
+    """Same as "ln -sf folder-cmg.svg folder.svg" inside the icon directory."""
+    tmp_link = f"{link}.tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target_name, tmp_link)
+    os.replace(tmp_link, link)
+
+
+def recolor_file(job):
+    """Writes the recolored twin of one icon unless its source content is unchanged.
+
+    Returns (source, sha256 of the source, whether anything was written).
+    """
+    source, known_sha = job
+    target, target_name, link = twin_paths(source)
+
+    with open(source, "rb") as f:
+        raw = f.read()
+    sha = hashlib.sha256(raw).hexdigest()
+
+    # Touched (e.g. a Papirus update) but identical, keep the twin
+    changed = False
+    if sha != known_sha or not os.path.exists(target):
+        content = raw.decode("utf-8", errors="surrogateescape")
+        # One pass: every blue is swapped at most once, whatever the new colors are
+        content = _pattern.sub(lambda match: _mapping[match.group(0).lower()], content)
+
+        tmp = f"{target}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(content.encode("utf-8", errors="surrogateescape"))
+        os.chmod(tmp, os.stat(source).st_mode & 0o777)
+        os.replace(tmp, target)
+        changed = True
+
+    if not link_points_to(link, target_name):
+        redirect_link(link, target_name)
+        changed = True
+
+    return source, sha, changed
+
+
+# --- MANIFEST ---
+def load_manifest(theme_dir):
+    try:
+        with open(os.path.join(theme_dir, MANIFEST_NAME), "r") as f:
+            data = json.load(f)
+        if data.get("version") == MANIFEST_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"version": MANIFEST_VERSION, "mapping": None, "icons": {}}
+
+
+def save_manifest(theme_dir, manifest):
+    path = os.path.join(theme_dir, MANIFEST_NAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def stat_key(path):
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def recolor_theme(theme_dir, primary, secondary, text, workers=None):
+    """Recolors the blue icons in theme_dir on a pool sized to the cores.
+
+    Returns the number of icons that had to be rewritten.
+    """
+    mapping = color_map(primary, secondary, text)
+    key = mapping_key(mapping)
+    manifest = load_manifest(theme_dir)
+
+    # A new palette invalidates every twin, the source hashes stay useful
+    same_colors = manifest["mapping"] == key
+    known = manifest["icons"]
+    icons = {}
+    jobs = []
+
+    for source in find_sources(theme_dir):
+        rel = os.path.relpath(source, theme_dir)
+        entry = known.get(rel)
+        stamp = stat_key(source)
+
+        if same_colors and entry and entry["stat"] == stamp:
+            target, target_name, link = twin_paths(source)
+            if os.path.exists(target) and link_points_to(link, target_name):
+                icons[rel] = entry
+                continue
+
+        known_sha = entry["sha"] if (same_colors and entry) else None
+        jobs.append((source, known_sha))
+        icons[rel] = {"stat": stamp, "sha": None}
+
+    changed = 0
+    total = len(icons)
+    skipped = total - len(jobs)
+    emit("icons", done=skipped, total=total)
+
+    if jobs:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(mapping,)) as pool:
+            # Thousands of tiny files: hand them out in chunks, not one by one
+            for done, (source, sha, written) in enumerate(pool.map(recolor_file, jobs, chunksize=64), 1):
+                icons[os.path.relpath(source, theme_dir)]["sha"] = sha
+                changed += written
+                if done % PROGRESS_STEP == 0:
+                    emit("icons", done=skipped + done, total=total)
+        emit("icons", done=total, total=total)
+
+    if jobs or not same_colors or len(icons) != len(known):
+        save_manifest(theme_dir, {"version": MANIFEST_VERSION, "mapping": key, "icons": icons})
+
+    return changed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recolor the blue Papirus icons with a profile's colors.")
+    parser.add_argument("--primary", required=True)
+    parser.add_argument("--secondary", required=True)
+    parser.add_argument("--text", required=True)
+    parser.add_argument("--jobs", type=int, help="Worker processes (default: one per core)")
+    parser.add_argument("theme_dir", help="The Papirus-Custom icon theme")
+    args = parser.parse_args(argv)
+
+    count = recolor_theme(args.theme_dir, args.primary, args.secondary, args.text, args.jobs)
+    if count:
+        print(f"Recolored {count} icons.")
+    else:
+        # The backend skips the icon cache refresh on this line
+        print("Up to date: icons")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,44 +2,57 @@
 # Copyright 2026 Schwarzen
 # SPDX-License-Identifier: Apache-2.0
 
+import bisect
 import os
 import re
 import subprocess
-import threading
 import sys
 import shutil
 import json
+import time
 
 
 
 import gi
 
-from gi.repository import Gtk, Adw, Gdk, GLib, Gio, GObject
+from gi.repository import Gtk, Adw, Gdk, GLib, Gio, GObject, Pango
 
 
 
 from .dialogs import DialogMixin
 from .advancedpref import AdvancedMixin
+from . import colors
+from . import sass_service
+from .build import BuildController
+from .environment import detect as detect_environment
+from .profiles import ProfileIndex, profile_name
+from .progress import parse_event
+from .thumbnails import ThumbnailCache
 # --- CONFIGURATION ---
 
 
 
 
-if os.environ.get("FLATPAK_ID"):
-    # Inside Flatpak, the script is at /app/bin/
-    BASH_SCRIPT = "/app/bin/color-my-desktop-backend"
-    SCSS_DIR = os.path.expanduser("~/.var/app/io.github.schwarzen.colormydesktop/data/scss")
-    SCSS_USR = os.path.expanduser("~/.var/app/io.github.schwarzen.colormydesktop/data/scss")
+# Probed once per session, see colormydesktop/environment.py
+ENVIRONMENT = detect_environment()
 
-    PALETTES = "/app/share/color-my-desktop/palettes"
-    PYTHON_DIR = "/app/bin/colormydesktop"
-else:
-    # Native install location
-    BASH_SCRIPT = os.path.expanduser("~/.local/bin/color-my-desktop-backend")
-    SCSS_DIR = os.path.expanduser("~/.local/share/color-my-desktop/scss")
-    SCSS_USR = os.path.expanduser("~/.local/share/color-my-desktop/scss")
-    PALETTES = os.path.expanduser("~/.local/share/color-my-desktop/palettes")
-    PYTHON_DIR = os.path.expanduser("~/.local/bin/colormydesktop")
+BASH_SCRIPT = ENVIRONMENT.backend
+SCSS_DIR = ENVIRONMENT.scss_dir
+SCSS_USR = ENVIRONMENT.scss_dir
+PALETTES = ENVIRONMENT.palettes
+PYTHON_DIR = ENVIRONMENT.package_dir
+
+
+def paint_swatches(cr, width, height, rgbs):
+    """Fills the area with equal vertical bands, one per (r, g, b) color."""
+    if not rgbs:
+        return
+    part = width / len(rgbs)
+    for i, (r, g, b) in enumerate(rgbs):
+        cr.set_source_rgb(r / 255, g / 255, b / 255)
+        # Half a pixel of overlap hides the seams between bands
+        cr.rectangle(i * part, 0, part + 0.5, height)
+        cr.fill()
 
 
 class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
@@ -48,10 +61,49 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         
         self.portal_widgets = {}
         self.color_entries = {}
+        # Preview scheduler: pending tick callback, colors on screen and their CSS providers
+        self.preview_tick_id = None
+        self.preview_applied = {}
+        self.preview_providers = {}
+        # Colors shown instead of the entries while a contrast fix is previewed
+        self.preview_override = {}
+        # Profile browser popover, built on first use
+        self.profile_browser = None
+        # Swatch thumbnails of the browser rows, rendered off the main thread
+        # (the worker also reads the profile's colors, see profile_swatches)
+        self.thumbnails = ThumbnailCache(ENVIRONMENT.thumbnail_dir, self.profile_swatches,
+                                         Gdk.Texture.new_from_filename,
+                                         lambda name, key, texture: GLib.idle_add(self.on_thumbnail_ready,
+                                                                                  name, key, texture))
+        # Bound browser row picture -> profile it is showing
+        self.thumbnail_rows = {}
+        # Variant grid: built on first use, candidates for the current primary
+        self.variant_popover = None
+        self.variant_candidates = ()
+        # One backend run at a time, a new request supersedes the running one
+        self.build_controller = BuildController(
+            ["stdbuf", "-oL", BASH_SCRIPT],
+            self.on_build_line,
+            self.on_build_process_finished
+        )
+        # Saving a configuration has its own controller: a build never
+        # replaces a save that is writing the partial, and a save never
+        # replaces a build
+        self.config_controller = BuildController(
+            ["stdbuf", "-oL", BASH_SCRIPT],
+            self.on_config_line,
+            self.on_build_process_finished
+        )
+        # Warm Sass shared by the builds of this session (colormydesktop/sass_service.py)
+        self.sass_process = None
+        self.sass_socket = os.path.join(GLib.get_user_runtime_dir(),
+                                        f"colormydesktop-sass-{os.getpid()}.sock")
         self.setup_css_providers()
         self.last_manually_enterd_zen_path = ""
         self.load_persistent_settings()
         self.setup_user_data()
+        # Boots the Dart VM while the user is still picking colors
+        self.ensure_sass_service()
         self.load_all_cached_portals()
         self.is_plasma_refresh_ready()
         self.is_gnome_refresh_ready()
@@ -61,13 +113,13 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         
 
 
+        # Partials are parsed once, on first use; selecting a profile is then a lookup
+        self.profile_index = ProfileIndex(SCSS_DIR)
         if os.path.exists(SCSS_DIR):
-            raw_themes = [f[1:-5] for f in os.listdir(SCSS_DIR) if f.startswith('_') and f.endswith('.scss')]
-            raw_themes.sort()
-            self.themes = ["Default"] + raw_themes
+            self.profile_index.refresh()
         else:
             print("CRITICAL: SCSS_DIR missing even after setup_user_data")
-            self.themes = ["Default"]
+        self.themes = ["Default"] + [name for name in self.profile_index.names() if name != "Default"]
 
 
 
@@ -285,6 +337,8 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         self.model_store.append(self.theme_list)
         self.model_store.append(self.install_item_list)
         self.combined_model = Gtk.FlattenListModel.new(self.model_store)
+        # Profiles written by the backend or by scripts show up on their own
+        self.setup_profile_monitor()
 
         # ATTACH TO COMBO ROW
         factory = Gtk.SignalListItemFactory()
@@ -320,7 +374,17 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         # Connect the button to your setup function
         #self.refresh_palettes_btn.connect("clicked", self.on_refresh_palettes_clicked)
 
+        # --- BROWSE PROFILES BUTTON ---
+        # Searchable list for large palette collections (see PROFILE BROWSER)
+        browse_btn = Gtk.Button.new_from_icon_name("system-search-symbolic")
+        browse_btn.set_valign(Gtk.Align.CENTER)
+        browse_btn.add_css_class("flat")
+        browse_btn.set_tooltip_text("Search Profiles")
+        browse_btn.set_margin_end(4)
+        browse_btn.connect("clicked", self.on_browse_profiles_clicked)
+
         # Add the buttons to the ComboRow suffix (right side)
+        self.combo_row.add_suffix(browse_btn)
         self.combo_row.add_suffix(new_profile_btn)
         #self.combo_row.add_suffix(self.refresh_palettes_btn)
         self.combo_row.add_suffix(self.delete_profile_btn)
@@ -427,6 +491,18 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         self.contrast_info_row.set_activatable(True) # Makes the whole row clickable
         self.contrast_info_row.add_css_class("contrast-sub-row") # For the CSS trick later
 
+        # Auto-fix button: hovering previews the fixed colors, clicking applies them
+        self.contrast_fix_btn = Gtk.Button(label="Auto-Fix Contrast")
+        self.contrast_fix_btn.set_valign(Gtk.Align.CENTER)
+        self.contrast_fix_btn.add_css_class("flat")
+        self.contrast_fix_btn.set_visible(False)
+        self.contrast_fix_btn.connect("clicked", self.on_fix_contrast_clicked)
+        fix_hover = Gtk.EventControllerMotion.new()
+        fix_hover.connect("enter", lambda *args: self.preview_contrast_fix(colors.AA))
+        fix_hover.connect("leave", lambda *args: self.preview_contrast_fix(None))
+        self.contrast_fix_btn.add_controller(fix_hover)
+        self.contrast_info_row.add_suffix(self.contrast_fix_btn)
+
         # Add a "details" arrow icon to the end
         self.contrast_info_row.add_suffix(Gtk.Image.new_from_icon_name("go-next-symbolic"))
 
@@ -506,6 +582,7 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         self.mockup_wrapper.append(self.mockup_image)
         self.preview_group.set_visible(False)
         self.preview_group.add(self.mockup_wrapper)
+        self.preview_group.add(self.build_contrast_heatmap())
         
         
         # --- ADAPTIVE CONTAINER ---
@@ -865,11 +942,6 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         self.adv_nav_page = Adw.NavigationPage.new(self.adv_page_content, "Advanced")
         self.nav_view.add(self.adv_nav_page)
         
-        initial_css = ""
-        for cid, hcolor in self.current_colors.items():
-            initial_css += f"#{cid}-preview {{ background-color: {hcolor}; border-radius: 6px; min-width: 24px; min-height: 24px; }}\n"
-        self.dynamic_color_provider.load_from_string(initial_css)
-        
         # --- AT THE END OF YOUR __init__ ---
 
         # 1. Fill the current_colors registry with the default values from the entries
@@ -878,11 +950,15 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
 
         for css_id, entry_widget in self.color_entries.items():
             # Get the text currently in the box (the default hex you passed)
-            hex_val = entry_widget.get_text().strip()
-            if hex_val:
-                # Ensure it has a #
-                clean_hex = hex_val if hex_val.startswith('#') else f"#{hex_val}"
-                self.current_colors[css_id] = clean_hex
+            rgb = colors.parse(entry_widget.get_text())
+            if rgb:
+                # Stored as #rrggbb, whatever form the entry uses
+                self.current_colors[css_id] = colors.to_hex(rgb)
+
+        # Custom topbar/clock/Nautilus colors come and go with their switches
+        for switch in (self.topbar_switch, self.clock_switch,
+                       self.nautilus_custom_switch, self.nautilus_custom_sec_switch):
+            switch.connect("notify::active", lambda *args: self.update_mockup_css())
 
         # 2. Now call the refresh. It will find the colors in self.current_colors
         self.update_mockup_css()
@@ -1097,7 +1173,7 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
 
         
     def check_gnome_refresh_status(self):
-        is_flatpak = os.path.exists('/.flatpak-info')
+        is_flatpak = ENVIRONMENT.sandboxed
         
         if not is_flatpak:
             ready = True
@@ -1118,7 +1194,7 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
 
     def check_plasma_refresh_status(self):
         # 1. DETECT ENVIRONMENT
-        is_flatpak = os.path.exists('/.flatpak-info')
+        is_flatpak = ENVIRONMENT.sandboxed
         
         # 2. DEFINE READINESS
         if not is_flatpak:
@@ -1364,7 +1440,7 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
 
         
         # 1. Check for the Flatpak sandbox marker
-        is_flatpak = os.path.exists('/.flatpak-info')
+        is_flatpak = ENVIRONMENT.sandboxed
 
         if is_flatpak:
             # --- FLATPAK LOGIC: Touch the trigger file ---
@@ -1509,7 +1585,7 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
 
     def on_plasma_refresh_toggled(self, switch, pspec):
         is_active = switch.get_active()
-        is_flatpak = os.path.exists('/.flatpak-info')
+        is_flatpak = ENVIRONMENT.sandboxed
 
         # 1. ONLY perform the 'Installation' check if we are in a Flatpak
         if is_flatpak:
@@ -1533,7 +1609,7 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         
     def on_gnome_refresh_toggled(self, switch, pspec):
         is_active = switch.get_active()
-        is_flatpak = os.path.exists('/.flatpak-info')
+        is_flatpak = ENVIRONMENT.sandboxed
 
         # ONLY perform the 'Installation' check if we are in a Flatpak
         if is_flatpak:
@@ -1556,7 +1632,7 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         if not hasattr(self, 'refresh_switch') or not self.refresh_switch.get_active():
             return
 
-        is_flatpak = os.path.exists('/.flatpak-info')
+        is_flatpak = ENVIRONMENT.sandboxed
 
         if is_flatpak:
             # --- FLATPAK LOGIC: Touch the trigger file ---
@@ -1591,70 +1667,114 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
 
         
     def on_show_contrast_dialog(self, row):
-        p_hex = self.primary_row.get_text()
-        txt_hex = self.text_row.get_text()
-        ratio = self.get_contrast_ratio(p_hex, txt_hex)
+        self.preview_override = {}
+        try:
+            matrix = colors.palette_contrast(self.collect_preview_colors())
+            # Lowest solid text pair, like the row's subtitle
+            ratio = min(value for (fg, surface), value in matrix.items() if fg != "text-light")
+            lowest = f"{ratio:.1f}:1"
+        except ValueError:
+            # A value that is not a color yet ("$primary", a half-typed hex)
+            ratio = None
+            lowest = "-- (some colors are not plain color values)"
 
         # Create a MessageDialog
         dialog = Adw.MessageDialog(
             transient_for=self,
             heading="Accessibility Details",
-            body=f"Current Ratio: {ratio:.1f}:1\n\nWCAG standards recommend at least 4.5:1 for readable text. Poor contrast can make your theme difficult to use."
+            body=f"Lowest Ratio: {lowest}\n\nWCAG standards recommend at least 4.5:1 for readable text (7:1 for enhanced contrast). Poor contrast can make your theme difficult to use.\n\nAuto-Fix only changes the lightness of the text colors, keeping their hue."
         )
         
         dialog.add_response("cancel", "Close")
         
-        # Only add the "Fix" button if the contrast is actually bad
-        if ratio < 4.5:
+        # Only add the "Fix" buttons if the contrast can be improved
+        if ratio is not None and ratio < colors.AAA:
+            dialog.add_response("fix-aaa", "Fix for 7:1")
+        if ratio is not None and ratio < colors.AA:
             dialog.add_response("fix", "Auto-Fix Contrast")
             dialog.set_response_appearance("fix", Adw.ResponseAppearance.SUGGESTED)
 
         def on_response(d, response):
             if response == "fix":
                 self.on_fix_contrast_clicked(None)
+            elif response == "fix-aaa":
+                self.on_fix_contrast_clicked(None, colors.AAA)
             d.destroy()
 
         dialog.connect("response", on_response)
         dialog.present()
         
         
+    # --- VARIANT GRID ---
+    # The magic button opens a grid of secondary/tertiary candidates built in
+    # OKLCH (colors.variants). Every strip is a drawing area that paints the
+    # current candidate, so following the primary while typing is one cached
+    # batch plus a redraw, no widgets or CSS are rebuilt.
+    VARIANT_COLUMNS = 3
+
     def on_generate_variants_clicked(self, button):
-        primary_hex = self.primary_row.get_text().strip()
-        rgba = Gdk.RGBA()
-        
-        if not rgba.parse(primary_hex):
+        if self.variant_popover is None:
+            self.variant_popover = self.build_variant_popover()
+        # Unparented again when it closes (see build_variant_popover)
+        if self.variant_popover.get_parent() is None:
+            self.variant_popover.set_parent(button)
+
+        self.refresh_variant_grid()
+        self.variant_popover.popup()
+
+    def build_variant_popover(self):
+        """The popover with one clickable swatch strip per candidate."""
+        flowbox = Gtk.FlowBox()
+        flowbox.set_selection_mode(Gtk.SelectionMode.NONE)
+        flowbox.set_max_children_per_line(self.VARIANT_COLUMNS)
+        flowbox.set_min_children_per_line(self.VARIANT_COLUMNS)
+        flowbox.set_homogeneous(True)
+
+        self.variant_strips = []
+        for index in range(len(colors.variants("#246cc5"))):
+            strip = Gtk.DrawingArea(content_width=96, content_height=24)
+            strip.set_draw_func(self.draw_variant_strip, index)
+            button = Gtk.Button(child=strip, css_classes=["flat"])
+            button.connect("clicked", self.on_variant_chosen, index)
+            flowbox.append(button)
+            self.variant_strips.append(button)
+
+        scroller = Gtk.ScrolledWindow(child=flowbox, propagate_natural_width=True)
+        scroller.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scroller.set_max_content_height(360)
+        scroller.set_propagate_natural_height(True)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        box.append(Gtk.Label(label="Pick Secondary & Accent", css_classes=["heading"]))
+        box.append(scroller)
+
+        popover = Gtk.Popover(child=box)
+        popover.connect("closed", lambda p: p.unparent())
+        return popover
+
+    def refresh_variant_grid(self):
+        """Recomputes the candidates for the primary in the entry and repaints the strips."""
+        primary = colors.parse(self.primary_row.get_text())
+        if primary is None:
             return
+        self.variant_primary = colors.to_hex(primary)
+        self.variant_candidates = colors.variants(primary)
+        for button, (description, secondary, tertiary) in zip(self.variant_strips, self.variant_candidates):
+            button.set_tooltip_text(f"{description}\n{secondary} / {tertiary}")
+            button.get_child().queue_draw()
+
+    def draw_variant_strip(self, area, cr, width, height, index):
+        """Paints primary | secondary | tertiary side by side."""
+        if index >= len(self.variant_candidates):
+            return
+        _, secondary, tertiary = self.variant_candidates[index]
+        paint_swatches(cr, width, height, [colors.parse(c) for c in (self.variant_primary, secondary, tertiary)])
 
-        # Calculate Perceived Brightness (Luminance)
-        # Range is 0.0 (Black) to 1.0 (White)
-        brightness = (rgba.red * 0.299) + (rgba.green * 0.587) + (rgba.blue * 0.114)
-        
-        # Determine Offset (Lighter if dark, Darker if light)
-        # If brightness < 0.5, we want to lighten for variants
-        offset = 0.15 if brightness < 0.5 else -0.15
-        
-        def adjust_color(color, amount):
-            # Create a new RGBA, clamped between 0 and 1
-            new_rgba = Gdk.RGBA()
-            new_rgba.red = max(0, min(1, color.red + amount))
-            new_rgba.green = max(0, min(1, color.green + amount))
-            new_rgba.blue = max(0, min(1, color.blue + amount))
-            new_rgba.alpha = 1.0
-            
-            # Convert back to HEX
-            return "#{:02x}{:02x}{:02x}".format(
-                int(new_rgba.red * 255), 
-                int(new_rgba.green * 255), 
-                int(new_rgba.blue * 255)
-            )
-
-        #  Apply to Secondary and Tertiary rows
-        # Secondary is slightly shifted, Tertiary is shifted more
-        secondary_hex = adjust_color(rgba, offset)
-        tertiary_hex = adjust_color(rgba, offset * 2)
-        
-        self.secondary_row.set_text(secondary_hex)
-        self.tertiary_row.set_text(tertiary_hex)
+    def on_variant_chosen(self, button, index):
+        _, secondary, tertiary = self.variant_candidates[index]
+        self.secondary_row.set_text(secondary)
+        self.tertiary_row.set_text(tertiary)
+        self.variant_popover.popdown()
         
         # Trigger UI sync
         self.update_mockup_css()
@@ -1687,23 +1807,6 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         dialog.destroy()
         
         
-    def get_contrast_ratio(self, hex1, hex2):
-        def get_luminance(hex_code):
-            rgba = Gdk.RGBA()
-            rgba.parse(hex_code)
-            # Formula for relative luminance
-            def adjust(c):
-                return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
-            r, g, b = adjust(rgba.red), adjust(rgba.green), adjust(rgba.blue)
-            return 0.2126 * r + 0.7152 * g + 0.0722 * b
-
-        l1 = get_luminance(hex1)
-        l2 = get_luminance(hex2)
-        
-        # Calculate ratio (L_bright + 0.05) / (L_dark + 0.05)
-        return (max(l1, l2) + 0.05) / (min(l1, l2) + 0.05)
-        
-        
     def load_persistent_settings(self):
         config_path = os.path.expanduser("~/.var/app/io.github.schwarzen.colormydesktop/config/color-my-desktop/settings.json")
         if os.path.exists(config_path):
@@ -1725,131 +1828,197 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         
 
 
-    def update_mockup_css(self):
-        print("DEBUG: update_mockup_css triggered!")
-        # --- SAFETY CHECK 1: Ensure UI is built ---
-        # If the contrast row or color entries aren't ready, exit early to prevent crash
-        if not hasattr(self, 'contrast_info_row') or not hasattr(self, 'color_entries'):
-            return
-
-        # 1. Gather current hex codes safely
-        # Use .strip() and fall back to a safe color if empty to prevent CSS syntax errors
-        def get_safe_hex(row_attr, fallback="#ffffff"):
-            row = getattr(self, row_attr, None)
-            if row:
-                val = row.get_text().strip()
-                return val if val else fallback
-            return fallback
-
-        p = get_safe_hex("primary_row", "#246cc5")
-        s = get_safe_hex("secondary_row", "#1a4d8c")
-        t = get_safe_hex("tertiary_row", "#102f54")
-        txt = get_safe_hex("text_row", "#ffffff")
-        rgba_p = Gdk.RGBA()
-        rgba_p.parse(p)
-        
-                #  CALCULATE LUMINANCE (0.0 to 1.0)
-        luminance = (rgba_p.red * 0.299) + (rgba_p.green * 0.587) + (rgba_p.blue * 0.114)
-
-        #  Define a "Floor" color (The darkest the background can ever be)
-        # Deep Charcoal with a hint of blue/grey (standard for Pro apps)
-        floor_r, floor_g, floor_b = 24, 26, 30 
-
-        #  Dynamic Factor based on Luminance
-        if luminance > 0.4:
-            # For bright colors: We want a 15% tint of the primary color over the floor
-            mix = 0.15
-        else:
-            # For dark colors: We want a 30% "glow" of the primary color
-            mix = 0.30
-
-        #  LERP Calculation: (Primary * mix) + (Floor * (1 - mix))
-        bg_r = int((rgba_p.red * 255 * mix) + (floor_r * (1 - mix)))
-        bg_g = int((rgba_p.green * 255 * mix) + (floor_g * (1 - mix)))
-        bg_b = int((rgba_p.blue * 255 * mix) + (floor_b * (1 - mix)))
-
-        bg_color = "#{:02x}{:02x}{:02x}".format(
-            max(0, min(255, bg_r)), 
-            max(0, min(255, bg_g)), 
-            max(0, min(255, bg_b))
-        )
-
-        
-        # --- CONTRAST CHECK ---
-        try:
-            # Only run if we have a contrast ratio helper
-            if hasattr(self, 'get_contrast_ratio'):
-                ratio = self.get_contrast_ratio(p, txt)
-                
-                if ratio >= 4.5:
-                    status = "✅ Perfect"
-                    self.contrast_info_row.remove_css_class("error")
-                else:
-                    status = "⚠️ Poor Contrast"
-                    self.contrast_info_row.add_css_class("error")
-                    
-                self.contrast_info_row.set_subtitle(f"Contrast: {ratio:.1f}:1 — {status}")
-        except Exception:
-            self.contrast_info_row.set_subtitle("Contrast: --")
-        
-
-        #  Build the CSS String
-        combined_css = f"""
-        .color-preview-dot {{
+    # --- PREVIEW SCHEDULER ---
+    # Color edits only mark the preview dirty. The CSS is applied at most once
+    # per frame from the frame clock, and only the colors that changed since
+    # the last frame are reloaded: the layout and hover rules live in a static
+    # provider loaded once, and every color dot and the mockup palette have a
+    # tiny provider of their own.
+    PREVIEW_STATIC_CSS = """
+        .color-preview-dot {
             border-radius: 6px;
             border: 1px solid rgba(0,0,0,0.3);
             transition: all 0.2s ease-in-out;
             min-width: 26px;
             min-height: 26px;
-        }}
+        }
 
-        .preview-dropper-icon {{
+        .preview-dropper-icon {
             transition: opacity 0.2s ease;
             opacity: 0.5;
-        }}
+        }
 
         /* --- 2. ROW-LEVEL TRIGGERS --- */
         /* Trigger when the whole row is hovered OR when typing inside it */
         row:hover .color-preview-dot,
-        row:focus-within .color-preview-dot {{
+        row:focus-within .color-preview-dot {
             transform: scale(1.18);
             box-shadow: 0 0 12px rgba(255,255,255,0.25);
             border-color: rgba(255,255,255,0.6);
-        }}
+        }
 
         row:hover .preview-dropper-icon,
-        row:focus-within .preview-dropper-icon {{
+        row:focus-within .preview-dropper-icon {
             opacity: 1.0;
-        }}
+        }
 
         /* Active click effect remains on the container for tactile feel */
-        .color-preview-container:active .color-preview-dot {{
+        .color-preview-container:active .color-preview-dot {
             transform: scale(0.92);
             transition: transform 0.05s;
-        }}
+        }
+
+        #mockup-preview-image {
+            margin-top: -80px;
+            margin-bottom: -60px;
+            padding: 0px;
+        }
+
+        #mockup-wrapper {
+            border-radius: 12px;
+            /* 3. Reduce padding to 0 or very small (e.g. 4px) to let the image hit the edges */
+            padding: 0px; 
+            min-height: 10px;
+        }
+
+        /* Contrast heatmap: one cell per text color x surface, tinted by WCAG grade */
+        #contrast-heatmap {
+            margin-top: 12px;
+        }
+
+        .contrast-cell {
+            border-radius: 4px;
+            padding: 2px 4px;
+            font-size: 0.8em;
+            font-feature-settings: "tnum";
+        }
+
+        .contrast-cell.aaa { background-color: alpha(@success_color, 0.35); }
+        .contrast-cell.aa { background-color: alpha(@success_color, 0.18); }
+        .contrast-cell.large { background-color: alpha(@warning_color, 0.3); }
+        .contrast-cell.fail { background-color: alpha(@error_color, 0.35); }
         """
 
-        #  Dynamic loop for Dots and Icons
-        if hasattr(self, 'current_colors'):
-            for cid, hcolor in self.current_colors.items():
-                # Apply background to the dot
-                combined_css += f"#{cid}-preview {{ background-color: {hcolor}; }}\n"
-                
-                # Apply contrast color to the icon ID
-                if hasattr(self, 'icon_colors') and cid in self.icon_colors:
-                    icolor = self.icon_colors[cid]
-                    combined_css += f"#{cid}-icon {{ color: {icolor}; }}\n"
+    def update_mockup_css(self):
+        """Schedules a preview refresh for the next frame. Cheap, call it as often as needed."""
+        if self.preview_tick_id is None:
+            self.preview_tick_id = self.add_tick_callback(self.on_preview_tick)
+
+    def on_preview_tick(self, widget, frame_clock):
+        self.preview_tick_id = None
+        self.apply_preview_update()
+        return GLib.SOURCE_REMOVE
+
+    def collect_preview_colors(self):
+        """Colors the preview shows right now: the mockup roles plus one per color dot."""
+        shown = {}
+        # Half-typed values keep the last good color instead of breaking the
+        # CSS; good ones are stored as #rrggbb, the CSS appends alpha to them
+        for role, fallback in (("primary", "#246cc5"), ("secondary", "#1a4d8c"),
+                               ("tertiary", "#102f54"), ("text", "#ffffff")):
+            row = getattr(self, f"{role}_row", None)
+            rgb = colors.parse(row.get_text()) if row else None
+            shown[role] = colors.to_hex(rgb) if rgb else self.preview_applied.get(role, fallback)
+
+        # What the theme uses for the optional variables: the custom color
+        # while its switch is on, the fallback role otherwise
+        for name, switch, entry in (("topbar-color", "topbar_switch", "topbar_row"),
+                                    ("clock-color", "clock_switch", "clock_row"),
+                                    ("nautilus-main", "nautilus_custom_switch", "nautilus_custom_entry"),
+                                    ("nautilus-secondary", "nautilus_custom_sec_switch", "nautilus_custom_naut_row_sec")):
+            switch, entry = getattr(self, switch, None), getattr(self, entry, None)
+            rgb = colors.parse(entry.get_text()) if switch and entry and switch.get_active() else None
+            shown[name] = colors.to_hex(rgb) if rgb else shown[colors.FALLBACKS[name]]
+
+        for cid, hcolor in self.current_colors.items():
+            shown[f"dot:{cid}"] = hcolor
+
+        # A previewed contrast fix replaces the roles and their color dots
+        for role, hcolor in self.preview_override.items():
+            shown[role] = hcolor
+            if f"dot:{role}" in shown:
+                shown[f"dot:{role}"] = hcolor
+        return shown
+
+    def apply_preview_update(self):
+        """Rebuilds the preview CSS for the colors that changed and loads it once."""
+        # The contrast row and the color entries are built late in __init__
+        if not hasattr(self, 'contrast_info_row'):
+            return
+
+        shown = self.collect_preview_colors()
+        changed = {key for key, value in shown.items() if self.preview_applied.get(key) != value}
+        removed = set(self.preview_applied) - set(shown)
+        if not changed and not removed:
+            return
+        self.preview_applied = shown
+
+        for key in removed:
+            if key.startswith("dot:"):
+                self.preview_provider(key).load_from_string("")
+
+        # The open variant grid follows the primary as it is typed
+        if "primary" in changed and self.variant_popover and self.variant_popover.get_visible():
+            self.refresh_variant_grid()
+
+        for key in changed:
+            if key.startswith("dot:"):
+                self.preview_provider(key).load_from_string(self.build_dot_css(key[4:], shown[key]))
+
+        mockup_roles = {"primary", "secondary", "tertiary", "text"}
+        if changed & mockup_roles:
+            self.preview_provider("mockup").load_from_string(self.build_mockup_css(
+                shown["primary"], shown["secondary"], shown["tertiary"], shown["text"]))
+        if changed & (set(colors.SURFACES) | set(colors.FOREGROUNDS)):
+            self.update_contrast_matrix(shown)
+
+    def preview_provider(self, key):
+        """The CSS provider of one preview color ("dot:<id>" or "mockup"), created on first use."""
+        provider = self.preview_providers.get(key)
+        if provider is None:
+            provider = Gtk.CssProvider()
+            Gtk.StyleContext.add_provider_for_display(
+                Gdk.Display.get_default(), provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+            )
+            self.preview_providers[key] = provider
+        return provider
+
+    def build_dot_css(self, cid, hcolor):
+        """The color dot of one entry, with an icon that stays readable on it."""
+        css = f"#{cid}-preview {{ background-color: {hcolor}; }}\n"
+
+        rgb = colors.parse(hcolor)
+        if rgb is not None:
+            brightness = colors.brightness(rgb)
+            # If brightness > 0.6, the background is light, so use a dark icon
+            icon_color = "rgba(0,0,0,0.7)" if brightness > 0.6 else "rgba(255,255,255,0.8)"
+            css += f"#{cid}-icon {{ color: {icon_color}; }}\n"
+        return css
+
+    def build_mockup_css(self, p, s, t, txt):
+        """The mockup image, its backdrop and the preview header/sidebar."""
+        rgb_p = colors.parse(p) or (0, 0, 0)
 
-        #  Add the Mockup Palette
-        combined_css += f"""
+        #  Define a "Floor" color (The darkest the background can ever be)
+        # Deep Charcoal with a hint of blue/grey (standard for Pro apps)
+        floor = (24, 26, 30)
+
+        #  Dynamic Factor based on perceived brightness (0.0 to 1.0)
+        if colors.brightness(rgb_p) > 0.4:
+            # For bright colors: We want a 15% tint of the primary color over the floor
+            mix = 0.15
+        else:
+            # For dark colors: We want a 30% "glow" of the primary color
+            mix = 0.30
+
+        #  LERP Calculation: (Primary * mix) + (Floor * (1 - mix))
+        bg_color = colors.to_hex(colors.mix(rgb_p, floor, mix))
+
+        # Layout lives in PREVIEW_STATIC_CSS, only the colors are reloaded
+        return f"""
         #mockup-preview-image {{
             -gtk-icon-palette: success {p}, warning {s}, info {t}, error {txt};
             color: {t};
-
-            margin-top: -80px;
-            margin-bottom: -60px;
-            padding: 0px;
-            
             /* 2. Remove the negative transform/margin if it's cutting off the edges */
             /* Instead of transform, we use object-fit or centered layout */
             filter: drop-shadow(0 0 1.5px {p}88) 
@@ -1857,33 +2026,93 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         }}
 
         #mockup-wrapper {{
-            border-radius: 12px;
             background: linear-gradient(165deg, {bg_color} 0%, #080808 100%);
-            
-            /* 3. Reduce padding to 0 or very small (e.g. 4px) to let the image hit the edges */
-            padding: 0px; 
-            min-height: 10px;
-            
-             
         }}
+
+        #mock-headerbar {{ background-color: {p}; }}
+        #mock-sidebar {{ background-color: {s}; }}
         """
-        
-        if hasattr(self, 'dynamic_color_provider'):
-            self.dynamic_color_provider.load_from_string(combined_css)
-        
-    def on_fix_contrast_clicked(self, button):
-        p_hex = self.primary_row.get_text()
-        rgba = Gdk.RGBA()
-        if not rgba.parse(p_hex): return
 
-        # Calculate primary luminance
-        def get_lum(c):
-            return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
-        lum = 0.2126 * get_lum(rgba.red) + 0.7152 * get_lum(rgba.green) + 0.0722 * get_lum(rgba.blue)
+    # Heatmap labels, in the order of colors.FOREGROUNDS / colors.SURFACES
+    CONTRAST_LABELS = {
+        "text": "Text", "text-light": "Text Light", "clock-color": "Clock",
+        "primary": "Prim", "secondary": "Sec", "tertiary": "Tert",
+        "topbar-color": "Topbar", "nautilus-main": "Files", "nautilus-secondary": "Files 2",
+    }
+
+    def build_contrast_heatmap(self):
+        """A grid of contrast ratios: one row per text color, one column per surface."""
+        grid = Gtk.Grid(column_spacing=3, row_spacing=3, column_homogeneous=True)
+        grid.set_name("contrast-heatmap")
+        self.contrast_cells = {}
+
+        for col, surface in enumerate(colors.SURFACES, start=1):
+            grid.attach(Gtk.Label(label=self.CONTRAST_LABELS[surface], css_classes=["caption-heading"]), col, 0, 1, 1)
+
+        for row, fg in enumerate(colors.FOREGROUNDS, start=1):
+            grid.attach(Gtk.Label(label=self.CONTRAST_LABELS[fg], xalign=0, css_classes=["caption"]), 0, row, 1, 1)
+            for col, surface in enumerate(colors.SURFACES, start=1):
+                cell = Gtk.Label(label="--", css_classes=["contrast-cell"])
+                grid.attach(cell, col, row, 1, 1)
+                self.contrast_cells[(fg, surface)] = cell
+        return grid
+
+    def update_contrast_matrix(self, shown):
+        """Refreshes the heatmap and sums up its worst pair on the contrast row."""
+        try:
+            matrix = colors.palette_contrast(shown)
+        except ValueError:
+            self.contrast_info_row.set_subtitle("Contrast: --")
+            return
+
+        for (fg, surface), value in matrix.items():
+            cell = self.contrast_cells[(fg, surface)]
+            cell.set_label(f"{value:.1f}")
+            cell.set_css_classes(["contrast-cell", colors.grade(value)])
+            cell.set_tooltip_text(f"{self.CONTRAST_LABELS[fg]} on {self.CONTRAST_LABELS[surface]}: {value:.2f}:1")
+
+        # text-light is a deliberately faint accent, only the solid text counts for the verdict
+        (fg, surface), worst = min(((key, value) for key, value in matrix.items() if key[0] != "text-light"),
+                                   key=lambda item: item[1])
+        # Keep the button while its preview is on screen, or it would vanish under the pointer
+        self.contrast_fix_btn.set_visible(worst < colors.AA or bool(self.preview_override))
+        if worst >= colors.AA:
+            status = "✅ Perfect"
+            self.contrast_info_row.remove_css_class("error")
+        else:
+            status = f"⚠️ Poor Contrast ({self.CONTRAST_LABELS[fg]} on {self.CONTRAST_LABELS[surface]})"
+            self.contrast_info_row.add_css_class("error")
+        self.contrast_info_row.set_subtitle(f"Lowest contrast: {worst:.1f}:1 — {status}")
+
+    def contrast_fixes(self, target):
+        """Fixed text colors for the current palette: {role: hex}, only the roles that need it."""
+        # Solve on the entries, not on a fix that is being previewed
+        override, self.preview_override = self.preview_override, {}
+        shown = self.collect_preview_colors()
+        self.preview_override = override
+
+        # The clock only has a color of its own with its switch on
+        roles = {role: surfaces for role, surfaces in colors.FIX_SURFACES.items()
+                 if role != "clock-color" or self.clock_switch.get_active()}
+        try:
+            return colors.fix_palette(shown, target, roles)
+        except ValueError:
+            return {}
+
+    def preview_contrast_fix(self, target):
+        """Shows what the auto-fix would do (target ratio), or the real colors again (None)."""
+        self.preview_override = self.contrast_fixes(target) if target else {}
+        self.update_mockup_css()
+
+    def on_fix_contrast_clicked(self, button, target=colors.AA):
+        fixes = self.contrast_fixes(target)
+        self.preview_override = {}
 
-        # If background is dark, use White. If light, use Black.
-        new_text = "#ffffff" if lum < 0.5 else "#000000"
-        self.text_row.set_text(new_text)
+        # Only the lightness moves (OKLCH), so the text keeps its tint
+        if "text" in fixes:
+            self.text_row.set_text(fixes["text"])
+        if "clock-color" in fixes:
+            self.clock_row.set_text(fixes["clock-color"])
         
         # Trigger refresh
         self.update_mockup_css()
@@ -2017,7 +2246,6 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
             target_widget = entry
             
             # Connect live updates
-            entry.connect("changed", lambda *args: self.update_mockup_css())
             entry.connect("changed", lambda e: self.update_preview(e, css_id))
             
             if show_magic:
@@ -2036,7 +2264,6 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
             target_widget = row
             
             # Connect live updates
-            row.connect("notify::text", lambda *args: self.update_mockup_css())
             row.connect("notify::text", lambda r, pspec: self.update_preview(r, css_id))
             
             if show_magic:
@@ -2157,49 +2384,16 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
             # This happens if 'entry' is actually a GParamSpec
             return
         
-        #  Validation
-        rgba = Gdk.RGBA()
-        if rgba.parse(hex_code) or (hex_code.startswith('#') and len(hex_code) in [4, 7, 9]):
-                    # --- NEW: BRIGHTNESS CHECK FOR ICON CONTRAST ---
-            # Standard perceived luminance formula
-            brightness = (rgba.red * 0.299) + (rgba.green * 0.587) + (rgba.blue * 0.114)
-            
-            # If brightness > 0.6, the background is light, so use a dark icon
-            icon_color = "rgba(0,0,0,0.7)" if brightness > 0.6 else "rgba(255,255,255,0.8)"
-            
-            # Store this in your color registry so the CSS builder can see it
-            if not hasattr(self, 'icon_colors'):
-                self.icon_colors = {}
-            self.icon_colors[css_id] = icon_color
-            clean_hex = hex_code if hex_code.startswith('#') else f"#{hex_code}"
+        #  Validation, names and rgb()/hsl() are stored as #rrggbb too
+        rgb = colors.parse(hex_code)
+        if rgb is not None:
+            clean_hex = colors.to_hex(rgb)
             
             if not hasattr(self, 'current_colors'):
                 self.current_colors = {}
             self.current_colors[css_id] = clean_hex
+            # The dot, its icon contrast and the mockup follow on the next frame
             self.update_mockup_css()
-            
-            #  Rebuild the CSS string
-            full_css = ""
-            for cid, hcolor in self.current_colors.items():
-                # Update dots
-                full_css += f"#{cid}-preview {{ background-color: {hcolor}; border-radius: 6px; min-width: 24px; min-height: 24px; }}\n"
-                
-                # Update Mockup logic
-                if cid == "primary":
-                    full_css += f"#mock-headerbar {{ background-color: {hcolor}; }}\n"
-                elif cid == "secondary":
-                    full_css += f"#mock-sidebar {{ background-color: {hcolor}; }}\n"
-
-            # Apply CSS
-            if hasattr(self, 'dynamic_color_provider'):
-                self.dynamic_color_provider.load_from_string(full_css)
-
-            # --- DYNAMIC CONTRAST LOGIC ---
-            # Now we use the dictionaries created in create_color_entry
-            if hasattr(self, "status_labels") and css_id in self.status_labels:
-                label = self.status_labels[css_id]
-                # You can add your contrast checking logic here
-                # label.set_markup("<span foreground='green'>✔ Pass</span>")
 
         
     def on_advanced_picker_clicked(self, gesture, n_press, x, y, entry_row):
@@ -2281,26 +2475,20 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
             display, self.preview_css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
         )
 
-        self.dynamic_color_provider = Gtk.CssProvider()
+        # Hover, transition and layout rules of the preview never change: parse them once.
+        # The colors get small providers of their own (preview_provider)
+        self.static_css_provider = Gtk.CssProvider()
+        self.static_css_provider.load_from_string(self.PREVIEW_STATIC_CSS)
         Gtk.StyleContext.add_provider_for_display(
-            display, self.dynamic_color_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
+            display, self.static_css_provider, Gtk.STYLE_PROVIDER_PRIORITY_APPLICATION
         )
-        
-
-        # Update the loading logic to use 'self.'
-        initial_css = "/* your initial css */"
-        self.dynamic_color_provider.load_from_string(initial_css) # Added self.
 
 
 
         # --- DATA EXTRACTION LOGIC ---
     def get_scss_value(self, filename, variable):
-        path = os.path.join(SCSS_DIR, f"_{filename}.scss")
-        if not os.path.exists(path): return ""
-        with open(path, 'r') as f:
-            content = f.read()
-            match = re.search(fr"\${variable}:\s*([^;]+);", content)
-            return match.group(1).strip() if match else ""
+        profile = self.profile_index.get(filename)
+        return profile.get(variable) if profile else ""
 
     
     def on_theme_select(self, combo_row, gparamspec):
@@ -2341,76 +2529,68 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         if not selected_theme:
             return
 
-        #  Construct the path INSIDE the function
-        # Use  defined SCSS_DIR variable or the absolute path
-        partial_path = os.path.join(SCSS_DIR, f"_{selected_theme}.scss")
+        # Parsed once by the profile index, re-read only if the file changed
+        profile = self.profile_index.get(selected_theme)
         
-        print(f"Loading {selected_theme} from {partial_path}...")
+        print(f"Loading {selected_theme} from {self.profile_index.path(selected_theme)}...")
         
-        if os.path.exists(partial_path):
-            with open(partial_path, "r") as f:
-                content = f.read()
-
-                #  Helper to extract and sync advanced rows
-                def sync_advanced_feature(css_id, var_name):
-                    import re
-               
-                    pattern = rf"\${re.escape(var_name)}:\s*(#[0-9a-fA-F]{{3,6}})"
-                    match = re.search(pattern, content)
+        if profile:
+            #  Helper to extract and sync advanced rows
+            def sync_advanced_feature(css_id, var_name):
+                match = re.match(r"#[0-9a-fA-F]{3,6}", profile.get(var_name))
+                
+                sw = getattr(self, f"{css_id}_switch", None)
+                en = getattr(self, f"{css_id}_entry", None)
+                
+                if match and sw and en:
+                    hex_val = match.group(0).lower()
+                    primary_hex = self.primary_row.get_text().lower()
                     
-                    sw = getattr(self, f"{css_id}_switch", None)
-                    en = getattr(self, f"{css_id}_entry", None)
+                    # Update the text entry
+                    en.set_text(hex_val)
                     
-                    if match and sw and en:
-                        hex_val = match.group(1).lower()
-                        primary_hex = self.primary_row.get_text().lower()
-                        
-                        # Update the text entry
-                        en.set_text(hex_val)
-                        
-              
-                        if hex_val != primary_hex:
-                            sw.set_active(True)
-                        else:
-                            sw.set_active(False)
-                    elif sw:
-                     
+          
+                    if hex_val != primary_hex:
+                        sw.set_active(True)
+                    else:
                         sw.set_active(False)
+                elif sw:
+                 
+                    sw.set_active(False)
 
-                #  TRIGGER SYNC 
-                sync_advanced_feature("nautilus_custom", "nautilus-main")
-                sync_advanced_feature("nautilus_custom_sec", "nautilus-secondary")
+            #  TRIGGER SYNC 
+            sync_advanced_feature("nautilus_custom", "nautilus-main")
+            sync_advanced_feature("nautilus_custom_sec", "nautilus-secondary")
           
 
             #  Update the Name field
             self.name_row.set_text(selected_theme)
             
             # Update EACH color row specifically
-            # Using existing get_scss_value logic
-            self.primary_row.set_text(self.get_scss_value(selected_theme, "primary"))
-            self.secondary_row.set_text(self.get_scss_value(selected_theme, "secondary"))
-            self.tertiary_row.set_text(self.get_scss_value(selected_theme, "tertiary"))
-            self.text_row.set_text(self.get_scss_value(selected_theme, "text"))
+            self.primary_row.set_text(profile.get("primary"))
+            self.secondary_row.set_text(profile.get("secondary"))
+            self.tertiary_row.set_text(profile.get("tertiary"))
+            self.text_row.set_text(profile.get("text"))
             
 
             
 
             
-            tb_val = self.get_scss_value(selected_theme, "topbar-color")
+            tb_val = profile.get("topbar-color")
             if tb_val:
                 self.topbar_row.set_text(tb_val)
                 self.topbar_switch.set_active(True)
             else:
                 # If the file doesn't have it, reset to a safe default but don't clear it!
-                self.topbar_row.set_text(self.get_scss_value(selected_theme, "primary")) 
+                self.topbar_row.set_text(profile.get("primary")) 
                 self.topbar_switch.set_active(False)
-            clock_val = self.get_scss_value(selected_theme, "clock-color")
+            clock_val = profile.get("clock-color")
             if clock_val:
                 self.clock_row.set_text(clock_val)
                 self.clock_switch.set_active(True)
             else:
                 # If the file doesn't have it, reset to a safe default but don't clear it!
-                self.clock_row.set_text(self.get_scss_value(selected_theme, "text")) 
+                self.clock_row.set_text(profile.get("text")) 
                 self.clock_switch.set_active(False)
                 
             self.update_mockup_css()
@@ -2422,8 +2602,8 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         # --- RUN BASH SCRIPT ---
     def on_configure_clicked(self, button):
     
-        self.active_build_button = button 
-        self.active_build_button.set_sensitive(False)
+        self.config_button = button 
+        self.config_button.set_sensitive(False)
         
   
         
@@ -2437,70 +2617,238 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
             self.text_row.get_text(),
         ]
         
-        # Use your existing threading logic
-        thread = threading.Thread(target=self.execute_build, args=(args,))
-        thread.daemon = True
-        thread.start()
+        self.execute_build(args, self.config_controller)
         
         button.set_sensitive(False)
         
+    # --- PROFILE LIST ---
+    # self.themes mirrors self.theme_list ("Default" first, then the profiles
+    # sorted), so a profile is placed with a bisect and the model only sees
+    # one-item splices. A directory monitor on SCSS_DIR feeds the same path
+    # as the GUI's own saves and deletes.
+    def setup_profile_monitor(self):
+        self.profile_monitor = None
+        if not os.path.isdir(SCSS_DIR):
+            return
+        try:
+            self.profile_monitor = Gio.File.new_for_path(SCSS_DIR).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error as e:
+            print(f"Profile folder is not monitored: {e.message}")
+            return
+        self.profile_monitor.connect("changed", self.on_profile_dir_changed)
+
+    def on_profile_dir_changed(self, monitor, file, other_file, event):
+        Event = Gio.FileMonitorEvent
+        # Renames inside the folder report the old and the new name
+        if event in (Event.DELETED, Event.MOVED_OUT, Event.RENAMED):
+            name = profile_name(file.get_basename())
+            if name and self.profile_index.get(name) is None:
+                self.remove_profile_item(name)
+
+        # CHANGES_DONE_HINT follows both new and rewritten files
+        if event in (Event.CHANGES_DONE_HINT, Event.MOVED_IN, Event.RENAMED):
+            name = profile_name((other_file if event == Event.RENAMED else file).get_basename())
+            if name and self.profile_index.load(name):
+                self.insert_profile_item(name)
+                self.refresh_thumbnail(name)
+
+    def insert_profile_item(self, name):
+        """Adds one profile to the list at its sorted place (no-op if it is listed)."""
+        if name == "Default":
+            return
+        index = bisect.bisect_left(self.themes, name, 1)
+        if index < len(self.themes) and self.themes[index] == name:
+            return
+        self.themes.insert(index, name)
+        self.theme_list.splice(index, 0, [name])
+
+    def remove_profile_item(self, name):
+        """Drops one profile from the list (no-op if it is not listed)."""
+        index = bisect.bisect_left(self.themes, name, 1)
+        if index < len(self.themes) and self.themes[index] == name:
+            del self.themes[index]
+            self.theme_list.splice(index, 1, [])
+        # Its rows get unbound, but a deleted profile must not be redrawn
+        self.thumbnails.forget(name)
+        for picture in [picture for picture, shown in self.thumbnail_rows.items() if shown == name]:
+            del self.thumbnail_rows[picture]
+
     def refresh_theme_list(self):
-        """Rescans SCSS_DIR, updates the model, and selects the new profile."""
+        """Syncs the model with SCSS_DIR, and selects the new profile."""
         if not os.path.exists(SCSS_DIR):
             return
 
         # 1. Capture the name the user just saved so we can select it later
         newly_saved_name = self.name_row.get_text()
 
-        #  Collect only the custom themes from the directory
-        custom_themes = []
-        for f in os.listdir(SCSS_DIR):
-            if f.startswith("_") and f.endswith(".scss"):
-                name = f[1:-5]  # Strip '_' and '.scss'
-                if name != "Default":
-                    custom_themes.append(name)
-        
-        #  Sort ONLY the custom themes alphabetically
-        custom_themes.sort()
-
-        #  Create the final list with "Default" locked at index 0
-        final_list = ["Default"] + custom_themes
-
-        #  Update the Gtk.StringList model
-        current_count = self.theme_list.get_n_items()
-        self.theme_list.splice(0, current_count, final_list)
+        #  The index reports what changed, the model only gets those items
+        #  (the monitor may have added them already)
+        added, changed, removed = self.profile_index.refresh()
+        for name in removed:
+            self.remove_profile_item(name)
+        for name in added | changed:
+            self.insert_profile_item(name)
+        for name in changed:
+            self.refresh_thumbnail(name)
 
         #  AUTO-SELECT: Find the index of the newly created profile
-        # We loop through the new list to find the match
-        for index, theme_name in enumerate(final_list):
-            if theme_name == newly_saved_name:
-                self.combo_row.set_selected(index)
-                break
+        index = bisect.bisect_left(self.themes, newly_saved_name, 1)
+        if index < len(self.themes) and self.themes[index] == newly_saved_name:
+            self.combo_row.set_selected(index)
                 
         print(f"Refreshed dropdown. Selected: {newly_saved_name}")
 
 
         
+    # --- PROFILE BROWSER ---
+    # A ListView over the same theme_list the combo row uses, through a
+    # FilterListModel (incremental, so typing never blocks on 10k names) and
+    # a SortListModel. Rows are recycled by the factory: binding one sets a
+    # label and a cached thumbnail texture (colormydesktop/thumbnails.py),
+    # keyed on the profile's colors. Missing thumbnails are resolved (the
+    # partial parsed) and rendered on the cache's worker thread and filled
+    # in when ready; until then the row shows a blank strip.
+    SWATCH_ROLES = ("primary", "secondary", "tertiary", "text")
+    DEFAULT_SWATCHES = ("#246cc5", "#241f31", "#1e1e1e", "#f9f9f9")
+
+    def on_browse_profiles_clicked(self, button):
+        if self.profile_browser is None:
+            self.profile_browser = self.build_profile_browser()
+            self.profile_browser.set_parent(button)
+        self.profile_browser.popup()
+        self.profile_search.grab_focus()
+
+    def build_profile_browser(self):
+        """The popover with the search entry and the profile list."""
+        expression = Gtk.PropertyExpression.new(Gtk.StringObject, None, "string")
+
+        self.profile_filter = Gtk.StringFilter.new(expression)
+        self.profile_filter.set_ignore_case(True)
+        self.profile_filter.set_match_mode(Gtk.StringFilterMatchMode.SUBSTRING)
+        filtered = Gtk.FilterListModel.new(self.theme_list, self.profile_filter)
+        filtered.set_incremental(True)
+
+        sorter = Gtk.StringSorter.new(expression)
+        sorter.set_ignore_case(True)
+        sorted_model = Gtk.SortListModel.new(filtered, sorter)
+
+        factory = Gtk.SignalListItemFactory()
+        factory.connect("setup", self.on_browser_row_setup)
+        factory.connect("bind", self.on_browser_row_bind)
+        factory.connect("unbind", self.on_browser_row_unbind)
+
+        list_view = Gtk.ListView.new(Gtk.NoSelection.new(sorted_model), factory)
+        list_view.set_single_click_activate(True)
+        list_view.connect("activate", self.on_browser_row_activated)
+
+        scroller = Gtk.ScrolledWindow(child=list_view, vexpand=True)
+        scroller.set_policy(Gtk.PolicyType.NEVER, Gtk.PolicyType.AUTOMATIC)
+        scroller.set_size_request(320, 420)
+
+        self.profile_search = Gtk.SearchEntry(placeholder_text="Search profiles")
+        self.profile_search.connect("search-changed",
+                                    lambda entry: self.profile_filter.set_search(entry.get_text()))
+        self.profile_search.connect("activate", lambda entry: self.on_browser_row_activated(list_view, 0))
+
+        count = Gtk.Label(css_classes=["caption", "dim-label"], xalign=0)
+        def update_count(model, *args):
+            count.set_label(f"{model.get_n_items()} profiles")
+        filtered.connect("items-changed", update_count)
+        update_count(filtered)
+
+        box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=6)
+        box.append(self.profile_search)
+        box.append(scroller)
+        box.append(count)
+        return Gtk.Popover(child=box)
+
+    def on_browser_row_setup(self, factory, list_item):
+        box = Gtk.Box(orientation=Gtk.Orientation.HORIZONTAL, spacing=10)
+        box.set_margin_top(4); box.set_margin_bottom(4)
+        picture = Gtk.Picture(content_fit=Gtk.ContentFit.FILL, can_shrink=True)
+        picture.set_size_request(64, 18)
+        box.append(picture)
+        box.append(Gtk.Label(xalign=0, hexpand=True, ellipsize=Pango.EllipsizeMode.END))
+        list_item.set_child(box)
+
+    def on_browser_row_bind(self, factory, list_item):
+        name = list_item.get_item().get_string()
+        picture = list_item.get_child().get_first_child()
+        picture.get_next_sibling().set_label(name)
+
+        # Scrolling only swaps cached textures. A miss stays blank while the
+        # worker reads the profile and loads or renders its strip
+        self.thumbnail_rows[picture] = name
+        texture = self.thumbnails.lookup(name)
+        picture.set_paintable(texture)
+        if texture is None:
+            self.thumbnails.request(name)
+
+    def on_browser_row_unbind(self, factory, list_item):
+        # Recycled or dropped rows stop receiving thumbnails
+        picture = list_item.get_child().get_first_child()
+        self.thumbnail_rows.pop(picture, None)
+        picture.set_paintable(None)
+
+    def on_thumbnail_ready(self, name, key, texture):
+        self.thumbnails.remember(name, key, texture)
+        # The row may have been recycled for another profile meanwhile
+        for picture, wanted in self.thumbnail_rows.items():
+            if wanted == name:
+                picture.set_paintable(texture)
+        return False
+
+    def refresh_thumbnail(self, name):
+        """Re-reads a changed profile's colors, redrawing its row if it is on screen."""
+        self.thumbnails.forget(name)
+        if name in self.thumbnail_rows.values():
+            self.thumbnails.request(name)
+
+    def profile_swatches(self, name):
+        """The (r, g, b) colors of a profile's swatch strip, unparsable values left out.
+
+        Runs on the thumbnail worker.
+        """
+        # Parsed the first time its row is shown, re-read once its file changes
+        profile = self.profile_index.get(name)
+        if profile is None:
+            values = self.DEFAULT_SWATCHES
+        else:
+            values = [profile.get(role) for role in self.SWATCH_ROLES]
+        return [rgb for rgb in map(colors.parse, values) if rgb is not None]
+
+    def on_browser_row_activated(self, list_view, position):
+        item = list_view.get_model().get_item(position)
+        if item is None:
+            return
+        name = item.get_string()
+        index = 0 if name == "Default" else bisect.bisect_left(self.themes, name, 1)
+        if index < len(self.themes) and self.themes[index] == name:
+            self.combo_row.set_selected(index)
+        self.profile_browser.popdown()
+
     def on_run_build_clicked(self, button):
 
+        # The button stays live: clicking again supersedes the running build
         self.active_build_button = button 
-        self.active_build_button.set_sensitive(False)
     # Get primary hex and ensure it is a string
         primary_color = str(self.primary_row.get_text() or "#246cc5")
         secondary_color = str(self.secondary_row.get_text() or "#246cc5")
         text_color = str(self.text_row.get_text() or "#f9f9f9")
-        plasma_path = self.get_path_argument("~/.local/share/plasma")
-        schemes_path = self.get_path_argument("~/.local/share/color-schemes")
-        gnome_path = self.get_path_argument("~/.local/share/themes")
+        outputs = ENVIRONMENT.outputs
+        plasma_path = self.get_path_argument(outputs["plasma"])
+        schemes_path = self.get_path_argument(outputs["color-schemes"])
+        gnome_path = self.get_path_argument(outputs["themes"])
         #  Dynamic Zen path
         # Get the actual path string first (falling back to the default glob if not set)
-        current_zen_val = getattr(self, "last_manually_entered_zen_path", "~/.zen/*/chrome")
+        current_zen_val = getattr(self, "last_manually_entered_zen_path", outputs["zen"])
 
         # Pass that VALUE to get_path_argument
         zen_path = self.get_path_argument(current_zen_val)
-        vesktop_path = self.get_path_argument("~/.config/vesktop/themes")
-        gtk4_path = self.get_path_argument("~/.config/gtk-4.0")
-        papirus_path = self.get_path_argument("~/.local/share/icons")
+        vesktop_path = self.get_path_argument(outputs["vesktop"])
+        gtk4_path = self.get_path_argument(outputs["gtk4"])
+        papirus_path = self.get_path_argument(outputs["icons"])
 
      
         if self.topbar_switch.get_active():
@@ -2569,53 +2917,99 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         self.log_container.set_visible(True)
         self.log_view.get_buffer().set_text("") 
         self.progress_bar.set_fraction(0.1)
+        # Filled from the backend's "Up to date: <target>" lines
+        self.skipped_targets = []
+        # Per-target progress from the backend's events
+        self.build_status = {}
+        # Stylesheets the compiler reported as failed
+        self.failed_stylesheets = []
+        self.progress_bar.set_show_text(False)
 
-        # Start the build in a background thread
-        thread = threading.Thread(target=self.execute_build, args=(args,))
-        thread.daemon = True # Closes thread if you exit the app
-        thread.start()
-        
-        button.set_sensitive(False)
+        if self.build_controller.is_running():
+            self.append_log("Superseding the running build...\n")
+
+        self.execute_build(args)
         
         
         
         
 
-    def execute_build(self, args):
+    def ensure_sass_service(self):
+        """Starts the session's Sass service unless it is running. False without Sass."""
+        if self.sass_process is not None and self.sass_process.poll() is None:
+            return True
+        # Not installed yet: builds start their own Sass until it is
+        if not os.access(ENVIRONMENT.sass, os.X_OK):
+            return False
         try:
-            # Use 'stdbuf -oL' to force Bash to send output line-by-line immediately
-            # universal_newlines=True ensures text is handled as strings, not bytes
-            process = subprocess.Popen(
-                ["stdbuf", "-oL", BASH_SCRIPT] + args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            self.sass_process = sass_service.spawn(ENVIRONMENT.python, ENVIRONMENT.sass,
+                                                   self.sass_socket, ENVIRONMENT.package_dir)
+        except OSError as e:
+            print(f"Could not start the Sass service: {e}")
+            self.sass_process = None
+            return False
+        return True
+
+    def stop_sass_service(self):
+        sass_service.stop(self.sass_process)
+        self.sass_process = None
+
+    def execute_build(self, args, controller=None):
+        """Hands a backend run to a build controller (it owns the worker thread)."""
+        # Ask the backend for progress events next to the log
+        env = dict(os.environ, COLORMYDESKTOP_EVENTS="1", **ENVIRONMENT.backend_env())
+        if self.ensure_sass_service():
+            env["COLORMYDESKTOP_SASS_SERVICE"] = self.sass_socket
+        (controller or self.build_controller).start(args, env)
+
+    def on_build_line(self, generation, line):
+        # Worker thread: use idle_add to update the UI safely
+        event = parse_event(line)
+        if event:
+            GLib.idle_add(self.on_build_event, event, generation)
+        else:
+            GLib.idle_add(self.append_log, line, generation)
 
-            # Read output in real-time
-            for line in iter(process.stdout.readline, ""):
-                if line:
-                    # Use idle_add to update the UI from the background thread safely
-                    GLib.idle_add(self.append_log, line)
+    def on_config_line(self, generation, line):
+        # Config runs send no progress events; their generations are not the build's
+        if not parse_event(line):
+            GLib.idle_add(self.append_log, line)
 
-            process.wait()
-        except Exception as e:
-            GLib.idle_add(self.append_log, f"Error: {str(e)}\n")
-        finally:
-            if args[0] == "config_only":
-                GLib.idle_add(self.config_finished_cleanup)
-            else:
-                # For standard builds, keep your existing logic
-                GLib.idle_add(self.trigger_shell_refresh)
-                GLib.idle_add(self.trigger_refresh)
-                GLib.idle_add(self.build_finished)
+    def on_build_process_finished(self, generation, args, returncode, superseded):
+        if args[0] == "config_only":
+            # The Save button comes back on every path, replaced runs included
+            GLib.idle_add(self.config_finished_cleanup, superseded, returncode)
+            return
+        # A superseded run leaves the reporting to the build that replaced it
+        if superseded:
+            return
+        if returncode != 0:
+            # Nothing to refresh the desktop with, say what went wrong instead
+            GLib.idle_add(self.build_failed, returncode)
+            return
+        GLib.idle_add(self.run_refresh_triggers, generation)
+        GLib.idle_add(self.build_finished)
+
+    def run_refresh_triggers(self, generation=None):
+        """Runs the GNOME / Plasma refresh and adds its time to the backend's timing summary."""
+        timings = []
+        for name, trigger in (("refresh-gnome", self.trigger_shell_refresh), ("refresh-plasma", self.trigger_refresh)):
+            started = time.monotonic()
+            trigger()
+            timings.append(f"  {name:<22} {time.monotonic() - started:8.3f}s\n")
+        self.append_log("".join(timings), generation)
+        return False
                 
-    def config_finished_cleanup(self):
-        #  Re-enable the button using existing attribute
-        if hasattr(self, "active_build_button"):
-            self.active_build_button.set_sensitive(True)
+    def config_finished_cleanup(self, superseded=False, returncode=0):
+        #  Re-enable the Save button
+        if hasattr(self, "config_button"):
+            self.config_button.set_sensitive(True)
+        # The save that replaced this one reports for both
+        if superseded:
+            return False
+        if returncode != 0:
+            self.toast_overlay.add_toast(Adw.Toast.new("Saving the configuration failed, see the log"))
+            return False
         
         #  Show the success toast
         self.toast_overlay.add_toast(Adw.Toast.new("Configuration Saved!"))
@@ -2630,7 +3024,17 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         return False
 
 
-    def append_log(self, text):
+    def append_log(self, text, generation=None):
+        # Lines already queued by a superseded build
+        if generation is not None and not self.build_controller.is_current(generation):
+            return False
+
+        # The backend reports targets whose inputs did not change
+        if text.startswith("Up to date:"):
+            if not hasattr(self, "skipped_targets"):
+                self.skipped_targets = []
+            self.skipped_targets.append(text.split(":", 1)[1].strip())
+
         buffer = self.log_view.get_buffer()
         buffer.insert(buffer.get_end_iter(), text)
         
@@ -2638,16 +3042,91 @@ class ThemeManager(Adw.ApplicationWindow, DialogMixin, AdvancedMixin):
         adj = self.scrolled_window.get_vadjustment()
         adj.set_value(adj.get_upper() - adj.get_page_size())
         
-        self.progress_bar.pulse() # Makes the progress bar move
+        # Without events (config runs) there is nothing to measure
+        if not getattr(self, "build_status", None):
+            self.progress_bar.pulse() # Makes the progress bar move
+        return False
+
+    def on_build_event(self, event, generation=None):
+        """Turns a backend progress event into per-target status and a real fraction."""
+        if generation is not None and not self.build_controller.is_current(generation):
+            return False
+
+        kind = event.get("event")
+        status = self.build_status
+
+        if kind == "target-start":
+            status[event["target"]] = {"fraction": 0.0, "detail": "running"}
+        elif kind == "target-finish":
+            done = event.get("status") == "done"
+            status[event["target"]] = {
+                "fraction": 1.0,
+                "detail": f"{event.get('seconds', 0):.1f}s" if done else "failed",
+            }
+        elif kind == "stylesheet" and event.get("result") == "failed":
+            self.failed_stylesheets.append(event.get("target", "?"))
+        elif kind == "stylesheet" and "sass" in status:
+            total = max(event.get("total", 1), 1)
+            status["sass"] = {
+                "fraction": event.get("index", 0) / total,
+                "detail": f"{event.get('index', 0)}/{total} stylesheets",
+            }
+        elif kind == "icons" and "papirus" in status:
+            total = event.get("total", 0)
+            status["papirus"] = {
+                "fraction": event.get("done", 0) / total if total else 1.0,
+                "detail": f"{event.get('done', 0)}/{total} icons",
+            }
+        elif kind == "build-finish":
+            print(f"Build {event.get('status')} in {event.get('seconds', 0):.2f}s")
+
+        if status:
+            # 10% for preparing, the rest split evenly between the targets
+            fraction = sum(target["fraction"] for target in status.values()) / len(status)
+            self.progress_bar.set_fraction(0.1 + 0.9 * fraction)
+            self.progress_bar.set_text(" · ".join(f"{name}: {target['detail']}" for name, target in status.items()))
+            self.progress_bar.set_show_text(True)
         return False
         
     def build_finished(self):
         self.progress_bar.set_fraction(1.0)
         self.toast_overlay.add_toast(Adw.Toast.new("Theme Applied Successfully!"))
+
+        skipped = getattr(self, "skipped_targets", [])
+        if skipped:
+            self.toast_overlay.add_toast(Adw.Toast.new(f"Up to date, skipped: {', '.join(skipped)}"))
         GLib.timeout_add(3000, self.auto_hide_logs)
 
 
+    def build_failed(self, returncode):
+        """Keeps the log open and names the targets that failed or never finished."""
+        self.progress_bar.set_fraction(1.0)
+        status = getattr(self, "build_status", None) or {}
+        stylesheets = getattr(self, "failed_stylesheets", [])
+
+        failed = [name for name, target in status.items() if target["detail"] == "failed"]
+        if "sass" in failed and stylesheets:
+            # Name the stylesheets, the rest of the Sass run was applied
+            index = failed.index("sass")
+            failed[index:index + 1] = stylesheets
+        unfinished = [name for name, target in status.items() if target["fraction"] < 1.0]
+
+        if failed:
+            message = f"Build failed: {', '.join(failed)}"
+        elif returncode is None:
+            message = "Build failed: the backend could not be run"
+        else:
+            message = f"Build failed (exit code {returncode}), see the log"
+        self.toast_overlay.add_toast(Adw.Toast.new(message))
+        if unfinished:
+            self.toast_overlay.add_toast(Adw.Toast.new(f"Not applied: {', '.join(unfinished)}"))
+        return False
+
     def auto_hide_logs(self):
+        # A newer build is showing its log now
+        if self.build_controller.is_running():
+            return False
+
         # Hide the terminal box and re-enable the build button
         self.log_container.set_visible(False)
         # self.build_button.set_sensitive(True) # Re-enable if you disabled it
@@ -2717,9 +3196,13 @@ class ColorMyDesktopApp(Adw.Application):
         
         # Clean up the subprocess if it is running
     
-        if hasattr(window, 'current_process') and window.current_process:
+        if hasattr(window, 'build_controller') and window.build_controller.is_running():
             print("Terminating active build process...")
-            window.current_process.terminate()
+            window.build_controller.cancel()
+        if hasattr(window, 'config_controller') and window.config_controller.is_running():
+            window.config_controller.cancel()
+        if hasattr(window, 'sass_process'):
+            window.stop_sass_service()
             
      
         # Calling quit() ensures all background threads are signaled to stop.
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# In-memory index of the profile partials (_<name>.scss). A rescan only
+# stats the folder; each partial is read on first lookup, in one pass, into
+# a Profile record (variables, transparency flag, mtime). Looking it up
+# again costs one stat, and the file is only re-read when its mtime or size
+# changes, so thousands of profiles list without being parsed. The index is
+# shared with the GUI's thumbnail worker, so it takes a lock.
+# No GTK imports here: the backend runs this with plain python3. It imports
+# nothing from the backend either, so the GUI starts without loading it; the
+# partial patterns live here and the backend imports them from this module.
+
+import os
+import re
+import threading
+
+
+# "$primary: #3584e4;" in a partial
+DECLARATION_PATTERN = re.compile(r"^\$([\w-]+)\s*:\s*(.*?);")
+
+# "// TRANSPARENT: true (0.5)" header written by the terminal configurator
+TRANSPARENT_PATTERN = re.compile(r"TRANSPARENT:\s*true\s*\(([0-9.]+)\)")
+
+
+class Profile:
+    """One parsed partial."""
+
+    __slots__ = ("name", "path", "stamp", "variables", "transparent", "alpha")
+
+    def __init__(self, name, path, stamp, variables, alpha):
+        self.name = name
+        self.path = path
+        # (mtime_ns, size) of the file this record was parsed from
+        self.stamp = stamp
+        self.variables = variables
+        self.transparent = alpha is not None
+        self.alpha = alpha
+
+    def __repr__(self):
+        return f"Profile({self.name!r}, {len(self.variables)} variables)"
+
+    @property
+    def mtime(self):
+        return self.stamp[0] / 1e9
+
+    def get(self, variable, default=""):
+        """Value of $variable, default if the partial does not set it."""
+        return self.variables.get(variable, default)
+
+
+def stamp_of(stat):
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def parse_partial(path, name=None, stat=None):
+    """Reads a partial into a Profile. name defaults to the file name without '_' and '.scss'."""
+    if name is None:
+        name = os.path.basename(path)[1:-5]
+    stat = stat or os.stat(path)
+
+    variables = {}
+    alpha = None
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("//"):
+                # "// TRANSPARENT: true (0.8)" header
+                match = TRANSPARENT_PATTERN.search(line)
+                if match:
+                    alpha = match.group(1)
+                continue
+            match = DECLARATION_PATTERN.match(line)
+            if match:
+                # The first declaration wins, like a search through the file
+                variables.setdefault(match.group(1), match.group(2).strip())
+    return Profile(name, path, stamp_of(stat), variables, alpha)
+
+
+def is_partial(filename):
+    return filename.startswith("_") and filename.endswith(".scss")
+
+
+def profile_name(filename):
+    """'_Blue.scss' -> 'Blue', None for anything that is not a partial."""
+    return filename[1:-5] if filename and is_partial(filename) else None
+
+
+class ProfileIndex:
+    """The profiles of one folder, parsed on demand and kept until their file changes."""
+
+    def __init__(self, folder):
+        self.folder = folder
+        # get() also runs on the thumbnail worker
+        self._lock = threading.RLock()
+        # name -> stamp of every partial seen by the last scan
+        self.stamps = {}
+        # name -> parsed Profile, filled by get() / load()
+        self.profiles = {}
+
+    def path(self, name):
+        return os.path.join(self.folder, f"_{name}.scss")
+
+    def refresh(self):
+        """Rescans the folder (stat only). Returns the names that were (added, changed, removed)."""
+        seen = {}
+        try:
+            with os.scandir(self.folder) as entries:
+                for entry in entries:
+                    if is_partial(entry.name) and entry.is_file():
+                        seen[profile_name(entry.name)] = stamp_of(entry.stat())
+        except OSError:
+            pass
+
+        with self._lock:
+            added = set(seen) - set(self.stamps)
+            removed = set(self.stamps) - set(seen)
+            changed = {name for name in set(seen) & set(self.stamps) if seen[name] != self.stamps[name]}
+            # Parsed again on their next lookup
+            for name in changed | removed:
+                self.profiles.pop(name, None)
+            self.stamps = seen
+        return added, changed, removed
+
+    def load(self, name, stat=None):
+        """(Re)parses one profile now. Returns it, or None (and forgets it) if it cannot be read."""
+        try:
+            profile = parse_partial(self.path(name), name, stat)
+        except (OSError, UnicodeDecodeError) as e:
+            print(f"Could not read profile '{name}': {e}")
+            self.forget(name)
+            return None
+        with self._lock:
+            self.stamps[name] = profile.stamp
+            self.profiles[name] = profile
+        return profile
+
+    def forget(self, name):
+        with self._lock:
+            self.stamps.pop(name, None)
+            self.profiles.pop(name, None)
+
+    def get(self, name):
+        """The profile called name, read if it is new or its file changed. None if it is gone."""
+        try:
+            stat = os.stat(self.path(name))
+        except OSError:
+            self.forget(name)
+            return None
+
+        profile = self.profiles.get(name)
+        if profile is None or profile.stamp != stamp_of(stat):
+            profile = self.load(name, stat)
+        return profile
+
+    def names(self):
+        """Every profile name of the last scan (plus later loads), sorted."""
+        with self._lock:
+            return sorted(self.stamps)
+
+    def __contains__(self, name):
+        return name in self.stamps
+
+    def __len__(self):
+        return len(self.stamps)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Build progress events shared by the backend helpers and the GUI.
+# When the GUI starts a build it sets COLORMYDESKTOP_EVENTS=1 and the backend
+# opens an event channel on COLORMYDESKTOP_EVENT_FD. Each event is one line:
+#
+#   @@event {"event": "target-finish", "target": "sass", "status": "done", "seconds": 1.42}
+#
+# Events:
+#   target-start   target
+#   target-finish  target, status ("done" / "failed"), seconds
+#   stage          stage, seconds
+#   stylesheet     target, result ("up-to-date" / "cached" / "rendered" / "copied" / "compiled" / "failed"), index, total
+#   icons          done, total
+#   build-finish   status, seconds
+#
+# Independently of the events, the backend collects stage timings for the
+# summary at the end of every build in the file named by
+# COLORMYDESKTOP_TIMINGS; record_stage adds the helpers' stages to it.
+#
+# No GTK imports here: the backend runs this with plain python3.
+
+import json
+import os
+
+
+EVENT_PREFIX = "@@event "
+EVENT_FD_VAR = "COLORMYDESKTOP_EVENT_FD"
+TIMINGS_VAR = "COLORMYDESKTOP_TIMINGS"
+
+
+def emit(event, **fields):
+    """Writes one event to the backend's event channel, if the GUI asked for one."""
+    fd = os.environ.get(EVENT_FD_VAR)
+    if not fd:
+        return
+
+    line = EVENT_PREFIX + json.dumps({"event": event, **fields}) + "\n"
+    try:
+        # Short lines on a pipe are written atomically, so events from
+        # parallel targets never interleave
+        os.write(int(fd), line.encode())
+    except (OSError, ValueError):
+        pass
+
+
+def record_stage(stage, seconds, note=""):
+    """Reports a finished stage: a "stage" event plus a line in the build's timing summary."""
+    emit("stage", stage=stage, seconds=round(seconds, 3))
+
+    path = os.environ.get(TIMINGS_VAR)
+    if not path:
+        return
+    try:
+        # Same "<kind> <name> <seconds> [note]" lines as record_timing in the backend
+        with open(path, "a") as f:
+            f.write(f"stage {stage} {seconds:.6f} {note}".rstrip() + "\n")
+    except OSError:
+        pass
+
+
+def parse_event(line):
+    """Returns the event dict for an event line, None for regular log output."""
+    if not line.startswith(EVENT_PREFIX):
+        return None
+    try:
+        event = json.loads(line[len(EVENT_PREFIX):])
+    except ValueError:
+        return None
+    return event if isinstance(event, dict) else None
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Warm Sass compiler shared by every build of a GUI session.
+# The GUI starts one service per session; it keeps a single 'sass --embedded'
+# process (dart-sass's embedded protocol) alive and listens on a unix socket,
+# named to the backend in COLORMYDESKTOP_SASS_SERVICE. colormydesktop.compiler
+# sends it the stylesheets of a build and falls back to its own 'sass in:out'
+# run when the service is not there, so Dart VM startup is paid once per
+# session instead of once per build.
+#
+# Requests and replies are one JSON line each:
+#
+#   {"jobs": ["/tmp/.../gtk.scss", ...]}
+#   {"results": [{"css": "..."} or {"error": "..."}, ...], "log": ["..."]}
+#
+# The service exits when its stdin closes, i.e. together with the GUI.
+# No GTK imports here: the backend runs this with plain python3.
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+
+
+# How long a build waits for the service before compiling on its own
+CONNECT_TIMEOUT = 2.0
+
+
+# --- PROTOBUF ---
+# The handful of embedded protocol messages we use, encoded by hand so the
+# app does not need a protobuf runtime. Field numbers follow
+# https://github.com/sass/sass/blob/main/spec/embedded_sass.proto
+def encode_varint(value):
+    out = bytearray()
+    while True:
+        bits = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(bits | 0x80)
+        else:
+            out.append(bits)
+            return bytes(out)
+
+
+def decode_varint(data, index):
+    value = shift = 0
+    while True:
+        byte = data[index]
+        index += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if not byte & 0x80:
+            return value, index
+
+
+def encode_field(number, value):
+    """Encodes an int/bool (varint) or str/bytes (length-delimited) field."""
+    if isinstance(value, (bool, int)):
+        return encode_varint(number << 3) + encode_varint(int(value))
+    if isinstance(value, str):
+        value = value.encode()
+    return encode_varint(number << 3 | 2) + encode_varint(len(value)) + value
+
+
+def decode_fields(data):
+    """Returns {field number: [values]}, length-delimited values as bytes."""
+    fields = {}
+    index = 0
+    while index < len(data):
+        key, index = decode_varint(data, index)
+        number, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, index = decode_varint(data, index)
+        elif wire_type == 2:
+            length, index = decode_varint(data, index)
+            value = data[index:index + length]
+            index += length
+        elif wire_type == 1:
+            value, index = data[index:index + 8], index + 8
+        elif wire_type == 5:
+            value, index = data[index:index + 4], index + 4
+        else:
+            raise ValueError(f"Unsupported protobuf wire type {wire_type}")
+        fields.setdefault(number, []).append(value)
+    return fields
+
+
+def compile_request(path):
+    """InboundMessage.compile_request for a file, with the options of compiler.sass_command()."""
+    request = (
+        encode_field(3, path)   # path
+        + encode_field(13, True)  # charset, like the CLI
+    )
+    # style (4) and source_map (5) are left at EXPANDED / false
+    return encode_field(2, request)
+
+
+# --- EMBEDDED COMPILER ---
+class EmbeddedSass:
+    """One 'sass --embedded' process compiling any number of files."""
+
+    def __init__(self, sass):
+        self.sass = sass
+        self.process = None
+        self._next_id = 1
+
+    def start(self):
+        if self.process is None or self.process.poll() is not None:
+            self.process = subprocess.Popen(
+                [self.sass, "--embedded"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+
+    def stop(self):
+        if self.process is None:
+            return
+        if self.process.poll() is None:
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                # Unflushed input to a process that already died
+                pass
+        self.process = None
+
+    def send(self, compilation_id, message):
+        body = encode_varint(compilation_id) + message
+        self.process.stdin.write(encode_varint(len(body)) + body)
+
+    def read_exactly(self, count):
+        data = b""
+        while len(data) < count:
+            chunk = self.process.stdout.read(count - len(data))
+            if not chunk:
+                raise EOFError("Sass stopped")
+            data += chunk
+        return data
+
+    def receive(self):
+        """Returns (compilation id, OutboundMessage fields) of the next packet."""
+        length = shift = 0
+        while True:
+            byte = self.read_exactly(1)[0]
+            length |= (byte & 0x7F) << shift
+            shift += 7
+            if not byte & 0x80:
+                break
+        packet = self.read_exactly(length)
+        compilation_id, index = decode_varint(packet, 0)
+        return compilation_id, decode_fields(packet[index:])
+
+    def compile(self, paths):
+        """Compiles every file at once. Returns ([result per path], [log messages]).
+
+        A result is {"css": text} in the form the CLI writes it, or
+        {"error": formatted message}.
+        """
+        self.start()
+        ids = {}
+        for path in paths:
+            ids[self._next_id] = len(ids)
+            self.send(self._next_id, compile_request(path))
+            self._next_id += 1
+        self.process.stdin.flush()
+
+        results = [None] * len(paths)
+        log = []
+        while ids:
+            compilation_id, message = self.receive()
+            if 1 in message:
+                error = decode_fields(message[1][0])
+                raise RuntimeError(error.get(3, [b"protocol error"])[0].decode())
+            if 3 in message:
+                event = decode_fields(message[3][0])
+                log.append((event.get(6) or event.get(3) or [b""])[0].decode())
+                continue
+            if 2 not in message or compilation_id not in ids:
+                continue
+
+            response = decode_fields(message[2][0])
+            index = ids.pop(compilation_id)
+            if 2 in response:
+                css = decode_fields(response[2][0]).get(1, [b""])[0].decode()
+                # The CLI ends every file with a newline
+                results[index] = {"css": css + "\n"}
+            else:
+                failure = decode_fields(response.get(3, [b""])[0])
+                text = (failure.get(4) or failure.get(1) or [b"Sass failed"])[0].decode()
+                results[index] = {"error": text}
+        return results, log
+
+
+# --- SERVICE ---
+class ServiceHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            paths = [os.path.abspath(path) for path in request["jobs"]]
+        except (ValueError, KeyError, TypeError):
+            return
+
+        sass = self.server.sass
+        with self.server.lock:
+            try:
+                results, log = sass.compile(paths)
+            except (OSError, EOFError, RuntimeError) as e:
+                # Start over with a fresh process on the next request
+                print(f"Sass service: {e}", file=sys.stderr)
+                sass.stop()
+                return
+
+        self.wfile.write(json.dumps({"results": results, "log": log}).encode() + b"\n")
+
+
+class SassService(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, sass):
+        self.sass = EmbeddedSass(sass)
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            os.remove(path)
+        super().__init__(path, ServiceHandler)
+
+
+def serve(path, sass):
+    """Runs the service on 'path' until stdin is closed."""
+    service = SassService(path, sass)
+    # Boot the Dart VM now, not on the first build
+    service.sass.start()
+
+    def watch_parent():
+        sys.stdin.buffer.read()
+        service.shutdown()
+
+    threading.Thread(target=watch_parent, daemon=True).start()
+    try:
+        service.serve_forever()
+    finally:
+        service.server_close()
+        service.sass.stop()
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# --- GUI SIDE ---
+def spawn(python, sass, path, package_dir):
+    """Starts a service for the GUI session. Closing its stdin stops it."""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(package_dir))
+    return subprocess.Popen(
+        [python, "-m", "colormydesktop.sass_service", "--sass", sass, "--socket", path],
+        stdin=subprocess.PIPE,
+        env=env,
+    )
+
+
+def stop(process):
+    if process is not None and process.poll() is None:
+        process.stdin.close()
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+# --- CLIENT ---
+def compile_files(path, sources):
+    """Compiles 'sources' in the service at 'path'.
+
+    Returns ([result per source], [log messages]), or None when the service
+    cannot be reached and the caller has to run Sass itself.
+    """
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(CONNECT_TIMEOUT)
+            client.connect(path)
+            # Compiling takes as long as it takes
+            client.settimeout(None)
+            client.sendall(json.dumps({"jobs": list(sources)}).encode() + b"\n")
+            with client.makefile("rb") as reply:
+                data = json.loads(reply.readline())
+        return data["results"], data["log"]
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Keep a warm Sass compiler for Color My Desktop builds.")
+    parser.add_argument("--sass", required=True, help="Path to the dart-sass binary")
+    parser.add_argument("--socket", required=True, help="Unix socket to listen on")
+    args = parser.parse_args(argv)
+
+    # Unwind on SIGTERM too, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(128 + signum))
+    serve(args.socket, args.sass)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
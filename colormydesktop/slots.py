@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Color-slot templates: render a profile by substitution instead of Sass.
+#
+# A template is compiled three times against the profile partial with every
+# hex color swapped for a sentinel: set A (dark), set B (light) and set C
+# (mid grey, low saturation). Wherever a set A sentinel shows up in the CSS,
+# directly or inside rgb()/rgba(), that spot is a "slot" for the variable.
+# If re-rendering the slots with sets B and C reproduces their outputs byte
+# for byte, nothing else in the stylesheet depends on the colors and any
+# profile with the same partial layout can be rendered in Python. Templates
+# that run colors through mix()/darken() and friends, or branch on a color's
+# lightness, hue or saturation (@if, if(), luminance helpers), fail that
+# check and keep going through Sass.
+#
+# Sentinels are written in upper case. Sass copies a color it does not touch
+# exactly as written, so those slots get the profile's own literal ("#FFF"
+# stays "#FFF") and match Sass byte for byte. A color Sass computed comes out
+# in lower case, or by name when one matches ("white"), which substitution
+# cannot reproduce exactly: templates with such a slot are not tracked, so
+# every rendered stylesheet is identical to a compile.
+#
+# Learning costs a Sass run of three sentinel copies per template. Desktop
+# builds only queue it (a <key>.pending.json next to the sentinel sources) and
+# the backend runs "compiler --learn" in the background once the build is
+# done; the batch renderer learns inline between its seed and the rest.
+
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import re
+import subprocess
+
+
+# "$primary: #3584e4;" lines in a profile partial
+VARIABLE_PATTERN = re.compile(r"^(\s*\$([\w-]+)\s*:\s*)(#[0-9a-fA-F]{6}|#[0-9a-fA-F]{3})(\s*;.*)$")
+PARTIAL_USE_PATTERN = re.compile(r"""^\s*@use\s+['"]([^'"]+)['"].*$""", re.MULTILINE)
+
+# Color tokens as dart-sass writes them in expanded output
+COLOR_PATTERN = re.compile(
+    r"#[0-9a-fA-F]{6}\b"
+    r"|rgba?\(\s*(\d+)\s*[, ]\s*(\d+)\s*[, ]\s*(\d+)\s*(?:[,/]\s*[\d.]+%?\s*)?\)"
+)
+
+
+# Bump when the slot format or the learning check changes: stored
+# templates from an older version are learned again
+SLOT_FORMAT = 3
+
+SENTINEL_SETS = 3
+
+
+def sentinel(index, variant):
+    """Unnamed, unlikely colors: one per variable and sentinel set.
+
+    Set A is very dark and set B very light (opposite sides of any lightness
+    test), set C is a mid grey with little saturation. Every value has a
+    letter in its hex form, so its case shows whether Sass computed it.
+    """
+    if variant == 0:
+        return (0x0a, 0x02 + index, 0x1b)
+    if variant == 1:
+        return (0xfe, 0xfd - index, 0xea)
+    return (0x8a, 0x80 + index, 0x8b)
+
+
+def sentinel_literal(index, variant):
+    return to_hex(sentinel(index, variant)).upper()
+
+
+def parse_hex(value):
+    value = value.lstrip("#")
+    if len(value) == 3:
+        value = "".join(c * 2 for c in value)
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def to_hex(rgb):
+    return "#{:02x}{:02x}{:02x}".format(*rgb)
+
+
+class SlotTemplate:
+    """A compiled stylesheet split into literal text and color slots."""
+
+    def __init__(self, parts, trackable=True):
+        # parts: strings, or [variable, shape] lists for slots
+        self.parts = parts
+        self.trackable = trackable
+
+    @classmethod
+    def from_outputs(cls, outputs, variables):
+        """Builds a template from the outputs of every sentinel set, or an untrackable marker."""
+        css_a = outputs[0]
+        by_rgb = {sentinel(i, 0): name for i, name in enumerate(variables)}
+        parts = []
+        last = 0
+
+        for match in COLOR_PATTERN.finditer(css_a):
+            token = match.group(0)
+            if token.startswith("#"):
+                rgb = parse_hex(token)
+                # Upper case: the partial's literal, passed through untouched
+                shape = "{literal}"
+            else:
+                rgb = tuple(int(match.group(i)) for i in (1, 2, 3))
+                # Keep the exact spacing and alpha, only the channels move
+                offset = match.start()
+                shape = token
+                for i in (3, 2, 1):
+                    start, end = match.start(i) - offset, match.end(i) - offset
+                    shape = shape[:start] + "{" + "rgb"[i - 1] + "}" + shape[end:]
+
+            name = by_rgb.get(rgb)
+            if name is None:
+                continue
+            if token.startswith("#") and token == token.lower():
+                # Computed by Sass, which prints some colors by name: not exact
+                return cls([], trackable=False)
+
+            parts.append(css_a[last:match.start()])
+            parts.append([name, shape])
+            last = match.end()
+        parts.append(css_a[last:])
+
+        template = cls(parts)
+        for variant, css in enumerate(outputs[1:], start=1):
+            values = {name: sentinel_literal(i, variant) for i, name in enumerate(variables)}
+            if template.render(values) != css:
+                return cls([], trackable=False)
+        return template
+
+    def render(self, values):
+        """Fills every slot from a {variable: '#rgb' or '#rrggbb'} mapping, as written in the partial."""
+        out = []
+        for part in self.parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+
+            name, shape = part
+            r, g, b = parse_hex(values[name])
+            out.append(shape.format(literal=values[name], r=r, g=g, b=b))
+        return "".join(out)
+
+    def to_json(self):
+        return {"trackable": self.trackable, "parts": self.parts}
+
+    @classmethod
+    def from_json(cls, data):
+        return cls(data["parts"], data["trackable"])
+
+
+class SlotRenderer:
+    """Renders prepared templates from stored slot templates, learning new ones on demand."""
+
+    def __init__(self, store_dir, version=""):
+        self.store_dir = store_dir
+        self.version = version
+        self._learning = []
+        os.makedirs(store_dir, exist_ok=True)
+
+    # --- PROFILE PARSING ---
+    def read_source(self, source):
+        """Splits a prepared template into (body, @use match, layout, values)."""
+        with open(source, "r") as f:
+            content = f.read()
+
+        match = PARTIAL_USE_PATTERN.search(content)
+        if not match:
+            return None
+
+        target = match.group(1)
+        if not os.path.isabs(target):
+            target = os.path.join(os.path.dirname(os.path.abspath(source)), target)
+        folder, name = os.path.split(target)
+        partial = os.path.join(folder, f"_{name}.scss")
+        if not os.path.isfile(partial):
+            return None
+
+        with open(partial, "r") as f:
+            partial_lines = f.read().splitlines()
+
+        # Layout: the partial with every hex value masked out. Profiles that
+        # share a layout share a slot template.
+        layout = []
+        values = {}
+        for line in partial_lines:
+            var = VARIABLE_PATTERN.match(line)
+            if var:
+                values[var.group(2)] = var.group(3)
+                layout.append([var.group(1), var.group(2), var.group(4)])
+            else:
+                layout.append(line)
+
+        body = content[:match.start()] + content[match.end():]
+        return body, match, layout, values
+
+    def template_key(self, body, layout):
+        digest = hashlib.sha256()
+        digest.update(f"{SLOT_FORMAT}:{self.version}".encode())
+        digest.update(b"\0" + body.encode())
+        digest.update(b"\0" + json.dumps(layout).encode())
+        return digest.hexdigest()
+
+    def template_path(self, key):
+        return os.path.join(self.store_dir, f"{key}.json")
+
+    def pending_path(self, key):
+        return os.path.join(self.store_dir, f"{key[:16]}.pending.json")
+
+    # --- RENDER ---
+    def render(self, source):
+        """Returns the rendered CSS, or None when Sass has to compile this one."""
+        parsed = self.read_source(source)
+        if not parsed:
+            return None
+        body, _, layout, values = parsed
+
+        path = self.template_path(self.template_key(body, layout))
+        if not os.path.exists(path):
+            return None
+
+        try:
+            with open(path, "r") as f:
+                template = SlotTemplate.from_json(json.load(f))
+        except (OSError, ValueError, KeyError):
+            return None
+
+        if not template.trackable:
+            return None
+        return template.render(values)
+
+    # --- LEARN ---
+    def sentinel_jobs(self, source):
+        """Queues the sentinel compiles (one per set) needed to learn a template for 'source'."""
+        parsed = self.read_source(source)
+        if not parsed:
+            return []
+        body, use_match, layout, values = parsed
+        if not values:
+            return []
+
+        key = self.template_key(body, layout)
+        if os.path.exists(self.template_path(key)):
+            # Already known to be untrackable
+            return []
+        if os.path.exists(self.pending_path(key)):
+            # Queued by an earlier build, the background learner has it
+            return []
+        if any(entry["key"] == key for entry in self._learning):
+            return []
+
+        variables = sorted(values)
+        jobs = []
+        entry = {"key": key, "variables": variables, "files": [], "outputs": [], "jobs": jobs}
+
+        for variant in range(SENTINEL_SETS):
+            stem = os.path.join(self.store_dir, f"{key[:16]}-{variant}")
+            partial = f"{stem}-partial"
+            partial_file = os.path.join(self.store_dir, f"_{os.path.basename(partial)}.scss")
+            source_file = f"{stem}.scss"
+            output_file = f"{stem}.css"
+
+            colors = {name: sentinel_literal(i, variant) for i, name in enumerate(variables)}
+            with open(partial_file, "w") as f:
+                for line in layout:
+                    if isinstance(line, list):
+                        prefix, name, suffix = line
+                        line = prefix + colors[name] + suffix
+                    f.write(line + "\n")
+
+            # Same template, pointed at the sentinel partial
+            use_line = use_match.group(0).replace(use_match.group(1), partial)
+            with open(source_file, "w") as f:
+                f.write(body[:use_match.start()] + use_line + body[use_match.start():])
+
+            entry["files"] += [partial_file, source_file, output_file]
+            entry["outputs"].append(output_file)
+            jobs.append((source_file, output_file))
+
+        self._learning.append(entry)
+        return jobs
+
+    def defer(self):
+        """Leaves the queued sentinel compiles to learn_pending(). Returns how many templates wait."""
+        for entry in self._learning:
+            path = self.pending_path(entry["key"])
+            entry["files"].append(path)
+            with open(f"{path}.tmp", "w") as f:
+                json.dump(entry, f)
+            os.replace(f"{path}.tmp", path)
+
+        count = len(self._learning)
+        self._learning = []
+        return count
+
+    def learn_pending(self, cmd):
+        """Compiles every deferred sentinel set with the Sass command 'cmd' and learns from it.
+
+        Returns learn()'s result, or None when another learner holds the lock.
+        """
+        with open(os.path.join(self.store_dir, ".learn.lock"), "w") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+
+            self._learning = []
+            for path in sorted(glob.glob(os.path.join(self.store_dir, "*.pending.json"))):
+                try:
+                    with open(path, "r") as f:
+                        self._learning.append(json.load(f))
+                except ValueError:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+            pairs = [f"{source}:{output}" for entry in self._learning for source, output in entry["jobs"]]
+            if pairs:
+                # Exit status ignored: learn() skips the sets Sass could not build
+                subprocess.run(cmd + pairs, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            return self.learn()
+
+    def learn(self):
+        """Turns finished sentinel compiles into stored slot templates."""
+        learned = []
+        for entry in self._learning:
+            try:
+                outputs = []
+                for path in entry["outputs"]:
+                    with open(path, "r") as f:
+                        outputs.append(f.read())
+            except OSError:
+                # Sass failed on the sentinels, try again next build
+                self._cleanup(entry)
+                continue
+
+            template = SlotTemplate.from_outputs(outputs, entry["variables"])
+            with open(self.template_path(entry["key"]), "w") as f:
+                json.dump(template.to_json(), f)
+            learned.append(template.trackable)
+            self._cleanup(entry)
+
+        self._learning = []
+        return learned
+
+    def _cleanup(self, entry):
+        for path in entry["files"]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Palette thumbnails for the profile list: a swatch strip per palette,
+# rendered on a worker thread into a PNG under the app data dir and keyed on
+# a hash of the colors, so renamed or duplicated profiles share one file and
+# an edited profile gets a new one. Requests are made by profile name: the
+# worker also reads the profile's colors, so binding a row never parses a
+# partial on the main thread. Loaded thumbnails stay in a bounded in-memory
+# LRU; the disk cache keeps the most recently used files.
+# No GTK imports here: the GUI passes in how to read a profile's colors and
+# turn a PNG into a texture, and hops the results onto the main loop itself.
+
+import collections
+import hashlib
+import os
+import queue
+import struct
+import threading
+import zlib
+
+
+# Bump when the look changes, so old files are not reused
+THUMBNAIL_VERSION = 1
+
+# Rendered at twice the size the list shows, sharp on HiDPI screens
+WIDTH = 128
+HEIGHT = 36
+
+# Textures kept in memory, and PNG files kept on disk
+MEMORY_LIMIT = 512
+DISK_LIMIT = 4096
+
+# Prune the disk cache after this many new files
+PRUNE_EVERY = 64
+
+
+def palette_key(rgbs):
+    """Content hash of a list of (r, g, b) colors."""
+    text = f"v{THUMBNAIL_VERSION} {WIDTH}x{HEIGHT} " + " ".join("%02x%02x%02x" % tuple(rgb) for rgb in rgbs)
+    return hashlib.sha1(text.encode()).hexdigest()[:20]
+
+
+def render_strip(rgbs, width=WIDTH, height=HEIGHT):
+    """Raw RGB rows of equal vertical bands, one per color."""
+    if not rgbs:
+        return bytes(width * height * 3)
+    edges = [round(i * width / len(rgbs)) for i in range(len(rgbs) + 1)]
+    row = b"".join(bytes(rgb) * (end - start) for rgb, start, end in zip(rgbs, edges, edges[1:]))
+    return row * height
+
+
+def encode_png(raw, width, height):
+    """Minimal 8-bit RGB PNG of raw rows."""
+    stride = width * 3
+    # Filter type 0 (none) in front of every row
+    data = b"".join(b"\0" + raw[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(tag, body):
+        return struct.pack(">I", len(body)) + tag + body + struct.pack(">I", zlib.crc32(tag + body) & 0xffffffff)
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(data, 9))
+            + chunk(b"IEND", b""))
+
+
+class ThumbnailCache:
+    """Memory LRU in front of a disk cache in front of a one-thread renderer."""
+
+    def __init__(self, folder, resolve, load_texture, on_ready, memory_limit=MEMORY_LIMIT, disk_limit=DISK_LIMIT):
+        # resolve(name) -> [(r, g, b), ...] and load_texture(path) -> texture
+        # run on the worker thread, on_ready(name, key, texture or None) is
+        # called from it
+        self.folder = folder
+        self.resolve = resolve
+        self.load_texture = load_texture
+        self.on_ready = on_ready
+        self.memory_limit = memory_limit
+        self.disk_limit = disk_limit
+
+        # Main thread only: loaded textures, the palette key of every
+        # delivered name, and names already queued
+        self.textures = collections.OrderedDict()
+        self.keys = {}
+        self.pending = set()
+
+        self._queue = queue.Queue()
+        self._thread = None
+        self._written = 0
+
+    def path(self, key):
+        return os.path.join(self.folder, f"{key}.png")
+
+    def lookup(self, name):
+        """The texture for a profile if it is loaded, None otherwise."""
+        key = self.keys.get(name)
+        texture = self.textures.get(key) if key else None
+        if texture is not None:
+            self.textures.move_to_end(key)
+        return texture
+
+    def request(self, name):
+        """Queues a profile for resolving and loading (from disk) or rendering; on_ready follows."""
+        if name in self.pending:
+            return
+        self.pending.add(name)
+        self._queue.put(name)
+
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="thumbnails")
+            self._thread.daemon = True # Closes thread if you exit the app
+            self._thread.start()
+
+    def forget(self, name):
+        """Drops what is known about a profile's colors, e.g. after its file changed."""
+        self.keys.pop(name, None)
+
+    def remember(self, name, key, texture):
+        """Stores a delivered texture (call on the main thread)."""
+        self.pending.discard(name)
+        if texture is None:
+            return
+        self.keys[name] = key
+        self.textures[key] = texture
+        self.textures.move_to_end(key)
+        while len(self.textures) > self.memory_limit:
+            self.textures.popitem(last=False)
+
+    def _run(self):
+        while True:
+            name = self._queue.get()
+            key = None
+            try:
+                rgbs = self.resolve(name)
+                key = palette_key(rgbs)
+                texture = self.load_texture(self._file_for(key, rgbs))
+            except Exception as e:
+                print(f"Thumbnail for '{name}' failed: {e}")
+                texture = None
+            self.on_ready(name, key, texture)
+
+    def _file_for(self, key, rgbs):
+        """Path of the thumbnail PNG, rendered first if it is not on disk."""
+        path = self.path(key)
+        if os.path.exists(path):
+            # Touch it: the disk cache evicts the least recently used files
+            os.utime(path)
+            return path
+
+        os.makedirs(self.folder, exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(encode_png(render_strip(rgbs), WIDTH, HEIGHT))
+        os.replace(f"{path}.tmp", path)
+
+        self._written += 1
+        if self._written % PRUNE_EVERY == 0:
+            self.prune()
+        return path
+
+    def prune(self):
+        """Deletes the least recently used files beyond disk_limit."""
+        try:
+            with os.scandir(self.folder) as entries:
+                files = [(entry.stat().st_mtime, entry.path) for entry in entries if entry.name.endswith(".png")]
+        except OSError:
+            return
+        files.sort()
+        for _, path in files[:max(0, len(files) - self.disk_limit)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
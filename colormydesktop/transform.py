@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# Single-pass rewrite of the gnome-shell template for color-my-desktop-backend.
+# Replaces the chain of "sed -i" passes the backend used to run over the temp
+# copy: profile import, transparency wrapping and the BAR_TARGET / TIME_TARGET
+# color swaps all happen while the template is read once. compiler.py runs it
+# right before the Sass batch, so it costs no extra process.
+# No GTK imports here: the backend runs this with plain python3.
+
+import re
+
+
+# Background colors that get wrapped in rgba() when transparency is on ($text stays solid)
+TRANSPARENT_VARIABLES = ("primary", "secondary", "tertiary")
+
+# Colors unwrapped again when transparency is off
+SOLID_VARIABLES = TRANSPARENT_VARIABLES + ("topbar-color", "clock-color")
+
+# First "$variable" on a marked line
+MARKED_VARIABLE = re.compile(r"\$[a-zA-Z0-9_-]*")
+
+
+def literal(value):
+    """Replacement that keeps "$" and "\\" in the value as they are."""
+    return lambda match: value
+
+
+def build_rules(alpha=None, topbar=False, clock=False):
+    """Returns the (line test, pattern, replacement, count) rules, in the order sed applied them."""
+    rules = []
+
+    # Every rewrite is line-local, so applying them in sequence to each line
+    # gives the same result as one sed pass over the file per rule
+    if alpha is None:
+        for var in SOLID_VARIABLES:
+            rules.append((None, re.compile(r"rgba\(\$" + re.escape(var) + r", [0-9.]*\)"), literal("$" + var), 0))
+    else:
+        for var in TRANSPARENT_VARIABLES:
+            # Skip anything already inside rgba( and the top bar background
+            wrapped = f"rgba(${var}, {alpha})"
+            rules.append((lambda line: "BAR_TARGET" not in line,
+                          re.compile(r"([^a(])\$" + re.escape(var)),
+                          lambda match, wrapped=wrapped: match.group(1) + wrapped, 0))
+
+    bar_color = "$topbar-color" if topbar else "$primary"
+    time_color = "$clock-color" if clock else "$text"
+    rules.append((lambda line: "BAR_TARGET" in line, MARKED_VARIABLE, literal(bar_color), 1))
+    rules.append((lambda line: "TIME_TARGET" in line, MARKED_VARIABLE, literal(time_color), 1))
+
+    return rules
+
+
+def set_profile_import(content, import_statement):
+    """Drops the template's own @use lines and puts the profile import on top."""
+    lines = [line for line in content.splitlines(keepends=True) if not line.startswith("@use")]
+    return import_statement + "\n" + "".join(lines)
+
+
+def transform(content, import_statement=None, alpha=None, topbar=False, clock=False):
+    """Applies the profile import and color rewrites to a template in one pass."""
+    rules = build_rules(alpha, topbar, clock)
+    out = []
+
+    if import_statement is not None:
+        out.append(import_statement + "\n")
+
+    for line in content.splitlines(keepends=True):
+        if import_statement is not None and line.startswith("@use"):
+            continue
+
+        for test, pattern, replacement, count in rules:
+            if test is None or test(line):
+                line = pattern.sub(replacement, line, count)
+        out.append(line)
+
+    return "".join(out)
+
+
+def prepare_template(source, output, import_statement=None, alpha=None, topbar=False, clock=False):
+    """Writes the transformed copy of 'source' to 'output'."""
+    with open(source, "r") as f:
+        content = f.read()
+
+    with open(output, "w") as f:
+        f.write(transform(content, import_statement, alpha, topbar, clock))
@@ -0,0 +1,168 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.colors: parsing, WCAG contrast, contrast fixes and variants.
+# Run from the repository root: python3 -m unittest discover tests
+
+import unittest
+
+from colormydesktop import colors
+
+
+class ParseTest(unittest.TestCase):
+    def test_hex(self):
+        self.assertEqual(colors.parse("#3584e4"), (53, 132, 228))
+        self.assertEqual(colors.parse("#3584E4"), (53, 132, 228))
+        self.assertEqual(colors.parse("#fff"), (255, 255, 255))
+        self.assertEqual(colors.parse("  #fff  "), (255, 255, 255))
+
+    def test_hex_alpha_is_ignored(self):
+        self.assertEqual(colors.parse("#3584e480"), (53, 132, 228))
+        self.assertEqual(colors.parse("#abcd"), (170, 187, 204))
+
+    def test_bare_hex_is_not_a_color(self):
+        # Gdk.RGBA.parse rejects these too
+        for value in ("3584e4", "fff", "face", "#12345", "#ggg"):
+            with self.subTest(value=value):
+                self.assertIsNone(colors.parse(value))
+
+    def test_rgb(self):
+        self.assertEqual(colors.parse("rgb(1, 2, 3)"), (1, 2, 3))
+        self.assertEqual(colors.parse("rgba(10,20,30,0.5)"), (10, 20, 30))
+        self.assertEqual(colors.parse("rgb(127.6, 0, 0)"), (128, 0, 0))
+        self.assertIsNone(colors.parse("rgb(256, 0, 0)"))
+
+    def test_hsl(self):
+        self.assertEqual(colors.parse("hsl(0, 100%, 50%)"), (255, 0, 0))
+        self.assertEqual(colors.parse("hsl(120deg 100% 25%)"), (0, 128, 0))
+        self.assertEqual(colors.parse("hsla(240, 100%, 50%, 0.5)"), (0, 0, 255))
+        self.assertEqual(colors.parse("hsl(600, 100%, 50%)"), (0, 0, 255))
+        self.assertEqual(colors.parse("hsl(0, 0%, 100%)"), (255, 255, 255))
+        self.assertIsNone(colors.parse("hsl(0, 120%, 50%)"))
+        self.assertIsNone(colors.parse("hsl(0, 100, 50)"))
+
+    def test_named(self):
+        self.assertEqual(colors.parse("white"), (255, 255, 255))
+        self.assertEqual(colors.parse("RebeccaPurple"), (102, 51, 153))
+        self.assertEqual(colors.parse("transparent"), (0, 0, 0))
+        self.assertIsNone(colors.parse("notacolor"))
+        self.assertIsNone(colors.parse(""))
+
+    def test_to_hex(self):
+        self.assertEqual(colors.to_hex((53, 132, 228)), "#3584e4")
+        self.assertEqual(colors.to_hex((-3, 255.4, 300)), "#00ffff")
+        self.assertEqual(colors.to_hex(colors.parse("hsl(0, 100%, 50%)")), "#ff0000")
+
+
+class ContrastTest(unittest.TestCase):
+    def test_ratio_bounds(self):
+        self.assertAlmostEqual(colors.contrast_ratio("#000000", "#ffffff"), 21.0)
+        self.assertAlmostEqual(colors.contrast_ratio("#ffffff", "#000000"), 21.0)
+        self.assertAlmostEqual(colors.contrast_ratio("#3584e4", "#3584e4"), 1.0)
+
+    def test_known_ratio(self):
+        # #767676 is the lightest grey that passes AA on white
+        self.assertGreaterEqual(colors.contrast_ratio("#767676", "#ffffff"), 4.5)
+        self.assertLess(colors.contrast_ratio("#777777", "#ffffff"), 4.5)
+
+    def test_tuples_and_strings_agree(self):
+        self.assertEqual(colors.luminance("#3584e4"), colors.luminance((53, 132, 228)))
+
+    def test_invalid_color_raises(self):
+        with self.assertRaises(ValueError):
+            colors.luminance("nope")
+
+
+class PaletteContrastTest(unittest.TestCase):
+    def test_grade(self):
+        self.assertEqual(colors.grade(21), "aaa")
+        self.assertEqual(colors.grade(colors.AA), "aa")
+        self.assertEqual(colors.grade(3.5), "large")
+        self.assertEqual(colors.grade(1.2), "fail")
+
+    def test_matrix_matches_pairs(self):
+        foregrounds = ["#ffffff", "#1e1e1e"]
+        backgrounds = ["#3584e4", "#241f31", "#f9f9f9"]
+        matrix = colors.contrast_matrix(foregrounds, backgrounds)
+        for row, fg in zip(matrix, foregrounds):
+            for value, bg in zip(row, backgrounds):
+                self.assertAlmostEqual(value, colors.contrast_ratio(fg, bg))
+
+    def test_palette_contrast_fallbacks(self):
+        palette = {"primary": "#3584e4", "secondary": "#241f31", "tertiary": "#1e1e1e", "text": "#f9f9f9"}
+        result = colors.palette_contrast(palette)
+        self.assertEqual(len(result), len(colors.SURFACES) * len(colors.FOREGROUNDS))
+        # topbar-color follows primary, clock-color follows text
+        self.assertAlmostEqual(result[("clock-color", "topbar-color")],
+                               colors.contrast_ratio("#f9f9f9", "#3584e4"))
+        # text-light is text blended over each surface, so it contrasts less
+        self.assertLess(result[("text-light", "tertiary")], result[("text", "tertiary")])
+
+
+class FixContrastTest(unittest.TestCase):
+    def test_oklch_round_trip(self):
+        for value in ("#3584e4", "#241f31", "#f9f9f9", "#c6a000", "#000000"):
+            with self.subTest(value=value):
+                rgb = colors.parse(value)
+                back = colors.from_oklch(colors.to_oklch(rgb))
+                self.assertTrue(all(abs(a - b) <= 1 for a, b in zip(back, rgb)), back)
+
+    def test_passing_color_is_unchanged(self):
+        self.assertEqual(colors.fix_contrast("#f9f9f9", ["#241f31", "#1e1e1e"]), (249, 249, 249))
+
+    def test_fix_reaches_target_with_the_smallest_change(self):
+        surfaces = ["#241f31", "#1e1e1e"]
+        fixed = colors.fix_contrast("#4a5a7a", surfaces)
+        ratios = [colors.contrast_ratio(fixed, surface) for surface in surfaces]
+        self.assertGreaterEqual(min(ratios), colors.AA)
+        # Only lightness moved, and only as far as it had to
+        self.assertLess(min(ratios), colors.AA + 0.3)
+        self.assertAlmostEqual(colors.to_oklch(fixed)[2], colors.to_oklch("#4a5a7a")[2], delta=3)
+
+    def test_fix_goes_dark_on_light_surfaces(self):
+        fixed = colors.fix_contrast("#9a9a9a", ["#ffffff"])
+        self.assertGreaterEqual(colors.contrast_ratio(fixed, "#ffffff"), colors.AA)
+        self.assertLess(colors.luminance(fixed), colors.luminance("#9a9a9a"))
+
+    def test_no_lightness_clears_both_extremes(self):
+        fixed = colors.fix_contrast("#808080", ["#000000", "#ffffff"], colors.AAA)
+        self.assertIn(fixed, [colors.from_oklch((end, 0.0, 0.0)) for end in (1.0, 0.0)])
+
+    def test_fix_palette_only_reports_failing_roles(self):
+        palette = {"primary": "#1a3a6a", "secondary": "#241f31", "tertiary": "#1e1e1e",
+                   "text": "#f9f9f9", "clock-color": "#3d7fd1"}
+        fixes = colors.fix_palette(palette)
+        self.assertEqual(set(fixes), {"clock-color"})
+        self.assertGreaterEqual(colors.contrast_ratio(fixes["clock-color"], "#1a3a6a"), colors.AA)
+        self.assertEqual(colors.fix_palette(dict(palette, **fixes)), {})
+
+
+class VariantsTest(unittest.TestCase):
+    def test_one_candidate_per_combination(self):
+        candidates = colors.variants("#246cc5")
+        self.assertEqual(len(candidates),
+                         len(colors.HARMONIES) * len(colors.CHROMA_DAMPING) * len(colors.LIGHTNESS_STEPS))
+        for description, secondary, tertiary in candidates:
+            self.assertEqual(colors.to_hex(colors.parse(secondary)), secondary)
+            self.assertEqual(colors.to_hex(colors.parse(tertiary)), tertiary)
+
+    def test_cached_per_primary(self):
+        self.assertIs(colors.variants("#246cc5"), colors.variants("#246cc5"))
+
+    def test_dark_primary_gets_lighter_companions(self):
+        for primary, lighter in (("#241f31", True), ("#f6f5f4", False)):
+            with self.subTest(primary=primary):
+                for _, secondary, tertiary in colors.variants(primary):
+                    L = colors.to_oklch(primary)[0]
+                    L2, L3 = colors.to_oklch(secondary)[0], colors.to_oklch(tertiary)[0]
+                    self.assertEqual(L2 > L, lighter)
+                    self.assertEqual(L3 > L2, lighter)
+
+    def test_monochrome_keeps_the_hue(self):
+        description, secondary, _ = colors.variants("#246cc5")[0]
+        self.assertTrue(description.startswith("Monochrome"))
+        self.assertAlmostEqual(colors.to_oklch(secondary)[2], colors.to_oklch("#246cc5")[2], delta=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
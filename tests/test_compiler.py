@@ -0,0 +1,98 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.compiler: what goes into a stylesheet's cache key.
+# Run from the repository root: python3 -m unittest discover tests
+
+import os
+import tempfile
+import unittest
+
+from colormydesktop.compiler import SassCompiler
+
+
+PARTIAL = """\
+$primary: #488599;
+$secondary: #6eabbf;
+$tertiary: #94d1e5;
+$tertiary-light: rgba($tertiary, 0.25);
+$text: #ffffff;
+// TRANSPARENT: true (0.8)
+"""
+
+TEMPLATE = """\
+@use '{partial}' as *;
+
+.window {{ background: $primary; }}
+.sidebar {{ color: $tertiary-light; }}
+"""
+
+
+class CacheKeyTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.partial = self.write("_Test.scss", PARTIAL)
+        self.template = self.write("gtk4.scss", TEMPLATE.format(partial=self.path("_Test")))
+
+        self.compiler = SassCompiler("sass", self.path("cache"))
+        # Spares running 'sass --version'
+        self.compiler._version = "1.97.1"
+
+    def path(self, name):
+        return os.path.join(self.tmp.name, name)
+
+    def write(self, name, content):
+        with open(self.path(name), "w") as f:
+            f.write(content)
+        return self.path(name)
+
+    def edit_partial(self, old, new):
+        with open(self.partial, "r") as f:
+            content = f.read()
+        self.write("_Test.scss", content.replace(old, new))
+
+    def test_template_inputs_follows_derived_variables(self):
+        body, values, other, extra = self.compiler.template_inputs(self.template)
+        self.assertNotIn("@use", body)
+        # $tertiary-light is built from $tertiary, $secondary and $text are unused
+        self.assertEqual(values, {
+            "primary": "#488599",
+            "tertiary": "#94d1e5",
+            "tertiary-light": "rgba($tertiary, 0.25)",
+        })
+        self.assertEqual(other, [])
+        self.assertEqual(extra, [])
+
+    def test_relative_partial(self):
+        template = self.write("zen.scss", TEMPLATE.format(partial="Test"))
+        _, values, _, _ = self.compiler.template_inputs(template)
+        self.assertIn("primary", values)
+
+    def test_unread_variable_keeps_the_key(self):
+        key = self.compiler.cache_key(self.template)
+        self.edit_partial("$secondary: #6eabbf;", "$secondary: #000000;")
+        self.assertEqual(self.compiler.cache_key(self.template), key)
+
+    def test_read_variable_changes_the_key(self):
+        key = self.compiler.cache_key(self.template)
+        self.edit_partial("$tertiary: #94d1e5;", "$tertiary: #000000;")
+        self.assertNotEqual(self.compiler.cache_key(self.template), key)
+
+    def test_template_and_sass_version_change_the_key(self):
+        key = self.compiler.cache_key(self.template)
+        self.compiler._version = "1.98.0"
+        self.assertNotEqual(self.compiler.cache_key(self.template), key)
+
+        self.compiler._version = "1.97.1"
+        self.write("gtk4.scss", TEMPLATE.format(partial=self.path("_Test")) + ".x { color: red; }\n")
+        self.assertNotEqual(self.compiler.cache_key(self.template), key)
+
+    def test_key_ignores_the_template_path(self):
+        # The gnome-shell template is prepared into a fresh temp file every build
+        copy = self.write("copy.scss", TEMPLATE.format(partial=self.path("_Test")))
+        self.assertEqual(self.compiler.cache_key(copy), self.compiler.cache_key(self.template))
+
+
+if __name__ == "__main__":
+    unittest.main()
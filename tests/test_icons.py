@@ -0,0 +1,105 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.icons: recoloring and the manifest that skips unchanged icons.
+# Run from the repository root: python3 -m unittest discover tests
+
+import json
+import os
+import tempfile
+import unittest
+
+from colormydesktop import icons
+
+
+SVG = '<svg><path fill="#5294E2"/><path fill="#2e6bb4"/><path fill="#84afea"/></svg>\n'
+COLORS = ("#3584e4", "#241f31", "#f9f9f9")
+
+
+class RecolorThemeTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.theme = self.tmp.name
+        for size in ("16x16", "48x48"):
+            folder = os.path.join(self.theme, size, "places")
+            os.makedirs(folder)
+            for name in ("folder", "user-home"):
+                self.write(os.path.join(size, "places", f"{name}-blue.svg"), SVG)
+                os.symlink(f"{name}-blue.svg", os.path.join(folder, f"{name}.svg"))
+
+    def write(self, rel, content):
+        with open(os.path.join(self.theme, rel), "w") as f:
+            f.write(content)
+
+    def read(self, rel):
+        with open(os.path.join(self.theme, rel), "r") as f:
+            return f.read()
+
+    def recolor(self, colors=COLORS):
+        return icons.recolor_theme(self.theme, *colors, workers=1)
+
+    def manifest(self):
+        with open(os.path.join(self.theme, icons.MANIFEST_NAME), "r") as f:
+            return json.load(f)
+
+    def test_first_run_recolors_everything(self):
+        self.assertEqual(self.recolor(), 4)
+        twin = "16x16/places/folder-cmg.svg"
+        self.assertEqual(self.read(twin), '<svg><path fill="#3584e4"/><path fill="#241f31"/><path fill="#f9f9f9"/></svg>\n')
+        self.assertEqual(os.readlink(os.path.join(self.theme, "16x16/places/folder.svg")), "folder-cmg.svg")
+
+        manifest = self.manifest()
+        self.assertEqual(manifest["mapping"], icons.mapping_key(icons.color_map(*COLORS)))
+        self.assertEqual(len(manifest["icons"]), 4)
+        self.assertTrue(all(entry["sha"] for entry in manifest["icons"].values()))
+
+    def test_same_colors_rewrite_nothing(self):
+        self.recolor()
+        twin = os.path.join(self.theme, "48x48/places/user-home-cmg.svg")
+        before = os.stat(twin).st_mtime_ns
+        self.assertEqual(self.recolor(), 0)
+        self.assertEqual(os.stat(twin).st_mtime_ns, before)
+
+    def test_touched_source_with_same_content_is_kept(self):
+        self.recolor()
+        source = os.path.join(self.theme, "16x16/places/folder-blue.svg")
+        os.utime(source, ns=(0, 0))
+        self.assertEqual(self.recolor(), 0)
+        # The new stat is remembered, the next run does not even hash it
+        self.assertEqual(self.manifest()["icons"]["16x16/places/folder-blue.svg"]["stat"][1], 0)
+
+    def test_changed_source_is_rewritten(self):
+        self.recolor()
+        self.write("16x16/places/folder-blue.svg", SVG.replace("<svg>", "<svg><g/>"))
+        self.assertEqual(self.recolor(), 1)
+        self.assertIn("<g/>", self.read("16x16/places/folder-cmg.svg"))
+
+    def test_new_colors_rewrite_everything(self):
+        self.recolor()
+        self.assertEqual(self.recolor(("#c6a000", "#2b1d16", "#fbeee4")), 4)
+        self.assertIn("#c6a000", self.read("16x16/places/folder-cmg.svg"))
+
+    def test_missing_twin_or_link_is_restored(self):
+        self.recolor()
+        os.remove(os.path.join(self.theme, "16x16/places/folder-cmg.svg"))
+        link = os.path.join(self.theme, "48x48/places/folder.svg")
+        os.remove(link)
+        os.symlink("folder-blue.svg", link)
+        self.assertEqual(self.recolor(), 2)
+        self.assertEqual(os.readlink(link), "folder-cmg.svg")
+
+    def test_removed_source_leaves_the_manifest(self):
+        self.recolor()
+        os.remove(os.path.join(self.theme, "48x48/places/user-home-blue.svg"))
+        self.assertEqual(self.recolor(), 0)
+        self.assertNotIn("48x48/places/user-home-blue.svg", self.manifest()["icons"])
+
+    def test_unreadable_manifest_starts_over(self):
+        self.recolor()
+        self.write(icons.MANIFEST_NAME, "{not json")
+        self.assertEqual(self.recolor(), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.profiles: partial parsing and the profile index.
+# Run from the repository root: python3 -m unittest discover tests
+
+import os
+import tempfile
+import unittest
+
+from colormydesktop.profiles import ProfileIndex, parse_partial, profile_name
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ParsePartialTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_palette(self):
+        profile = parse_partial(os.path.join(REPO_DIR, "palettes", "_Blue.scss"))
+        self.assertEqual(profile.name, "Blue")
+        self.assertFalse(profile.transparent)
+        self.assertIsNone(profile.alpha)
+        self.assertEqual(profile.get("primary"), "#488599")
+        self.assertEqual(profile.get("tertiary-light"), "rgba($tertiary, 0.25)")
+        self.assertEqual(profile.get("missing", "#000000"), "#000000")
+
+    def test_transparent_header(self):
+        path = self.write("_Glass.scss", "// TRANSPARENT: true (0.65)\n$primary: #3584e4;\n")
+        profile = parse_partial(path)
+        self.assertTrue(profile.transparent)
+        self.assertEqual(profile.alpha, "0.65")
+
+    def test_layout_quirks(self):
+        path = self.write("_My Profile.scss", (
+            "  $primary :   #3584e4 ;  \n"
+            "// $primary: #000000;\n"
+            "$primary: #ffffff;\n"
+            "@use 'sass:color';\n"
+            "$text: #f9f9f9; // light\n"
+        ))
+        profile = parse_partial(path)
+        self.assertEqual(profile.name, "My Profile")
+        # Comments are skipped and the first declaration wins
+        self.assertEqual(profile.variables, {"primary": "#3584e4", "text": "#f9f9f9"})
+
+    def test_profile_name(self):
+        self.assertEqual(profile_name("_Blue.scss"), "Blue")
+        self.assertIsNone(profile_name("gtk4.scss"))
+        self.assertIsNone(profile_name("_Blue.scss.bak"))
+        self.assertIsNone(profile_name(None))
+
+
+class ProfileIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.index = ProfileIndex(self.tmp.name)
+
+    def write(self, name, content):
+        with open(os.path.join(self.tmp.name, f"_{name}.scss"), "w") as f:
+            f.write(content)
+
+    def test_refresh_reports_what_changed(self):
+        self.write("Blue", "$primary: #488599;\n")
+        self.write("Grey", "$primary: #555555;\n")
+        self.assertEqual(self.index.refresh(), ({"Blue", "Grey"}, set(), set()))
+        self.assertEqual(self.index.names(), ["Blue", "Grey"])
+
+        self.write("Blue", "$primary: #000000; $secondary: #111111;\n")
+        os.remove(os.path.join(self.tmp.name, "_Grey.scss"))
+        self.write("Red", "$primary: #aa0000;\n")
+        self.assertEqual(self.index.refresh(), ({"Red"}, {"Blue"}, {"Grey"}))
+
+    def test_get_parses_once_and_rereads_changes(self):
+        self.write("Blue", "$primary: #488599;\n")
+        first = self.index.get("Blue")
+        self.assertIs(self.index.get("Blue"), first)
+
+        self.write("Blue", "$primary: #123456;   \n")
+        self.assertEqual(self.index.get("Blue").get("primary"), "#123456")
+
+    def test_deleted_profile_is_forgotten(self):
+        self.write("Blue", "$primary: #488599;\n")
+        self.index.refresh()
+        os.remove(os.path.join(self.tmp.name, "_Blue.scss"))
+        self.assertIsNone(self.index.get("Blue"))
+        self.assertNotIn("Blue", self.index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.sass_service: the hand-rolled protobuf and the warm compiler.
+# The Sass tests use $SASS, the installed dart-sass or sass on PATH, and are
+# skipped without one.
+# Run from the repository root: python3 -m unittest discover tests
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+
+from colormydesktop import sass_service
+
+
+def find_sass():
+    sass = os.environ.get("SASS") or os.path.expanduser("~/.local/share/color-my-desktop/.venv/bin/sass")
+    if os.access(sass, os.X_OK):
+        return sass
+    return shutil.which("sass")
+
+
+SASS = find_sass()
+
+STYLESHEET = """\
+@use 'sass:color';
+$primary: #3584E4;
+.a { color: $primary; background: color.adjust($primary, $lightness: -10%); content: "é"; }
+"""
+
+
+class ProtobufTest(unittest.TestCase):
+    def test_varint_round_trip(self):
+        for value in (0, 1, 127, 128, 300, 2 ** 32 + 5):
+            with self.subTest(value=value):
+                encoded = sass_service.encode_varint(value)
+                self.assertEqual(sass_service.decode_varint(b"\xff" + encoded, 1), (value, len(encoded) + 1))
+        self.assertEqual(sass_service.encode_varint(300), b"\xac\x02")
+
+    def test_fields_round_trip(self):
+        message = (sass_service.encode_field(1, "css")
+                   + sass_service.encode_field(4, True)
+                   + sass_service.encode_field(4, 150)
+                   + sass_service.encode_field(2, sass_service.encode_field(1, b"nested")))
+        fields = sass_service.decode_fields(message)
+        self.assertEqual(fields[1], [b"css"])
+        self.assertEqual(fields[4], [1, 150])
+        self.assertEqual(sass_service.decode_fields(fields[2][0]), {1: [b"nested"]})
+
+    def test_unreachable_service(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertIsNone(sass_service.compile_files(os.path.join(tmp, "none.sock"), ["a.scss"]))
+
+
+@unittest.skipUnless(SASS, "no dart-sass found (set SASS)")
+class EmbeddedSassTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.good = self.write("good.scss", STYLESHEET)
+        self.broken = self.write("broken.scss", ".a { color: $missing; }\n")
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def cli(self, source):
+        output = source + ".css"
+        subprocess.run([SASS, "--style", "expanded", "--no-source-map", "--no-error-css",
+                        f"{source}:{output}"], check=True, capture_output=True)
+        with open(output, "r") as f:
+            return f.read()
+
+    def test_same_output_as_the_cli(self):
+        sass = sass_service.EmbeddedSass(SASS)
+        self.addCleanup(sass.stop)
+        results, _ = sass.compile([self.good, self.broken])
+        self.assertEqual(results[0], {"css": self.cli(self.good)})
+        self.assertIn("Undefined variable", results[1]["error"])
+
+        # The same process keeps compiling
+        results, _ = sass.compile([self.good])
+        self.assertEqual(results[0], {"css": self.cli(self.good)})
+
+    def test_service_over_the_socket(self):
+        path = os.path.join(self.tmp.name, "sass.sock")
+        service = sass_service.SassService(path, SASS)
+        threading.Thread(target=service.serve_forever, daemon=True).start()
+
+        def stop():
+            service.shutdown()
+            service.server_close()
+            service.sass.stop()
+        self.addCleanup(stop)
+
+        results, _ = sass_service.compile_files(path, [self.good, self.broken])
+        self.assertEqual(results[0], {"css": self.cli(self.good)})
+        self.assertIn("error", results[1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.slots: slot templates, and rendering against real Sass.
+# The Sass tests use $SASS, the installed dart-sass or sass on PATH, and are
+# skipped without one.
+# Run from the repository root: python3 -m unittest discover tests
+
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from colormydesktop.slots import SlotRenderer, SlotTemplate, sentinel, sentinel_literal
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def find_sass():
+    sass = os.environ.get("SASS") or os.path.expanduser("~/.local/share/color-my-desktop/.venv/bin/sass")
+    if os.access(sass, os.X_OK):
+        return sass
+    return shutil.which("sass")
+
+
+SASS = find_sass()
+
+
+def sentinel_css(variant):
+    """What Sass would print for a template using $primary as written and $text in rgba()."""
+    r, g, b = sentinel(1, variant)
+    return (f".a {{\n  color: {sentinel_literal(0, variant)};\n}}\n"
+            f".b {{\n  background: rgba({r}, {g}, {b}, 0.25);\n}}\n")
+
+
+class SlotTemplateTest(unittest.TestCase):
+    variables = ["primary", "text"]
+
+    def test_render_fills_every_slot(self):
+        template = SlotTemplate.from_outputs([sentinel_css(v) for v in range(3)], self.variables)
+        self.assertTrue(template.trackable)
+        self.assertEqual(template.render({"primary": "#3584E4", "text": "#fff"}),
+                         ".a {\n  color: #3584E4;\n}\n.b {\n  background: rgba(255, 255, 255, 0.25);\n}\n")
+
+    def test_other_colors_are_literal_text(self):
+        outputs = [sentinel_css(v) + ".c {\n  color: #123456;\n}\n" for v in range(3)]
+        template = SlotTemplate.from_outputs(outputs, self.variables)
+        self.assertTrue(template.trackable)
+        self.assertTrue(template.render({"primary": "#000", "text": "#000"}).endswith("color: #123456;\n}\n"))
+
+    def test_color_dependent_output_is_untrackable(self):
+        # Set B took another branch (an @if on lightness, say)
+        outputs = [sentinel_css(v) for v in range(3)]
+        outputs[1] = outputs[1].replace("0.25", "0.5")
+        self.assertFalse(SlotTemplate.from_outputs(outputs, self.variables).trackable)
+
+    def test_computed_color_is_untrackable(self):
+        # Sass prints colors it computed in lower case
+        outputs = [sentinel_css(v).replace(sentinel_literal(0, v), sentinel_literal(0, v).lower())
+                   for v in range(3)]
+        self.assertFalse(SlotTemplate.from_outputs(outputs, self.variables).trackable)
+
+    def test_json_round_trip(self):
+        template = SlotTemplate.from_outputs([sentinel_css(v) for v in range(3)], self.variables)
+        copy = SlotTemplate.from_json(template.to_json())
+        values = {"primary": "#246cc5", "text": "#f9f9f9"}
+        self.assertEqual(copy.render(values), template.render(values))
+
+
+@unittest.skipUnless(SASS, "no dart-sass found (set SASS)")
+class RenderAgainstSassTest(unittest.TestCase):
+    """Every template that learns as trackable renders exactly what Sass compiles."""
+
+    templates = ["gtk4.scss", "zen.scss", "youtube.scss", "Color-My-Desktop.scss"]
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.renderer = SlotRenderer(os.path.join(self.tmp.name, "slots"), "test")
+
+        with open(os.path.join(REPO_DIR, "palettes", "_Blue.scss"), "r") as f:
+            blue = f.read()
+        self.write("_Blue.scss", blue)
+        # Same layout, other colors, some in upper case or three digits
+        recolored = iter(["#C6A000", "#2b1d16", "#FFF", "#1a1411", "#fbeee4", "#ABC", "#7f3f00"] * 4)
+        self.write("_Other.scss", re.sub(r"#[0-9a-fA-F]{6}\b", lambda m: next(recolored), blue))
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def prepare(self, template, profile):
+        """The template pointed at a profile, like the backend's set_profile_import."""
+        with open(os.path.join(REPO_DIR, "scss", template), "r") as f:
+            lines = [line for line in f.read().splitlines(True) if not line.startswith("@use")]
+        use = f"@use '{os.path.join(self.tmp.name, profile)}' as *;\n"
+        return self.write(f"{profile}-{template}", use + "".join(lines))
+
+    def compile(self, source):
+        output = source[:-len(".scss")] + ".css"
+        subprocess.run([SASS, "--style", "expanded", "--no-source-map", "--no-error-css",
+                        f"{source}:{output}"], check=True, capture_output=True)
+        with open(output, "r") as f:
+            return f.read()
+
+    def test_rendered_equals_compiled(self):
+        trackable = []
+        for template in self.templates:
+            with self.subTest(template=template):
+                jobs = self.renderer.sentinel_jobs(self.prepare(template, "Blue"))
+                self.assertEqual(len(jobs), 3)
+                subprocess.run([SASS, "--style", "expanded", "--no-source-map", "--no-error-css"]
+                               + [f"{source}:{output}" for source, output in jobs],
+                               check=True, capture_output=True)
+                learned = self.renderer.learn()
+
+                source = self.prepare(template, "Other")
+                rendered = self.renderer.render(source)
+                if learned == [True]:
+                    trackable.append(template)
+                    self.assertEqual(rendered, self.compile(source))
+                else:
+                    self.assertIsNone(rendered)
+
+        self.assertTrue(trackable, "no template could be learned")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.thumbnails: the swatch strip, its PNG encoder and the cache.
+# Run from the repository root: python3 -m unittest discover tests
+
+import os
+import queue
+import struct
+import tempfile
+import unittest
+import zlib
+
+from colormydesktop import thumbnails
+
+
+COLORS = [(53, 132, 228), (36, 31, 49), (30, 30, 30)]
+
+
+def read_png(data):
+    """Checks the chunks of an 8-bit RGB PNG and returns (width, height, raw rows)."""
+    assert data[:8] == b"\x89PNG\r\n\x1a\n", "no PNG signature"
+    chunks = []
+    index = 8
+    while index < len(data):
+        length, = struct.unpack(">I", data[index:index + 4])
+        tag = data[index + 4:index + 8]
+        body = data[index + 8:index + 8 + length]
+        crc, = struct.unpack(">I", data[index + 8 + length:index + 12 + length])
+        assert crc == zlib.crc32(tag + body) & 0xffffffff, f"bad CRC in {tag}"
+        chunks.append((tag, body))
+        index += 12 + length
+
+    tags = [tag for tag, _ in chunks]
+    assert tags[0] == b"IHDR" and tags[-1] == b"IEND", tags
+    width, height, depth, color_type, compression, filtering, interlace = struct.unpack(">IIBBBBB", chunks[0][1])
+    assert (depth, color_type, compression, filtering, interlace) == (8, 2, 0, 0, 0)
+
+    data = zlib.decompress(b"".join(body for tag, body in chunks if tag == b"IDAT"))
+    stride = width * 3 + 1
+    rows = [data[y * stride:(y + 1) * stride] for y in range(height)]
+    assert all(row[0] == 0 for row in rows), "unexpected row filter"
+    return width, height, b"".join(row[1:] for row in rows)
+
+
+class StripTest(unittest.TestCase):
+    def test_bands(self):
+        raw = thumbnails.render_strip(COLORS, width=6, height=2)
+        row = bytes(COLORS[0]) * 2 + bytes(COLORS[1]) * 2 + bytes(COLORS[2]) * 2
+        self.assertEqual(raw, row * 2)
+
+    def test_bands_cover_the_width(self):
+        raw = thumbnails.render_strip(COLORS, width=128, height=1)
+        self.assertEqual(len(raw), 128 * 3)
+        self.assertEqual(raw[-3:], bytes(COLORS[-1]))
+
+    def test_no_colors_is_black(self):
+        self.assertEqual(thumbnails.render_strip([], width=4, height=2), bytes(4 * 2 * 3))
+
+    def test_png_round_trip(self):
+        raw = thumbnails.render_strip(COLORS)
+        width, height, decoded = read_png(thumbnails.encode_png(raw, thumbnails.WIDTH, thumbnails.HEIGHT))
+        self.assertEqual((width, height), (thumbnails.WIDTH, thumbnails.HEIGHT))
+        self.assertEqual(decoded, raw)
+
+    def test_palette_key(self):
+        self.assertEqual(thumbnails.palette_key(COLORS), thumbnails.palette_key(list(COLORS)))
+        self.assertNotEqual(thumbnails.palette_key(COLORS), thumbnails.palette_key(COLORS[::-1]))
+
+
+class ThumbnailCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.palettes = {"Blue": COLORS, "Copy": COLORS, "Grey": [(85, 85, 85)]}
+        self.ready = queue.Queue()
+        # The texture stands in for Gdk.Texture: the PNG's path
+        self.cache = thumbnails.ThumbnailCache(self.tmp.name, self.resolve, lambda path: path,
+                                               lambda *args: self.ready.put(args), memory_limit=2)
+
+    def resolve(self, name):
+        return self.palettes[name]
+
+    def fetch(self, name):
+        self.cache.request(name)
+        name, key, texture = self.ready.get(timeout=5)
+        self.cache.remember(name, key, texture)
+        return key, texture
+
+    def test_request_renders_and_delivers(self):
+        key, path = self.fetch("Blue")
+        self.assertEqual(key, thumbnails.palette_key(COLORS))
+        with open(path, "rb") as f:
+            self.assertEqual(read_png(f.read())[2], thumbnails.render_strip(COLORS))
+        self.assertEqual(self.cache.lookup("Blue"), path)
+
+    def test_same_colors_share_a_file(self):
+        _, first = self.fetch("Blue")
+        _, second = self.fetch("Copy")
+        self.assertEqual(first, second)
+        self.assertEqual(len(os.listdir(self.tmp.name)), 1)
+
+    def test_failure_delivers_none(self):
+        self.cache.request("Missing")
+        name, key, texture = self.ready.get(timeout=5)
+        self.assertEqual(name, "Missing")
+        self.assertIsNone(texture)
+        self.cache.remember(name, key, texture)
+        self.assertIsNone(self.cache.lookup("Missing"))
+        # Not pending any more, so it can be asked for again
+        self.assertNotIn("Missing", self.cache.pending)
+
+    def test_memory_is_bounded_and_forget_drops_the_name(self):
+        self.fetch("Blue")
+        self.fetch("Grey")
+        self.palettes["Red"] = [(170, 0, 0)]
+        self.fetch("Red")
+        # Blue's texture was the least recently used of three
+        self.assertIsNone(self.cache.lookup("Blue"))
+        self.assertIsNotNone(self.cache.lookup("Red"))
+
+        self.cache.forget("Red")
+        self.assertIsNone(self.cache.lookup("Red"))
+
+    def test_prune_keeps_the_newest_files(self):
+        self.cache.disk_limit = 1
+        self.fetch("Blue")
+        _, newest = self.fetch("Grey")
+        os.utime(newest, (2e9, 2e9))
+        self.cache.prune()
+        self.assertEqual(os.listdir(self.tmp.name), [os.path.basename(newest)])
+
+
+if __name__ == "__main__":
+    unittest.main()
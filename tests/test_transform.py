@@ -0,0 +1,90 @@
+# Copyright 2026 Schwarzen
+# SPDX-License-Identifier: Apache-2.0
+
+# colormydesktop.transform against the "sed -i" chain the backend used to run
+# over the gnome-shell template (skipped without sed).
+# Run from the repository root: python3 -m unittest discover tests
+
+import itertools
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from colormydesktop.transform import SOLID_VARIABLES, TRANSPARENT_VARIABLES, transform
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT = "@use '/home/user/.local/share/color-my-desktop/scss/_My Profile' as *;"
+
+# The corner cases of the old expressions, next to the real template
+SAMPLE = """\
+@use 'brown' as *;
+$panel: $primary;
+.a { background-color: $primary; color: $text; }
+.b { background-color: rgba($secondary, 0.5); border: 1px solid $tertiary-light; }
+.c { background: mix($tertiary,$primary, 50%); }
+#panel { background-color: $primary; } // BAR_TARGET
+.clock { color: $text; } // TIME_TARGET
+.d { color: rgba($topbar-color, 0.3); background: rgba($clock-color, 1); }
+"""
+
+
+def sed_chain(path, import_statement, alpha, topbar, clock):
+    """Rewrites 'path' in place with the sed commands of the old backend, in their order."""
+    def sed(script):
+        subprocess.run(["sed", "-i", script, path], check=True)
+
+    if import_statement is not None:
+        sed("/^@use/d")
+        with open(path, "r") as f:
+            content = f.read()
+        with open(path, "w") as f:
+            f.write(import_statement + "\n" + content)
+
+    if alpha is None:
+        for var in SOLID_VARIABLES:
+            sed(f"s/rgba(\\${var}, [0-9.]*)/\\${var}/g")
+    else:
+        for var in TRANSPARENT_VARIABLES:
+            sed(f"/BAR_TARGET/! s/\\([^a(]\\)\\${var}/\\1rgba(\\${var}, {alpha})/g")
+
+    sed(f"/BAR_TARGET/s/\\$[a-zA-Z0-9_-]*/\\${'topbar-color' if topbar else 'primary'}/")
+    sed(f"/TIME_TARGET/s/\\$[a-zA-Z0-9_-]*/\\${'clock-color' if clock else 'text'}/")
+
+
+@unittest.skipUnless(shutil.which("sed"), "sed not found")
+class TransformTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def assert_same_as_sed(self, content):
+        path = os.path.join(self.tmp.name, "temp.scss")
+        for import_statement, alpha, topbar, clock in itertools.product(
+                (IMPORT, None), (None, "0.8"), (False, True), (False, True)):
+            with self.subTest(import_statement=import_statement, alpha=alpha, topbar=topbar, clock=clock):
+                with open(path, "w") as f:
+                    f.write(content)
+                sed_chain(path, import_statement, alpha, topbar, clock)
+                with open(path, "r") as f:
+                    expected = f.read()
+                self.assertEqual(transform(content, import_statement, alpha, topbar, clock), expected)
+
+    def test_sample(self):
+        self.assert_same_as_sed(SAMPLE)
+
+    def test_gnome_shell_template(self):
+        with open(os.path.join(REPO_DIR, "scss", "gnome-shell.scss"), "r") as f:
+            self.assert_same_as_sed(f.read())
+
+    def test_template_already_wrapped(self):
+        # A template someone edited with transparency baked in
+        wrapped = transform(SAMPLE, alpha="0.6")
+        self.assert_same_as_sed(wrapped)
+
+
+if __name__ == "__main__":
+    unittest.main()